@@ -1,11 +1,20 @@
 import json
 import os
 
-with open(os.path.join(os.path.dirname(__file__), '../settings/keys.json')) as f:
-    _key_info = json.load(f)
+_key_info: dict | None = None
+
+
+def _load_key_info() -> dict:
+    # settings/keys.json은 key가 처음 필요할 때 한 번만 읽음 (import 시에는 읽지 않음)
+    global _key_info
+    if _key_info is None:
+        with open(os.path.join(os.path.dirname(__file__), '../settings/keys.json')) as f:
+            _key_info = json.load(f)
+    return _key_info
 
 def get_api_key_pair(exchange: str) -> tuple[str, str]:
-    return _key_info[exchange]['api'], _key_info[exchange]['secret']
+    key_info = _load_key_info()
+    return key_info[exchange]['api'], key_info[exchange]['secret']
 
 def get_api_key_pairs(exchange: str) -> list[tuple[str, str]]:
-    return [(k['api'], k['secret']) for k in _key_info[exchange]]
+    return [(k['api'], k['secret']) for k in _load_key_info()[exchange]]
@@ -0,0 +1,336 @@
+import sys
+from decimal import Decimal
+
+import numpy as np
+
+
+class ArrayBookSide:
+    """ 한쪽 호가를 가격 tick 위치로 index 한 수량 배열로 관리
+
+        qty[i]는 가격 (base + i) * tick 의 수량 (0이면 호가 없음)
+        - 갱신: 배열 위치에 바로 씀 (O(1)), 최우선 호가가 지워질 때만 다음 호가를 vectorized scan
+        - 범위 밖의 가격이 들어오면 배열을 두 배씩 늘리되 `max_capacity`까지만 늘림
+        - 그보다 먼 호가(ex. 현재가의 10배 가격의 매도 호가)는 배열 대신 `far`(tick 위치 -> 수량)에 둠
+          far의 호가는 항상 배열의 호가보다 나쁜 쪽에 있고, 최우선 호가가 배열 밖으로 나가면 그 가격을 중심으로 배열을 다시 잡음
+    """
+    __slots__ = ('is_bid', 'tick', 'tick_units', 'scale', 'base', 'qty', 'best_index', 'max_capacity', 'far', 'raw')
+
+    def __init__(self, is_bid: bool, tick: float, capacity: int = 4096, max_capacity: int = 1 << 16):
+        self.is_bid = is_bid
+        self.tick = tick
+        # 가격 = 정수 (tick 위치 * tick_units) / scale
+        # 정수를 10의 거듭제곱으로 나누면 float('50000.1')과 같은 값이 되므로 tick * index 의 오차가 생기지 않음
+        decimals = max(0, -Decimal(str(tick)).as_tuple().exponent)
+        self.scale = 10 ** decimals
+        self.tick_units = round(tick * self.scale)
+        self.base: int | None = None
+        self.qty = np.zeros(min(capacity, max_capacity), dtype=np.float64)
+        # 최우선 호가의 index (-1이면 호가 없음)
+        self.best_index = -1
+        self.max_capacity = max_capacity
+        self.far: dict[int, float] = {}
+        # OrderBook과 같은 interface를 위해 둠 (원본 문자열은 보관하지 않음)
+        self.raw = None
+
+    def _ensure(self, low: int, high: int) -> bool:
+        """ tick 위치 low ~ high 가 배열 안에 들어오도록 base와 크기를 조정 (`max_capacity`를 넘어야 하면 False) """
+        size = len(self.qty)
+        if self.base is None:
+            self.base = (low + high) // 2 - size // 2
+        if low >= self.base and high < self.base + size:
+            return True
+
+        new_low = min(low, self.base)
+        new_high = max(high, self.base + size - 1)
+        if new_high - new_low + 1 > self.max_capacity:
+            return False
+        new_size = size
+        while new_size < new_high - new_low + 1:
+            new_size *= 2
+        new_size = min(new_size, self.max_capacity)
+        # 늘어난 공간을 양쪽에 나눠서 이후 가격 이동에도 다시 늘리지 않도록 함
+        new_base = new_low - (new_size - (new_high - new_low + 1)) // 2
+
+        qty = np.zeros(new_size, dtype=np.float64)
+        offset = self.base - new_base
+        qty[offset:offset + size] = self.qty
+        self.qty = qty
+        self.base = new_base
+        if self.best_index >= 0:
+            self.best_index += offset
+        # 늘어난 범위에 들어온 far의 호가는 배열로 옮김
+        for t in [t for t in self.far if new_base <= t < new_base + new_size]:
+            self.qty[t - new_base] = self.far.pop(t)
+        return True
+
+    def _recenter(self, center: int) -> None:
+        """ tick 위치 center가 배열 가운데 오도록 base를 옮기고, 배열 밖으로 나가는 호가는 far로, 들어오는 호가는 배열로 옮김 """
+        indices = np.flatnonzero(self.qty)
+        ticks = indices + self.base
+        qtys = self.qty[indices]
+        far = self.far
+
+        size = len(self.qty)
+        base = center - size // 2
+        self.qty = np.zeros(size, dtype=np.float64)
+        self.base = base
+        self.far = {}
+        inside = (ticks >= base) & (ticks < base + size)
+        self.qty[ticks[inside] - base] = qtys[inside]
+        self.far.update(zip(ticks[~inside].tolist(), qtys[~inside].tolist()))
+        for t, q in far.items():
+            if base <= t < base + size:
+                self.qty[t - base] = q
+            else:
+                self.far[t] = q
+
+        self.best_index = size - 1 if self.is_bid else 0
+        self._scan_best()
+
+    def _scan_best(self) -> None:
+        if self.is_bid:
+            nonzero = np.flatnonzero(self.qty[:self.best_index + 1])
+            self.best_index = int(nonzero[-1]) if len(nonzero) else -1
+        else:
+            start = max(self.best_index, 0)
+            nonzero = np.flatnonzero(self.qty[start:])
+            self.best_index = start + int(nonzero[0]) if len(nonzero) else -1
+        # 배열의 호가가 모두 지워지면 far 중 최우선 호가를 중심으로 배열을 다시 잡음
+        if self.best_index < 0 and self.far:
+            self._recenter(max(self.far) if self.is_bid else min(self.far))
+
+    def clear(self) -> None:
+        self.qty[:] = 0
+        self.best_index = -1
+        self.far.clear()
+        # 다음 snapshot의 가격대를 중심으로 배열을 다시 잡음
+        self.base = None
+
+    def set(self, price: str | float, qty: str | float) -> None:
+        """ 수량이 0이면 그 가격의 호가를 삭제 """
+        t = round(float(price) / self.tick)
+        q = float(qty)
+        if self.base is None or not 0 <= t - self.base < len(self.qty):
+            if not self._ensure(t, t):
+                self._set_far(t, q)
+                return
+        i = t - self.base
+        self.qty[i] = q
+
+        if q > 0:
+            if self.best_index < 0 or (i > self.best_index if self.is_bid else i < self.best_index):
+                self.best_index = i
+        elif i == self.best_index:
+            self._scan_best()
+
+    def _set_far(self, t: int, q: float) -> None:
+        """ 배열을 `max_capacity`보다 늘려야 하는 위치의 호가 """
+        if q <= 0:
+            self.far.pop(t, None)
+            return
+        self.far[t] = q
+        # 최우선 호가보다 좋은 가격이면 (가격이 배열 밖으로 크게 움직인 경우) 그 가격을 중심으로 배열을 다시 잡음
+        best = self.best_index
+        if best < 0 or (t > self.base + best if self.is_bid else t < self.base + best):
+            self._recenter(t)
+
+    def set_many(self, prices, qtys) -> None:
+        """ 여러 호가를 한 번에 갱신 (snapshot 용) """
+        ticks = np.rint(np.asarray(prices, dtype=np.float64) / self.tick).astype(np.int64)
+        if not len(ticks):
+            return
+        qtys = np.asarray(qtys, dtype=np.float64)
+        if not self._ensure(int(ticks.min()), int(ticks.max())):
+            # 배열에 다 들어가지 않으면 최우선 호가를 중심으로 잡고 나머지는 far로
+            if self.base is None:
+                self.base = 0
+            self.far.update(zip(ticks.tolist(), qtys.tolist()))
+            self._recenter(int(ticks.max()) if self.is_bid else int(ticks.min()))
+            return
+        self.qty[ticks - self.base] = qtys
+        self.best_index = len(self.qty) - 1 if self.is_bid else 0
+        self._scan_best()
+
+    def _price(self, i: int | np.ndarray) -> float | np.ndarray:
+        return (self.base + i) * self.tick_units / self.scale
+
+    def _far_levels(self, n: int | None = None) -> list[tuple[int, float]]:
+        """ far의 (tick 위치, 수량), 좋은 가격부터 """
+        if not self.far:
+            return []
+        levels = sorted(self.far.items(), reverse=self.is_bid)
+        return levels if n is None else levels[:n]
+
+    def _levels(self) -> tuple[np.ndarray, np.ndarray]:
+        """ 모든 호가의 (가격, 수량) 배열, 최우선 호가부터 """
+        indices = self._indices()
+        prices = self._price(indices)
+        qtys = self.qty[indices]
+        far = self._far_levels()
+        if far:
+            far_ticks, far_qtys = zip(*far)
+            prices = np.concatenate([prices, np.asarray(far_ticks, dtype=np.int64) * self.tick_units / self.scale])
+            qtys = np.concatenate([qtys, np.asarray(far_qtys, dtype=np.float64)])
+        return prices, qtys
+
+    def _indices(self, n: int | None = None) -> np.ndarray:
+        """ 배열에서 호가가 있는 index (최우선 호가부터), n을 주면 최우선 호가 근처부터 나눠서 찾음 """
+        best = self.best_index
+        if best < 0:
+            return np.zeros(0, dtype=np.int64)
+        if n is None:
+            if self.is_bid:
+                return np.flatnonzero(self.qty[:best + 1])[::-1]
+            return np.flatnonzero(self.qty[best:]) + best
+
+        chunk = max(n * 4, 64)
+        found = []
+        count = 0
+        if self.is_bid:
+            end = best + 1
+            while end > 0 and count < n:
+                start = max(end - chunk, 0)
+                indices = np.flatnonzero(self.qty[start:end])[::-1]
+                indices += start
+                found.append(indices)
+                count += len(indices)
+                end = start
+        else:
+            start = best
+            while start < len(self.qty) and count < n:
+                indices = np.flatnonzero(self.qty[start:start + chunk])
+                indices += start
+                found.append(indices)
+                count += len(indices)
+                start += chunk
+        indices = found[0] if len(found) == 1 else np.concatenate(found)
+        return indices[:n]
+
+    def best(self) -> tuple[float, float] | None:
+        i = self.best_index
+        if i < 0:
+            return None
+        return (self.base + i) * self.tick_units / self.scale, self.qty.item(i)
+
+    def depth(self, n: int | None = None) -> list[tuple[float, float]]:
+        """ 최우선 호가부터 n개 (가격, 수량) """
+        # 호가 수가 적을 때는 numpy 연산을 여러 번 하는 것보다 Python에서 계산하는 것이 빠름
+        base, tick_units, scale, qty = self.base, self.tick_units, self.scale, self.qty
+        levels = [((base + i) * tick_units / scale, qty.item(i)) for i in self._indices(n).tolist()]
+        if self.far and (n is None or len(levels) < n):
+            levels += [(t * tick_units / scale, q) for t, q in self._far_levels(None if n is None else n - len(levels))]
+        return levels
+
+    def depth_to_notional(self, notional: float) -> tuple[float, float] | None:
+        """ 최우선 호가부터 누적 금액이 notional에 도달할 때까지의 (수량, 마지막 가격)
+
+            호가 전체의 금액이 notional보다 작으면 None
+        """
+        prices, qtys = self._levels()
+        cum_notional = np.cumsum(prices * qtys)
+        k = int(np.searchsorted(cum_notional, notional))
+        if k >= len(prices):
+            return None
+        # 마지막 호가는 필요한 만큼만 포함
+        before = cum_notional[k - 1] if k else 0.0
+        qty = (qtys[:k].sum() if k else 0.0) + (notional - before) / prices[k]
+        return float(qty), float(prices[k])
+
+    def vwap(self, qty: float) -> float | None:
+        """ qty 만큼 체결될 때의 평균 가격 (호가 수량이 부족하면 None) """
+        prices, qtys = self._levels()
+        cum_qty = np.cumsum(qtys)
+        k = int(np.searchsorted(cum_qty, qty))
+        if k >= len(prices):
+            return None
+        filled = qtys[:k]
+        notional = float(np.dot(prices[:k], filled)) + (qty - float(filled.sum())) * prices[k]
+        return notional / qty
+
+    @property
+    def nbytes(self) -> int:
+        return self.qty.nbytes + sys.getsizeof(self.far)
+
+    def __len__(self) -> int:
+        return len(self._indices()) + len(self.far)
+
+
+class ArrayBook:
+    """ tick 단위 배열로 관리하는 L2 호가창 (OrderBook과 같은 interface)
+
+        가격 범위가 tick 배열로 표현 가능한 종목(고정 tick)용, tick이 가격대마다 다르면 가장 작은 tick을 사용
+        OKX checksum처럼 원본 문자열이 필요한 경우는 OrderBook(keep_raw=True)을 사용
+
+        feed = BinanceFuturesBookFeed(['BTCUSDT'], book_factory=lambda exchange, symbol: ArrayBook(exchange, symbol, tick=0.1))
+    """
+    def __init__(self, exchange: str, symbol: str, tick: float, capacity: int = 4096, max_capacity: int = 1 << 16):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.bids = ArrayBookSide(is_bid=True, tick=tick, capacity=capacity, max_capacity=max_capacity)
+        self.asks = ArrayBookSide(is_bid=False, tick=tick, capacity=capacity, max_capacity=max_capacity)
+        self.sequence: int | None = None
+        self.timestamp: float | None = None
+        self.synced = False
+
+    def apply_snapshot(self, bids, asks, sequence: int | None = None, timestamp: float | None = None) -> None:
+        """ `bids`, `asks`는 [price, qty, ...] 형태의 목록 (가격/수량은 문자열 또는 숫자) """
+        self.bids.clear()
+        self.asks.clear()
+        for side, levels in ((self.bids, bids), (self.asks, asks)):
+            if levels:
+                side.set_many([level[0] for level in levels], [level[1] for level in levels])
+        if sequence is not None:
+            self.sequence = sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+        self.synced = True
+
+    def apply_delta(self, bids, asks, sequence: int | None = None, timestamp: float | None = None) -> None:
+        for level in bids:
+            self.bids.set(level[0], level[1])
+        for level in asks:
+            self.asks.set(level[0], level[1])
+        if sequence is not None:
+            self.sequence = sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+    def invalidate(self) -> None:
+        self.synced = False
+
+    def best_bid(self) -> tuple[float, float] | None:
+        return self.bids.best()
+
+    def best_ask(self) -> tuple[float, float] | None:
+        return self.asks.best()
+
+    def mid(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth(self, n: int | None = None) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
+        return self.bids.depth(n), self.asks.depth(n)
+
+    def vwap(self, side: str, qty: float) -> float | None:
+        """ side 'buy'는 ask를, 'sell'은 bid를 소진하며 qty 만큼 체결될 때의 평균 가격 """
+        return (self.asks if side == 'buy' else self.bids).vwap(qty)
+
+    def depth_to_notional(self, side: str, notional: float) -> tuple[float, float] | None:
+        """ side 'buy'는 ask를, 'sell'은 bid를 소진하며 notional 만큼 체결될 때의 (수량, 마지막 가격) """
+        return (self.asks if side == 'buy' else self.bids).depth_to_notional(notional)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bids.nbytes + self.asks.nbytes
+
+    def __repr__(self) -> str:
+        return (f'ArrayBook({self.exchange}, {self.symbol}, bid={self.best_bid()}, ask={self.best_ask()}, '
+                f'seq={self.sequence}, synced={self.synced})')
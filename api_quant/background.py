@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Coroutine
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class BackgroundLoop:
+    """ 별도 thread에서 asyncio event loop를 돌리고, 동기 코드에서 coroutine을 넣어 실행
+
+        WebSocket stream처럼 계속 떠 있어야 하는 작업을 동기 script(api_trading_script 등)에서 사용할 때 씀
+
+        loop = BackgroundLoop('user-stream')
+        future = loop.submit(stream.run())   # concurrent.futures.Future
+        ...
+        loop.stop()
+    """
+    def __init__(self, name: str = 'background-loop'):
+        self._name = name
+        self._loop: 'asyncio.AbstractEventLoop | None' = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> 'asyncio.AbstractEventLoop':
+        self.start()
+        return self._loop
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'BackgroundLoop':
+        with self._lock:
+            if self._loop is None:
+                import asyncio
+
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        import asyncio
+
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """ coroutine을 loop에 넣고 결과를 기다릴 수 있는 Future를 반환 """
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: float | None = None) -> Any:
+        """ coroutine을 loop에서 실행하고 결과를 기다림 (loop thread 안에서 호출하면 안 됨) """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError('background loop 안에서는 결과를 기다릴 수 없습니다.')
+        return self.submit(coro).result(timeout)
+
+    def call_soon(self, fn, *args) -> None:
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """ 남은 task를 취소하고 loop를 멈춤 """
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        import asyncio
+
+        async def cancel_tasks():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
@@ -1,12 +1,14 @@
-import hashlib
-import hmac
-import time
 from typing import Any
 from urllib.parse import urlencode
 
-import aiohttp
 import requests
 
+from . import metrics, ratelimit
+from .clock import ClockSync
+from .ratelimit import RateLimiter
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -14,16 +16,42 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class BaseApiClient:
+class BaseApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/api/v3/time'
+
     def __init__(
         self,
         key_pair: tuple[str, str],
         base_url: str,
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
+        self._rate_limiter = rate_limiter
     
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        return self._rate_limiter
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(res.json()['serverTime'])
+
+    def ws_signed_params(self, params: dict[str, Any]) -> dict[str, Any]:
+        """ WebSocket API 요청 params에 apiKey, timestamp, signature를 추가 (key 알파벳 순서의 query string으로 서명) """
+        params = dict(params, apiKey=self._api_key, timestamp=self._clock.now_ms())
+        params['signature'] = self._signer.hexdigest(urlencode(sorted(params.items())))
+        return params
+
     def get(
         self,
         endpoint: str,
@@ -67,6 +95,7 @@ class BaseApiClient:
         params: dict[str, Any] | None = None,
         require_api_key: bool = False,
         require_signature: bool = False,
+        timeout: float | None = None,
     ) -> requests.Response:
         if require_signature:
             require_api_key = True
@@ -74,27 +103,38 @@ class BaseApiClient:
         if params is None:
             params = {}
         
+        timer = metrics.timer('bnc', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint, params)
+        timer.lap('queue')
+
         headers = {}
         if method.upper() in ('POST', 'PUT', 'DELETE'):
             headers['Content-Type'] = 'application/json'
         if require_api_key:
             headers['X-MBX-APIKEY'] = self._api_key
         
+        url = self._base_url + endpoint
         if require_signature:
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
+        timer.lap('sign')
         
-        return requests.request(
+        res = self._send(
+            timer,
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params=params,
+            timeout=timeout,
         )
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(method, endpoint, res.status_code, res.headers)
+        return res
     
     async def request_async(
         self,
@@ -110,76 +150,123 @@ class BaseApiClient:
         if params is None:
             params = {}
         
+        timer = metrics.timer('bnc', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(method, endpoint, params)
+        timer.lap('queue')
+
         headers = {}
         if method.upper() in ('POST', 'PUT', 'DELETE'):
             headers['Content-Type'] = 'application/json'
         if require_api_key:
             headers['X-MBX-APIKEY'] = self._api_key
         
+        url = self._base_url + endpoint
         if require_signature:
-            
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
+        timer.lap('sign')
         
-        async with aiohttp.request(
+        async with self._send_async(
+            timer,
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params={k: str(params[k]) for k in params},
         ) as res:
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(method, endpoint, res.status, res.headers)
             # TODO : Error handling
             # TODO : Is it ok to return JSON directly?
-            return await res.json()
+            return await timer.json(res)
 
 
 class SpotApiClient(BaseApiClient):
     """ Spot / Margin / Savings / Mining
         https://binance-docs.github.io/apidocs/spot/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://api.binance.com')
+    def __init__(
+        self,
+        key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+        base_url: str = 'https://api.binance.com',
+    ):
+        super().__init__(key_pair, base_url, pool_config, rate_limiter or ratelimit.binance_spot())
 
 class SpotTestnetApiClient(BaseApiClient):
     """ Spot Testnet
         Doesn't support endpoints starting with `/sapi`
         https://testnet.binance.vision/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://testnet.binance.vision')
+    def __init__(
+        self,
+        key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        super().__init__(key_pair, 'https://testnet.binance.vision', pool_config, rate_limiter or ratelimit.binance_spot())
 
 
 class FuturesApiClient(BaseApiClient):
     """ USDⓢ-M Futures
         https://binance-docs.github.io/apidocs/futures/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://fapi.binance.com')
+    SERVER_TIME_ENDPOINT = '/fapi/v1/time'
+
+    def __init__(
+        self,
+        key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+        base_url: str = 'https://fapi.binance.com',
+    ):
+        super().__init__(key_pair, base_url, pool_config, rate_limiter or ratelimit.binance_futures())
 
 
 class FuturesTestnetApiClient(BaseApiClient):
     """ USDⓢ-M Futures Testnet
         https://binance-docs.github.io/apidocs/futures/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://testnet.binancefuture.com')
+    SERVER_TIME_ENDPOINT = '/fapi/v1/time'
+
+    def __init__(
+        self,
+        key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        super().__init__(key_pair, 'https://testnet.binancefuture.com', pool_config, rate_limiter or ratelimit.binance_futures())
 
 
 class CoinMarginFuturesApiClient(BaseApiClient):
     """ COIN-M Futures
         https://binance-docs.github.io/apidocs/delivery/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://dapi.binance.com')
+    SERVER_TIME_ENDPOINT = '/dapi/v1/time'
+
+    def __init__(
+        self,
+        key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        super().__init__(key_pair, 'https://dapi.binance.com', pool_config, rate_limiter)
 
 
 class OptionsApiClient(BaseApiClient):
     """ European Options ("Vanilla Options")
         https://binance-docs.github.io/apidocs/voptions/en/#general-info
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://eapi.binance.com')
+    SERVER_TIME_ENDPOINT = '/eapi/v1/time'
+
+    def __init__(
+        self,
+        key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
+    ):
+        super().__init__(key_pair, 'https://eapi.binance.com', pool_config, rate_limiter)
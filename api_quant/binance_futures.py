@@ -1,12 +1,14 @@
-import hashlib
-import hmac
-import time
 from typing import Any
 from urllib.parse import urlencode
 
-import aiohttp
 import requests
 
+from . import ratelimit
+from .clock import ClockSync
+from .ratelimit import RateLimiter
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -14,16 +16,36 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class ApiClient:
+class ApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/fapi/v1/time'
+
     def __init__(
         self,
         key_pair: tuple[str, str],
         base_url: str = 'https://fapi.binance.com',
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
+        self._rate_limiter = rate_limiter if rate_limiter is not None else ratelimit.binance_futures()
     
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        return self._rate_limiter
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(res.json()['serverTime'])
+
     def get(
         self,
         endpoint: str,
@@ -74,27 +96,33 @@ class ApiClient:
         if params is None:
             params = {}
         
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint, params)
+
         headers = {}
         if method.upper() in ('POST', 'PUT', 'DELETE'):
             headers['Content-Type'] = 'application/json'
         if require_api_key:
             headers['X-MBX-APIKEY'] = self._api_key
         
+        url = self._base_url + endpoint
         if require_signature:
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
         
-        return requests.request(
+        res = self._session.request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params=params,
         )
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(method, endpoint, res.status_code, res.headers)
+        return res
     
     async def request_async(
         self,
@@ -107,30 +135,34 @@ class ApiClient:
         if require_signature:
             require_api_key = True
 
+        if params is None:
+            params = {}
+
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(method, endpoint, params)
+
         headers = {}
         if method.upper() in ('POST', 'PUT', 'DELETE'):
             headers['Content-Type'] = 'application/json'
         if require_api_key:
             headers['X-MBX-APIKEY'] = self._api_key
 
+        url = self._base_url + endpoint
         if require_signature:
-            if params is None:
-                params = {}
-            
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
         
-        async with aiohttp.request(
+        async with self._get_async_session().request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params={k: str(params[k]) for k in params},
         ) as res:
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(method, endpoint, res.status, res.headers)
             # TODO : Error handling
             # TODO : Is it ok to return JSON directly?
             return await res.json()
@@ -140,5 +172,7 @@ class TestnetApiClient(ApiClient):
     def __init__(
         self,
         key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
-        super().__init__(key_pair, 'https://testnet.binancefuture.com')
+        super().__init__(key_pair, 'https://testnet.binancefuture.com', pool_config, rate_limiter)
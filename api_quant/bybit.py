@@ -1,13 +1,14 @@
-import hashlib
-import hmac
-import json
-import time
 from typing import Any
 from urllib.parse import urlencode
 
-import aiohttp
 import requests
 
+from . import metrics, ratelimit, serialization
+from .clock import ClockSync
+from .ratelimit import RateLimiter
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from project_logger import logger
 except ModuleNotFoundError:
@@ -16,15 +17,52 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class ApiClient:
+def request_body(params: dict[str, Any]) -> dict[str, Any]:
+    """ POST body의 값을 문자열로 변환 (batch 주문처럼 list/dict로 된 값은 구조를 유지하고 안쪽 값만 변환) """
+    def stringify(v: Any) -> Any:
+        if isinstance(v, dict):
+            return {k: stringify(x) for k, x in v.items()}
+        if isinstance(v, list | tuple):
+            return [stringify(x) for x in v]
+        return str(v)
+
+    return {k: stringify(v) for k, v in params.items()}
+
+
+class ApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/v5/market/time'
+
     def __init__(
             self,
             key_pair: tuple[str, str],
             base_url: str = 'https://api.bybit.com',
+            pool_config: PoolConfig | None = None,
+            rate_limiter: RateLimiter | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
+        self._rate_limiter = rate_limiter if rate_limiter is not None else ratelimit.bybit()
+
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        return self._rate_limiter
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(res.json()['result']['timeNano']) // 1_000_000
+
+    def ws_auth_message(self, expires_in_ms: int = 10_000) -> dict:
+        """ private WebSocket 인증 메시지 (서명 : 'GET/realtime' + 만료 시각) """
+        expires = self._clock.now_ms() + expires_in_ms
+        return {'op': 'auth', 'args': [self._api_key, expires, self._signer.hexdigest(f'GET/realtime{expires}')]}
 
     def get(
             self,
@@ -49,28 +87,40 @@ class ApiClient:
             params: dict[str, Any] | None = None,
             require_signature: bool = False,
             recv_window: int = 5000,
+            timeout: float | None = None,
     ) -> requests.Response:
         if params is None:
             params = {}
 
+        timer = metrics.timer('byb', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint, params)
+        timer.lap('queue')
+
         headers = {}
 
+        url = self._base_url + endpoint
+        query_string = ''
+        body = None
+        if method.upper() == 'GET':
+            if params:
+                # 서명에 사용한 query string을 그대로 URL에 사용
+                query_string = urlencode(params)
+                url += '?' + query_string
+        else:
+            # 서명한 bytes를 그대로 body로 보내도록 한 번만 serialize
+            body = serialization.dumps(request_body(params))
+            headers['Content-Type'] = 'application/json'
+
         if require_signature:
-            timestamp = int(time.time() * 1000)
+            timestamp = self._clock.now_ms()
 
-            if len(params) == 0:
-                prehash = f'{timestamp}{self._api_key}{recv_window}'
-            elif method.upper() == 'GET':
-                query_string = urlencode(params)
+            if method.upper() == 'GET':
                 prehash = f'{timestamp}{self._api_key}{recv_window}{query_string}'
             else:
-                prehash = f'{timestamp}{self._api_key}{recv_window}{json.dumps(params)}'
+                prehash = f'{timestamp}{self._api_key}{recv_window}'.encode() + body
 
-            sign = hmac.new(
-                self._secret_key.encode(),
-                msg=prehash.encode(),
-                digestmod=hashlib.sha256,
-            ).hexdigest()
+            sign = self._signer.hexdigest(prehash)
 
             headers |= {
                 # 'X-BAPI-SIGN-TYPE': '2',
@@ -79,22 +129,30 @@ class ApiClient:
                 'X-BAPI-TIMESTAMP': str(timestamp),
                 'X-BAPI-RECV-WINDOW': str(recv_window),
             }
+        timer.lap('sign')
 
         if method.upper() == 'GET':
-            return requests.request(
+            res = self._send(
+                timer,
                 method=method,
-                url=self._base_url + endpoint,
+                url=url,
                 headers=headers,
-                params={k: str(params[k]) for k in params},
+                timeout=timeout,
             )
         else:
-            return requests.request(
+            res = self._send(
+                timer,
                 method=method,
-                url=self._base_url + endpoint,
+                url=url,
                 headers=headers,
-                json={k: str(params[k]) for k in params},
+                data=body,
+                timeout=timeout,
             )
 
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(method, endpoint, res.status_code, res.headers)
+        return res
+
     async def request_async(
             self,
             method: str,
@@ -106,22 +164,35 @@ class ApiClient:
         if params is None:
             params = {}
 
+        timer = metrics.timer('byb', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(method, endpoint, params)
+        timer.lap('queue')
+
         headers = {}
 
+        url = self._base_url + endpoint
+        query_string = ''
+        body = None
+        if method.upper() == 'GET':
+            if params:
+                # 서명에 사용한 query string을 그대로 URL에 사용
+                query_string = urlencode(params)
+                url += '?' + query_string
+        else:
+            # 서명한 bytes를 그대로 body로 보내도록 한 번만 serialize
+            body = serialization.dumps(request_body(params))
+            headers['Content-Type'] = 'application/json'
+
         if require_signature:
-            timestamp = int(time.time() * 1000)
+            timestamp = self._clock.now_ms()
 
             if method.upper() == 'GET':
-                query_string = urlencode(params)
                 prehash = f'{timestamp}{self._api_key}{recv_window}{query_string}'
             else:
-                prehash = f'{timestamp}{self._api_key}{recv_window}{json.dumps(params)}'
+                prehash = f'{timestamp}{self._api_key}{recv_window}'.encode() + body
 
-            sign = hmac.new(
-                self._secret_key.encode(),
-                msg=prehash.encode(),
-                digestmod=hashlib.sha256,
-            ).hexdigest()
+            sign = self._signer.hexdigest(prehash)
 
             headers |= {
                 'X-BAPI-SIGN-TYPE': '2',
@@ -130,32 +201,40 @@ class ApiClient:
                 'X-BAPI-TIMESTAMP': str(timestamp),
                 'X-BAPI-RECV-WINDOW': str(recv_window),
             }
+        timer.lap('sign')
 
         if method.upper() == 'GET':
-            async with aiohttp.request(
+            async with self._send_async(
+                    timer,
                     method=method,
-                    url=self._base_url + endpoint,
+                    url=url,
                     headers=headers,
-                    params={k: str(params[k]) for k in params},
             ) as res:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(method, endpoint, res.status, res.headers)
                 # TODO : Error handling
                 # TODO : Is it ok to return JSON directly?
-                return await res.json()
+                return await timer.json(res)
         else:
-            async with aiohttp.request(
+            async with self._send_async(
+                    timer,
                     method=method,
-                    url=self._base_url + endpoint,
+                    url=url,
                     headers=headers,
-                    json={k: str(params[k]) for k in params},
+                    data=body,
             ) as res:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(method, endpoint, res.status, res.headers)
                 # TODO : Error handling
                 # TODO : Is it ok to return JSON directly?
-                return await res.json()
+                return await timer.json(res)
 
 
 class TestnetApiClient(ApiClient):
     def __init__(
             self,
             key_pair: tuple[str, str],
+            pool_config: PoolConfig | None = None,
+            rate_limiter: RateLimiter | None = None,
     ):
-        super().__init__(key_pair, 'https://api-testnet.bybit.com')
\ No newline at end of file
+        super().__init__(key_pair, 'https://api-testnet.bybit.com', pool_config, rate_limiter)
\ No newline at end of file
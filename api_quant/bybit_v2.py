@@ -1,11 +1,11 @@
-import hashlib
-import hmac
-import time
 from typing import Any
 
-import aiohttp
 import requests
 
+from .clock import ClockSync
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -13,16 +13,30 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class ApiClient:
+class ApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/v2/public/time'
+
     def __init__(
         self,
         key_pair: tuple[str, str],
         base_url: str = 'https://api.bybit.com',
+        pool_config: PoolConfig | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
     
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(float(res.json()['time_now']) * 1000)
+
     def get(
         self,
         endpoint: str,
@@ -49,22 +63,21 @@ class ApiClient:
         if params is None:
             params = {}
         
+        url = self._base_url + endpoint
         if require_signature:
             params['api_key'] = self._api_key
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             
             query_string = '&'.join(
                 [str(k) + '=' + str(v) for k, v in sorted(params.items()) if (k != 'sign') and (v is not None)]
             )
-            params['sign'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 사용
+            url += '?' + query_string + '&sign=' + self._signer.hexdigest(query_string)
+            params = {}
         
-        return requests.request(
+        return self._session.request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             params={k: str(params[k]) for k in params},
         )
     
@@ -75,25 +88,24 @@ class ApiClient:
         params: dict[str, Any] | None = None,
         require_signature: bool = False,
     ):
-        if require_signature:
-            if params is None:
-                params = {}
+        if params is None:
+            params = {}
 
+        url = self._base_url + endpoint
+        if require_signature:
             params['api_key'] = self._api_key
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
 
             query_string = '&'.join(
                 [str(k) + '=' + str(v) for k, v in sorted(params.items()) if (k != 'sign') and (v is not None)]
             )
-            params['sign'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 사용
+            url += '?' + query_string + '&sign=' + self._signer.hexdigest(query_string)
+            params = {}
         
-        async with aiohttp.request(
+        async with self._get_async_session().request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             params={k: str(params[k]) for k in params},
         ) as res:
             # TODO : Error handling
@@ -105,5 +117,6 @@ class TestnetApiClient(ApiClient):
     def __init__(
         self,
         key_pair: tuple[str, str],
+        pool_config: PoolConfig | None = None,
     ):
-        super().__init__(key_pair, 'https://api-testnet.bybit.com')
+        super().__init__(key_pair, 'https://api-testnet.bybit.com', pool_config)
@@ -0,0 +1,131 @@
+import asyncio
+import statistics
+import threading
+import time
+from typing import Callable
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+class ClockSync:
+    """ 거래소 서버 시간과 로컬 시간의 차이(offset)를 추정해서, 서명에 사용하는 timestamp를 보정
+
+        - 서버 시간을 `samples`번 조회하고, 각 조회마다 offset = server - (t_send + t_recv) / 2 를 계산
+        - 네트워크 지연이 비대칭일수록 오차가 커지므로 RTT가 작은 표본만 남겨서 그 중앙값을 offset으로 사용
+        - 오차 범위(uncertainty)는 남은 표본 중 최소 RTT의 절반 + 서버 시간 해상도(1ms)
+        - 동기화는 항상 background thread에서 하고 `now()`는 기다리지 않음
+          (처음 동기화가 끝나기 전에는 offset 0으로 서명하므로 첫 주문이 서버 시간 조회 때문에 늦어지지 않음)
+        - 처음 timestamp가 필요할 때 동기화를 시작하고, 이후에는 `resync_interval`초마다 다시 맞춤
+        - WebSocket 인증처럼 연결 전에 맞춰 두는 것이 좋은 곳에서는 `await wait_synced()`로 처음 동기화를 기다릴 수 있음
+    """
+    def __init__(
+            self,
+            fetch_server_time_ms: Callable[[], int],
+            samples: int = 5,
+            resync_interval: float = 300,
+    ):
+        self._fetch_server_time_ms = fetch_server_time_ms
+        self._samples = samples
+        self._resync_interval = resync_interval
+        self.auto_sync = True
+
+        self._offset_ms = 0.0
+        self._uncertainty_ms: float | None = None
+        self._rtt_ms: float | None = None
+        self._synced_at: float | None = None
+        self._sync_count = 0
+        self._error_count = 0
+        self._lock = threading.Lock()
+        self._syncing = False
+        # 처음 동기화 시도가 끝나면 set (성공 여부와 무관)
+        self._first_sync_done = threading.Event()
+
+    @property
+    def offset_ms(self) -> float:
+        return self._offset_ms
+
+    @property
+    def uncertainty_ms(self) -> float | None:
+        return self._uncertainty_ms
+
+    @property
+    def rtt_ms(self) -> float | None:
+        return self._rtt_ms
+
+    def metrics(self) -> dict[str, float | int | None]:
+        return {
+            'offset_ms': self._offset_ms,
+            'uncertainty_ms': self._uncertainty_ms,
+            'rtt_ms': self._rtt_ms,
+            'synced_at': self._synced_at,
+            'sync_count': self._sync_count,
+            'error_count': self._error_count,
+        }
+
+    def sync(self) -> None:
+        measurements: list[tuple[float, float]] = []  # (rtt, offset)
+        for _ in range(self._samples):
+            t0 = time.time()
+            p0 = time.perf_counter()
+            server_ms = self._fetch_server_time_ms()
+            rtt_ms = (time.perf_counter() - p0) * 1000
+            local_mid_ms = t0 * 1000 + rtt_ms / 2
+            measurements.append((rtt_ms, server_ms - local_mid_ms))
+
+        measurements.sort()
+        best = measurements[:max(1, len(measurements) // 2)]
+        with self._lock:
+            self._offset_ms = statistics.median(offset for _rtt, offset in best)
+            self._rtt_ms = best[0][0]
+            self._uncertainty_ms = best[0][0] / 2 + 1
+            self._synced_at = time.time()
+            self._sync_count += 1
+
+        logger.debug(f'서버 시간 동기화 완료 (offset={self._offset_ms:.1f}ms, uncertainty={self._uncertainty_ms:.1f}ms)')
+
+    def _sync_safely(self) -> None:
+        try:
+            self.sync()
+        except Exception as e:
+            # 동기화에 실패하면 기존 offset을 그대로 사용
+            self._error_count += 1
+            self._synced_at = time.time()
+            logger.warning(f'서버 시간 동기화에 실패했습니다. ({e})')
+        finally:
+            self._syncing = False
+            self._first_sync_done.set()
+
+    def _maybe_sync(self) -> None:
+        if not self.auto_sync:
+            return
+        if self._syncing:
+            return
+        if self._synced_at is not None and time.time() - self._synced_at <= self._resync_interval:
+            return
+        with self._lock:
+            if self._syncing:
+                return
+            self._syncing = True
+        threading.Thread(target=self._sync_safely, name='clock-sync', daemon=True).start()
+
+    async def wait_synced(self, timeout: float | None = 5) -> None:
+        """ 처음 동기화가 끝날 때까지 최대 timeout초 기다림 (주문 경로에서는 쓰지 않음) """
+        if not self.auto_sync or self._first_sync_done.is_set():
+            return
+        self._maybe_sync()
+        await asyncio.get_running_loop().run_in_executor(None, self._first_sync_done.wait, timeout)
+
+    def now(self) -> float:
+        """ 보정된 현재 시간 (초) """
+        self._maybe_sync()
+        return time.time() + self._offset_ms / 1000
+
+    def now_ms(self) -> int:
+        """ 보정된 현재 시간 (밀리초) """
+        self._maybe_sync()
+        return int(time.time() * 1000 + self._offset_ms)
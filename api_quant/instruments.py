@@ -0,0 +1,287 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """ 주문에 필요한 종목 정보
+        `symbol`         : 거래소 고유 형식의 종목 코드 (ex. 'BTCUSDT', 'BTC-USDT-SWAP', 'KRW-BTC')
+        `contract_value` : 계약 1개에 해당하는 base asset 수량 (spot은 1)
+        `tick_size`      : 호가 단위 (Upbit처럼 가격대에 따라 달라지는 경우 None)
+        `lot_size`       : 수량 단위
+        `min_notional`   : 최소 주문 금액 (quote asset 기준)
+    """
+    exchange: str
+    instrument_type: str
+    symbol: str
+    contract_value: Decimal = Decimal(1)
+    tick_size: Decimal | None = None
+    lot_size: Decimal | None = None
+    min_notional: Decimal | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {k: (str(v) if isinstance(v, Decimal) else v) for k, v in self.__dict__.items()}
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> 'Instrument':
+        return cls(
+            exchange=d['exchange'],
+            instrument_type=d['instrument_type'],
+            symbol=d['symbol'],
+            contract_value=Decimal(d['contract_value']),
+            tick_size=_decimal_or_none(d['tick_size']),
+            lot_size=_decimal_or_none(d['lot_size']),
+            min_notional=_decimal_or_none(d['min_notional']),
+        )
+
+
+def _decimal_or_none(v: Any) -> Decimal | None:
+    if v is None or v == '':
+        return None
+    return Decimal(v)
+
+
+class InstrumentRegistry:
+    """ 거래소 별 종목 정보를 메모리에 보관하고, 주문 경로에서는 메모리에서만 응답
+
+        - 거래소 정보는 처음 조회될 때 한 번 불러옴 (snapshot 파일이 있으면 네트워크 없이 바로 사용)
+        - 불러온 뒤에는 background thread가 `ttl`초마다 갱신하고, snapshot 파일에 저장
+        - 없는 종목을 조회하면 (신규 상장 등) `min_reload_interval`초에 한 번까지 동기적으로 다시 불러옴
+    """
+    def __init__(
+            self,
+            loaders: dict[str, Callable[[], list[Instrument]]],
+            ttl: float = 3600,
+            snapshot_path: str | None = None,
+            min_reload_interval: float = 60,
+    ):
+        self._loaders = loaders
+        self._ttl = ttl
+        self._snapshot_path = snapshot_path
+        self._min_reload_interval = min_reload_interval
+
+        self._instruments: dict[tuple[str, str, str], Instrument] = {}
+        self._fetched_at: dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._snapshot_loaded = False
+        self._refresh_thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    def get(self, exchange: str, instrument_type: str, symbol: str) -> Instrument:
+        key = (exchange, instrument_type, symbol)
+        instrument = self._instruments.get(key)
+        if instrument is not None:
+            return instrument
+
+        self._ensure_loaded(exchange)
+        instrument = self._instruments.get(key)
+        if instrument is None and time.time() - self._fetched_at.get(exchange, 0) > self._min_reload_interval:
+            self.refresh(exchange)
+            instrument = self._instruments.get(key)
+        if instrument is None:
+            raise KeyError(f'알 수 없는 종목입니다. ({exchange=}, {instrument_type=}, {symbol=})')
+        return instrument
+
+    def instruments(self, exchange: str) -> list[Instrument]:
+        self._ensure_loaded(exchange)
+        return [v for k, v in self._instruments.items() if k[0] == exchange]
+
+    def refresh(self, exchange: str | None = None) -> None:
+        exchanges = list(self._loaders) if exchange is None else [exchange]
+        for ex in exchanges:
+            instruments = self._loaders[ex]()
+            with self._lock:
+                for key in [k for k in self._instruments if k[0] == ex]:
+                    del self._instruments[key]
+                for instrument in instruments:
+                    self._instruments[(ex, instrument.instrument_type, instrument.symbol)] = instrument
+                self._fetched_at[ex] = time.time()
+            logger.info(f'{ex} 종목 정보 {len(instruments)}개를 불러왔습니다.')
+        self.save_snapshot()
+
+    def _ensure_loaded(self, exchange: str) -> None:
+        if exchange in self._fetched_at:
+            return
+        if exchange not in self._loaders:
+            raise KeyError(f'종목 정보를 불러올 수 없는 거래소입니다. ({exchange})')
+
+        with self._lock:
+            if not self._snapshot_loaded:
+                self.load_snapshot()
+            if exchange not in self._fetched_at:
+                self.refresh(exchange)
+        self.start_background_refresh()
+
+    def load_snapshot(self) -> None:
+        with self._lock:
+            self._snapshot_loaded = True
+            if self._snapshot_path is None or not os.path.exists(self._snapshot_path):
+                return
+            try:
+                with open(self._snapshot_path) as f:
+                    snapshot = json.load(f)
+                for ex, entry in snapshot.items():
+                    if ex not in self._loaders:
+                        continue
+                    for d in entry['instruments']:
+                        instrument = Instrument.from_dict(d)
+                        self._instruments[(ex, instrument.instrument_type, instrument.symbol)] = instrument
+                    self._fetched_at[ex] = entry['fetched_at']
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f'종목 정보 snapshot을 읽지 못했습니다. ({self._snapshot_path}, {e})')
+
+    def save_snapshot(self) -> None:
+        if self._snapshot_path is None:
+            return
+        with self._lock:
+            snapshot = {
+                ex: {
+                    'fetched_at': fetched_at,
+                    'instruments': [v.to_dict() for k, v in self._instruments.items() if k[0] == ex],
+                }
+                for ex, fetched_at in self._fetched_at.items()
+            }
+        tmp_path = self._snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self._snapshot_path)
+
+    def start_background_refresh(self) -> None:
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive() and not self._stop_event.is_set():
+                return
+            # 멈춘 뒤 다시 시작할 수 있도록 새 stop event를 사용 (멈추는 중인 이전 thread는 이전 event를 보고 끝남)
+            self._stop_event = threading.Event()
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_loop, args=(self._stop_event,), name='instrument-refresh', daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def stop_background_refresh(self) -> None:
+        with self._lock:
+            self._stop_event.set()
+
+    def _refresh_loop(self, stop_event: threading.Event) -> None:
+        while True:
+            # snapshot에서 불러온 오래된 정보는 바로 갱신하고, 그 외에는 ttl이 지난 거래소만 갱신
+            now = time.time()
+            stale = [ex for ex, fetched_at in list(self._fetched_at.items()) if now - fetched_at >= self._ttl]
+            failed = False
+            for ex in stale:
+                try:
+                    self.refresh(ex)
+                except Exception as e:
+                    failed = True
+                    logger.warning(f'{ex} 종목 정보 갱신에 실패했습니다. ({e})')
+
+            next_due = min((t + self._ttl for t in list(self._fetched_at.values())), default=now + self._ttl)
+            wait = next_due - time.time()
+            if failed:
+                # 실패한 거래소는 다음 주기까지 기존 정보를 사용하고, 너무 자주 재시도하지 않음
+                wait = max(wait, self._min_reload_interval)
+            if stop_event.wait(max(1.0, wait)):
+                return
+
+
+def load_okx(client, exchange: str = 'okx') -> list[Instrument]:
+    result = []
+    for inst_type, instrument_type in (('SWAP', 'perp'), ('SPOT', 'spot')):
+        res = client.request(
+            method='get',
+            endpoint='/api/v5/public/instruments',
+            params={'instType': inst_type},
+        ).json()
+        for row in res['data']:
+            result.append(Instrument(
+                exchange=exchange,
+                instrument_type=instrument_type,
+                symbol=row['instId'],
+                contract_value=_decimal_or_none(row.get('ctVal')) or Decimal(1),
+                tick_size=_decimal_or_none(row.get('tickSz')),
+                lot_size=_decimal_or_none(row.get('lotSz')),
+            ))
+    return result
+
+
+def load_binance(spot_client, futures_client, exchange: str = 'bnc') -> list[Instrument]:
+    result = []
+    for client, endpoint, instrument_type in (
+            (futures_client, '/fapi/v1/exchangeInfo', 'perp'),
+            (spot_client, '/api/v3/exchangeInfo', 'spot'),
+    ):
+        res = client.request(method='get', endpoint=endpoint).json()
+        for row in res['symbols']:
+            if instrument_type == 'perp' and row.get('contractType') != 'PERPETUAL':
+                continue
+            filters = {f['filterType']: f for f in row['filters']}
+            min_notional = filters.get('MIN_NOTIONAL') or filters.get('NOTIONAL') or {}
+            result.append(Instrument(
+                exchange=exchange,
+                instrument_type=instrument_type,
+                symbol=row['symbol'],
+                tick_size=_decimal_or_none(filters.get('PRICE_FILTER', {}).get('tickSize')),
+                lot_size=_decimal_or_none(filters.get('LOT_SIZE', {}).get('stepSize')),
+                min_notional=_decimal_or_none(min_notional.get('notional') or min_notional.get('minNotional')),
+            ))
+    return result
+
+
+def load_bybit(client, exchange: str = 'byb') -> list[Instrument]:
+    result = []
+    for category, instrument_type in (('linear', 'perp'), ('spot', 'spot')):
+        cursor = ''
+        while True:
+            params = {'category': category, 'limit': 1000}
+            if cursor:
+                params['cursor'] = cursor
+            res = client.request(method='get', endpoint='/v5/market/instruments-info', params=params).json()
+            for row in res['result']['list']:
+                lot_size_filter = row.get('lotSizeFilter', {})
+                result.append(Instrument(
+                    exchange=exchange,
+                    instrument_type=instrument_type,
+                    symbol=row['symbol'],
+                    tick_size=_decimal_or_none(row.get('priceFilter', {}).get('tickSize')),
+                    lot_size=_decimal_or_none(lot_size_filter.get('qtyStep') or lot_size_filter.get('basePrecision')),
+                    min_notional=_decimal_or_none(
+                        lot_size_filter.get('minNotionalValue') or lot_size_filter.get('minOrderAmt')
+                    ),
+                ))
+            cursor = res['result'].get('nextPageCursor', '')
+            if not cursor:
+                break
+    return result
+
+
+# Upbit 최소 주문 금액 (마켓 별 quote asset 기준)
+UPBIT_MIN_NOTIONAL = {
+    'KRW': Decimal('5000'),
+    'BTC': Decimal('0.00005'),
+    'USDT': Decimal('0.5'),
+}
+
+
+def load_upbit(client, exchange: str = 'upt') -> list[Instrument]:
+    # Upbit은 호가 단위가 가격대에 따라 달라지므로 tick_size는 비워둠
+    res = client.request(method='get', endpoint='/v1/market/all').json()
+    return [
+        Instrument(
+            exchange=exchange,
+            instrument_type='spot',
+            symbol=row['market'],
+            min_notional=UPBIT_MIN_NOTIONAL.get(row['market'].split('-')[0]),
+        )
+        for row in res
+    ]
@@ -0,0 +1,37 @@
+import threading
+from typing import Any, Callable
+
+
+class LazyClient:
+    """ 처음 사용할 때 factory로 client를 생성하는 proxy
+
+        script에서 module 전역 client처럼 사용하되, 실제로 요청을 보내는 거래소의 client만
+        (그 거래소 module의 import와 key 읽기를 포함해서) 생성되도록 함
+    """
+    __slots__ = ('_factory', '_client', '_lock')
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> bool:
+        return self._client is not None
+
+    def get(self) -> Any:
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+                client = self._client
+        return client
+
+    def set(self, client: Any) -> None:
+        """ factory 대신 이미 만든 client를 사용 (mock server, testnet client 등으로 바꿀 때) """
+        with self._lock:
+            self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
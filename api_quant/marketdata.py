@@ -0,0 +1,491 @@
+import asyncio
+import json
+import os
+import time
+import zlib
+from typing import Any, Callable, TextIO
+
+import aiohttp
+
+from . import serialization
+from .orderbook import OrderBook, SequenceGap
+from .session import PoolConfig, create_async_session
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+class BookFeed:
+    """ 거래소 하나의 WebSocket 호가 feed
+
+        subclass가 구독 메시지, 메시지 처리(snapshot/delta 적용과 sequence 확인), 끊긴 book을 다시 받는 방법을 정의
+        연결 유지와 재연결은 `BookStream`이 담당
+    """
+    exchange: str
+    WS_URL: str
+    REST_URL: str | None = None
+    # WebSocket ping frame 외에 거래소가 요구하는 application level ping (없으면 None)
+    PING_MESSAGE: str | dict | None = None
+    # 거래소가 보낸 가격/수량 문자열을 보관할지 여부 (checksum 계산에 필요한 경우)
+    KEEP_RAW = False
+
+    def __init__(
+            self,
+            symbols: list[str],
+            ws_url: str | None = None,
+            rest_url: str | None = None,
+            book_factory: Callable[[str, str], Any] | None = None,
+    ):
+        """ `book_factory(exchange, symbol)`로 OrderBook 대신 같은 interface의 book(ex. ArrayBook)을 사용할 수 있음 """
+        self.symbols = list(symbols)
+        self.ws_url = ws_url or self.WS_URL
+        self.rest_url = rest_url or self.REST_URL
+        if book_factory is None:
+            book_factory = lambda exchange, symbol: OrderBook(exchange, symbol, keep_raw=self.KEEP_RAW)
+        self.books = {symbol: book_factory(self.exchange, symbol) for symbol in self.symbols}
+        self.resync_count = 0
+
+    def subscribe_messages(self) -> list:
+        raise NotImplementedError
+
+    def resubscribe_messages(self, symbol: str) -> list:
+        """ 종목 하나의 snapshot을 다시 받기 위해 보내는 메시지 """
+        raise NotImplementedError
+
+    def decode(self, data: str | bytes) -> Any:
+        try:
+            return serialization.loads(data)
+        except ValueError:
+            # ex. OKX의 'pong'
+            return None
+
+    def handle(self, message: Any) -> None:
+        """ 메시지를 book에 적용하고, sequence가 이어지지 않으면 SequenceGap을 발생시킴 """
+        raise NotImplementedError
+
+    async def on_connect(self, stream: 'BookStream') -> None:
+        for book in self.books.values():
+            book.invalidate()
+
+    async def resync(self, symbol: str, stream: 'BookStream') -> None:
+        self.resync_count += 1
+        self.books[symbol].invalidate()
+        for message in self.resubscribe_messages(symbol):
+            await stream.send(message)
+
+
+class UpbitBookFeed(BookFeed):
+    """ Upbit은 매 메시지가 전체 호가(최대 15호가)이므로 sequence 확인 없이 매번 snapshot으로 적용 """
+    exchange = 'upt'
+    WS_URL = 'wss://api.upbit.com/websocket/v1'
+
+    def subscribe_messages(self) -> list:
+        return [[{'ticket': os.urandom(8).hex()}, {'type': 'orderbook', 'codes': self.symbols}]]
+
+    def resubscribe_messages(self, symbol: str) -> list:
+        return self.subscribe_messages()
+
+    def handle(self, message: Any) -> None:
+        if not isinstance(message, dict) or message.get('type') != 'orderbook':
+            return
+        book = self.books.get(message['code'])
+        if book is None:
+            return
+
+        units = message['orderbook_units']
+        book.apply_snapshot(
+            [(u['bid_price'], u['bid_size']) for u in units],
+            [(u['ask_price'], u['ask_size']) for u in units],
+            timestamp=message.get('timestamp', 0) / 1000,
+        )
+
+
+class BinanceSpotBookFeed(BookFeed):
+    """ Binance diff depth stream
+
+        WebSocket으로 받은 이벤트를 쌓아 두고 REST로 snapshot을 받은 뒤,
+        snapshot 이후의 이벤트부터 update id(U, u)가 이어지는지 확인하면서 적용
+    """
+    exchange = 'bnc'
+    WS_URL = 'wss://stream.binance.com:9443/stream'
+    REST_URL = 'https://api.binance.com'
+    DEPTH_ENDPOINT = '/api/v3/depth'
+    SNAPSHOT_LIMIT = 1000
+    SNAPSHOT_RETRY_DELAY = 1.0
+
+    def __init__(
+            self,
+            symbols: list[str],
+            ws_url: str | None = None,
+            rest_url: str | None = None,
+            book_factory: Callable[[str, str], Any] | None = None,
+    ):
+        super().__init__([s.upper() for s in symbols], ws_url, rest_url, book_factory)
+        self._buffers: dict[str, list[dict]] = {symbol: [] for symbol in self.symbols}
+        self._first_after_snapshot = {symbol: False for symbol in self.symbols}
+        self._snapshot_tasks: dict[str, asyncio.Task] = {}
+
+    def subscribe_messages(self) -> list:
+        return [{'method': 'SUBSCRIBE', 'params': [f'{s.lower()}@depth@100ms' for s in self.symbols], 'id': 1}]
+
+    async def on_connect(self, stream: 'BookStream') -> None:
+        await super().on_connect(stream)
+        for symbol in self.symbols:
+            self._buffers[symbol] = []
+            await self._start_snapshot(symbol, stream)
+
+    async def resync(self, symbol: str, stream: 'BookStream') -> None:
+        self.resync_count += 1
+        await self._start_snapshot(symbol, stream)
+
+    async def _start_snapshot(self, symbol: str, stream: 'BookStream') -> None:
+        # snapshot을 받는 동안에도 WebSocket 이벤트는 계속 읽어서 쌓아 둠
+        self.books[symbol].invalidate()
+        task = self._snapshot_tasks.get(symbol)
+        if task is not None and not task.done():
+            return
+        self._snapshot_tasks[symbol] = asyncio.create_task(self._load_snapshot(symbol, stream))
+
+    async def _load_snapshot(self, symbol: str, stream: 'BookStream') -> None:
+        book = self.books[symbol]
+        while not book.synced:
+            try:
+                snapshot = await stream.get_json(
+                    self.rest_url + self.DEPTH_ENDPOINT,
+                    params={'symbol': symbol, 'limit': self.SNAPSHOT_LIMIT},
+                )
+                book.apply_snapshot(snapshot['bids'], snapshot['asks'], sequence=snapshot['lastUpdateId'])
+            except Exception as e:
+                # 이 task가 끝나면 book이 계속 invalid로 남으므로 어떤 오류든 다시 시도
+                logger.warning(f'{self.exchange} {symbol} snapshot을 받지 못했습니다. ({e!r})')
+                book.invalidate()
+                await asyncio.sleep(self.SNAPSHOT_RETRY_DELAY)
+                continue
+
+            self._first_after_snapshot[symbol] = True
+            buffered = [e for e in self._buffers[symbol] if not self._is_stale(book, e)]
+            self._buffers[symbol] = []
+            for i, event in enumerate(buffered):
+                try:
+                    self._apply(book, event)
+                except SequenceGap as e:
+                    # snapshot이 쌓아 둔 이벤트보다 오래된 경우, 남은 이벤트는 그대로 두고 snapshot을 다시 받음
+                    logger.warning(f'{self.exchange} snapshot 이후 이벤트가 이어지지 않습니다. ({e})')
+                    self.resync_count += 1
+                    book.invalidate()
+                    self._buffers[symbol] = buffered[i:] + self._buffers[symbol]
+                    await asyncio.sleep(self.SNAPSHOT_RETRY_DELAY)
+                    break
+
+    def _check_sequence(self, book: OrderBook, event: dict) -> None:
+        # 현물은 각 이벤트가 직전 update id 바로 다음부터 시작해야 함 (U <= 마지막 u + 1 <= u)
+        if not event['U'] <= book.sequence + 1 <= event['u']:
+            raise SequenceGap(book.symbol, f'update id가 이어지지 않습니다. ({book.sequence=}, U={event["U"]})')
+
+    def _is_stale(self, book: OrderBook, event: dict) -> bool:
+        return event['u'] <= book.sequence
+
+    def _apply(self, book: OrderBook, event: dict) -> None:
+        if self._is_stale(book, event):
+            return
+        self._check_sequence(book, event)
+        self._first_after_snapshot[book.symbol] = False
+        book.apply_delta(event['b'], event['a'], sequence=event['u'], timestamp=event.get('E', 0) / 1000)
+
+    def handle(self, message: Any) -> None:
+        data = message.get('data', message) if isinstance(message, dict) else None
+        if data is None or data.get('e') != 'depthUpdate':
+            return
+        book = self.books.get(data['s'])
+        if book is None:
+            return
+
+        if not book.synced:
+            self._buffers[book.symbol].append(data)
+            return
+        try:
+            self._apply(book, data)
+        except SequenceGap:
+            # gap 이후의 이벤트는 새 snapshot에 이어서 적용할 수 있으므로 남겨 둠
+            book.invalidate()
+            self._buffers[book.symbol] = [data]
+            raise
+
+
+class BinanceFuturesBookFeed(BinanceSpotBookFeed):
+    """ 선물은 snapshot 직후 첫 이벤트가 U <= lastUpdateId <= u 이고, 이후로는 pu가 직전 이벤트의 u와 같아야 함 """
+    WS_URL = 'wss://fstream.binance.com/stream'
+    REST_URL = 'https://fapi.binance.com'
+    DEPTH_ENDPOINT = '/fapi/v1/depth'
+
+    def _is_stale(self, book: OrderBook, event: dict) -> bool:
+        # snapshot 직후에는 u == lastUpdateId 인 이벤트부터 적용
+        if self._first_after_snapshot[book.symbol]:
+            return event['u'] < book.sequence
+        return event['u'] <= book.sequence
+
+    def _check_sequence(self, book: OrderBook, event: dict) -> None:
+        if self._first_after_snapshot[book.symbol]:
+            if not event['U'] <= book.sequence <= event['u']:
+                raise SequenceGap(book.symbol, f'snapshot 이후 첫 이벤트가 아닙니다. ({book.sequence=}, U={event["U"]})')
+        elif event['pu'] != book.sequence:
+            raise SequenceGap(book.symbol, f'update id가 이어지지 않습니다. ({book.sequence=}, pu={event["pu"]})')
+
+
+class BybitBookFeed(BookFeed):
+    """ Bybit v5 orderbook stream (snapshot 이후 delta의 u가 1씩 증가) """
+    exchange = 'byb'
+    WS_URL = 'wss://stream.bybit.com/v5/public/linear'
+    PING_MESSAGE = {'op': 'ping'}
+    # 구독 요청 하나에 넣을 수 있는 topic 수
+    SUBSCRIBE_BATCH = 10
+
+    def __init__(
+            self,
+            symbols: list[str],
+            category: str = 'linear',
+            depth: int = 50,
+            ws_url: str | None = None,
+            book_factory: Callable[[str, str], Any] | None = None,
+    ):
+        super().__init__(
+            [s.upper() for s in symbols], ws_url or f'wss://stream.bybit.com/v5/public/{category}', book_factory=book_factory
+        )
+        self.depth = depth
+
+    def _topic(self, symbol: str) -> str:
+        return f'orderbook.{self.depth}.{symbol}'
+
+    def subscribe_messages(self) -> list:
+        topics = [self._topic(s) for s in self.symbols]
+        return [
+            {'op': 'subscribe', 'args': topics[i:i + self.SUBSCRIBE_BATCH]}
+            for i in range(0, len(topics), self.SUBSCRIBE_BATCH)
+        ]
+
+    def resubscribe_messages(self, symbol: str) -> list:
+        return [
+            {'op': 'unsubscribe', 'args': [self._topic(symbol)]},
+            {'op': 'subscribe', 'args': [self._topic(symbol)]},
+        ]
+
+    def handle(self, message: Any) -> None:
+        if not isinstance(message, dict) or not message.get('topic', '').startswith('orderbook.'):
+            return
+        data = message['data']
+        book = self.books.get(data['s'])
+        if book is None:
+            return
+
+        timestamp = message.get('ts', 0) / 1000
+        if message.get('type') == 'snapshot':
+            book.apply_snapshot(data['b'], data['a'], sequence=data['u'], timestamp=timestamp)
+            return
+        if not book.synced:
+            return
+        if data['u'] != book.sequence + 1:
+            raise SequenceGap(book.symbol, f'update id가 이어지지 않습니다. ({book.sequence=}, u={data["u"]})')
+        book.apply_delta(data['b'], data['a'], sequence=data['u'], timestamp=timestamp)
+
+
+def okx_checksum(book: OrderBook, depth: int = 25) -> int:
+    """ 상위 25호가의 bid, ask를 번갈아 'price:size'로 이어 붙인 문자열의 CRC32 (signed 32bit) """
+    bids = book.bids.depth(depth)
+    asks = book.asks.depth(depth)
+    parts = []
+    for i in range(max(len(bids), len(asks))):
+        if i < len(bids):
+            parts.extend(book.bids.raw[bids[i][0]])
+        if i < len(asks):
+            parts.extend(book.asks.raw[asks[i][0]])
+    crc = zlib.crc32(':'.join(parts).encode())
+    return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+
+class OkxBookFeed(BookFeed):
+    """ OKX books channel (prevSeqId가 직전 seqId와 같은지, 적용 후 checksum이 맞는지 확인) """
+    exchange = 'okx'
+    WS_URL = 'wss://ws.okx.com:8443/ws/v5/public'
+    PING_MESSAGE = 'ping'
+    KEEP_RAW = True
+
+    def subscribe_messages(self) -> list:
+        return [{'op': 'subscribe', 'args': [{'channel': 'books', 'instId': s} for s in self.symbols]}]
+
+    def resubscribe_messages(self, symbol: str) -> list:
+        arg = {'channel': 'books', 'instId': symbol}
+        return [{'op': 'unsubscribe', 'args': [arg]}, {'op': 'subscribe', 'args': [arg]}]
+
+    def handle(self, message: Any) -> None:
+        if not isinstance(message, dict) or 'data' not in message:
+            return
+        arg = message.get('arg', {})
+        if arg.get('channel') != 'books':
+            return
+        book = self.books.get(arg['instId'])
+        if book is None:
+            return
+
+        for data in message['data']:
+            sequence = data.get('seqId')
+            timestamp = int(data.get('ts', 0)) / 1000
+            if message.get('action') == 'snapshot':
+                book.apply_snapshot(data['bids'], data['asks'], sequence=sequence, timestamp=timestamp)
+            else:
+                if not book.synced:
+                    continue
+                prev_sequence = data.get('prevSeqId')
+                if prev_sequence is not None and prev_sequence != book.sequence:
+                    raise SequenceGap(book.symbol, f'seqId가 이어지지 않습니다. ({book.sequence=}, {prev_sequence=})')
+                book.apply_delta(data['bids'], data['asks'], sequence=sequence, timestamp=timestamp)
+
+            # 원본 문자열을 보관하지 않는 book(ex. ArrayBook)은 checksum을 확인하지 않음
+            if 'checksum' in data and book.bids.raw is not None and okx_checksum(book) != data['checksum']:
+                raise SequenceGap(book.symbol, 'checksum이 맞지 않습니다.')
+
+
+class BookStream:
+    """ feed 하나의 WebSocket 연결을 유지하면서 호가창을 갱신
+
+        - 연결이 끊기면 `reconnect_delay`부터 두 배씩 (최대 `max_reconnect_delay`) 기다렸다가 다시 연결하고 모든 book을 다시 받음
+        - sequence가 끊긴 종목은 그 종목만 다시 받음
+        - 메시지 처리 중 다른 오류가 나면 연결이 끊긴 것과 같이 다시 연결함
+        - 호가 조회(`book`, `best_bid_ask`)는 메모리에서만 응답
+        - `record_path`를 주면 받은 메시지(와 REST snapshot)를 JSONL로 기록 (benchmarks/replay_ws_server.py 로 재생 가능)
+
+        stream = BookStream(BinanceFuturesBookFeed(['BTCUSDT']))
+        stream.start()
+        ...
+        stream.best_bid_ask('BTCUSDT')
+    """
+    def __init__(
+            self,
+            feed: BookFeed,
+            pool_config: PoolConfig | None = None,
+            ping_interval: float = 20,
+            reconnect_delay: float = 1.0,
+            max_reconnect_delay: float = 30.0,
+            record_path: str | None = None,
+    ):
+        self.feed = feed
+        self._pool_config = pool_config
+        self._ping_interval = ping_interval
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._record_path = record_path
+        self._recorder: TextIO | None = None
+        self._record_started = 0.0
+
+        self._http: aiohttp.ClientSession | None = None
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._task: asyncio.Task | None = None
+        self._stopped = False
+        self.message_count = 0
+        self.reconnect_count = 0
+
+    def book(self, symbol: str) -> OrderBook:
+        return self.feed.books[symbol]
+
+    def best_bid_ask(self, symbol: str) -> tuple[tuple[float, float] | None, tuple[float, float] | None]:
+        book = self.feed.books[symbol]
+        if not book.synced:
+            return None, None
+        return book.best_bid(), book.best_ask()
+
+    async def send(self, message: str | dict | list) -> None:
+        if self._ws is None:
+            return
+        if isinstance(message, str):
+            await self._ws.send_str(message)
+        else:
+            await self._ws.send_str(serialization.dumps_str(message))
+
+    async def get_json(self, url: str, params: dict[str, Any] | None = None) -> Any:
+        async with self._http.get(url, params=params) as res:
+            res.raise_for_status()
+            body = await res.json(loads=serialization.loads, content_type=None)
+        self._record({'rest': url[len(self.feed.rest_url):], 'params': params, 'body': body})
+        return body
+
+    def _record(self, entry: dict) -> None:
+        if self._recorder is not None:
+            entry['t'] = time.monotonic() - self._record_started
+            self._recorder.write(json.dumps(entry) + '\n')
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            await self._task
+
+    async def run(self) -> None:
+        self._http = create_async_session(self._pool_config)
+        if self._record_path is not None:
+            self._recorder = open(self._record_path, 'w')
+            self._record_started = time.monotonic()
+
+        delay = self._reconnect_delay
+        try:
+            while not self._stopped:
+                try:
+                    async with self._http.ws_connect(self.feed.ws_url, heartbeat=self._ping_interval, max_msg_size=0) as ws:
+                        self._ws = ws
+                        delay = self._reconnect_delay
+                        for message in self.feed.subscribe_messages():
+                            await self.send(message)
+                        await self.feed.on_connect(self)
+                        await self._read(ws)
+                except Exception as e:
+                    # 연결 오류뿐 아니라 메시지 처리 중의 예상하지 못한 오류(ex. 형식이 바뀐 메시지)도
+                    # task가 조용히 끝나서 book이 invalid로 남지 않도록 다시 연결해서 모든 book을 다시 받음
+                    logger.warning(f'{self.feed.exchange} WebSocket 연결이 끊어졌습니다. ({e!r})')
+                finally:
+                    self._ws = None
+                    for book in self.feed.books.values():
+                        book.invalidate()
+
+                if self._stopped:
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_reconnect_delay)
+                self.reconnect_count += 1
+        finally:
+            await self._http.close()
+            if self._recorder is not None:
+                self._recorder.close()
+                self._recorder = None
+
+    async def _ping(self) -> None:
+        while True:
+            await asyncio.sleep(self._ping_interval)
+            await self.send(self.feed.PING_MESSAGE)
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        ping_task = asyncio.create_task(self._ping()) if self.feed.PING_MESSAGE is not None else None
+        try:
+            async for msg in ws:
+                if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    break
+                message = self.feed.decode(msg.data)
+                if message is None:
+                    continue
+                self.message_count += 1
+                self._record({'ws': message})
+
+                try:
+                    self.feed.handle(message)
+                except SequenceGap as e:
+                    logger.warning(f'{self.feed.exchange} 호가창을 다시 받습니다. ({e})')
+                    await self.feed.resync(e.symbol, self)
+        finally:
+            if ping_task is not None:
+                ping_task.cancel()
@@ -0,0 +1,384 @@
+""" REST 요청의 단계 별 소요 시간, rate limit 여유, 오류 수 집계 (opt-in)
+
+    from api_quant import metrics
+
+    metrics.enable()                      # 이후의 요청부터 기록 (켜지 않으면 client는 아무것도 기록하지 않음)
+    metrics.serve(9464)                   # http://127.0.0.1:9464/metrics 에 Prometheus text 형식으로 노출
+    metrics.snapshot()['latency']['bnc']['/fapi/v1/order']['ttfb']['p99_ms']
+
+단계 (거래소 / endpoint 별)
+- queue   : client-side rate limiter에서 기다린 시간
+- sign    : param 변환, query string / body 생성, 서명
+- connect : 새 연결을 연 시간 (DNS, TCP, TLS 포함, async 요청만 따로 측정)
+- ttfb    : 요청을 보내고 응답 header를 받을 때까지 (sync 요청은 새 연결을 연 시간도 포함)
+- read    : 응답 body를 읽은 시간
+- parse   : 응답 JSON parsing (sync 요청은 `Response.json()`을 호출했을 때 기록)
+- total   : queue부터 read까지
+"""
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+from . import serialization
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+    from .ratelimit import RateLimiter
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99, 'p999': 0.999}
+
+
+class Histogram:
+    """ HDR 방식의 log-linear histogram (µs 단위 정수로 기록)
+
+        2의 거듭제곱 구간마다 `2 ** sub_bucket_bits`개의 bucket으로 나누므로,
+        값의 크기와 관계없이 상대 오차가 `2 ** -sub_bucket_bits` 이하 (기본 5 bit, 약 3%)
+    """
+    __slots__ = ('_sub_bits', '_sub_count', '_counts', 'count', 'total', 'max')
+
+    def __init__(self, sub_bucket_bits: int = 5):
+        self._sub_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        # 값이 기록된 bucket만 보관 (bucket index -> 개수)
+        self._counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self._sub_bits - 1
+        return (shift + 1) * self._sub_count + (value >> shift) - self._sub_count
+
+    def _highest_value(self, index: int) -> int:
+        """ bucket에 들어가는 가장 큰 값 """
+        if index < self._sub_count:
+            return index
+        shift = index // self._sub_count - 1
+        return ((index % self._sub_count + self._sub_count + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        index = self._index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentiles(self, qs) -> list[int]:
+        """ 분위수 별로 그 분위수에 해당하는 bucket의 가장 큰 값 (bucket을 한 번만 훑어서 계산) """
+        if self.count == 0:
+            return [0] * len(qs)
+        indices = sorted(self._counts)
+        cumulative = []
+        seen = 0
+        for index in indices:
+            seen += self._counts[index]
+            cumulative.append(seen)
+
+        values = []
+        for q in qs:
+            i = bisect.bisect_left(cumulative, max(1, int(q * self.count + 0.5)))
+            values.append(min(self._highest_value(indices[min(i, len(indices) - 1)]), self.max))
+        return values
+
+
+class Metrics:
+    """ 거래소 / endpoint 별 단계 histogram, 응답 상태 / 오류 counter, rate limit 여유 gauge """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._requests: dict[tuple[str, str, str], int] = {}
+        self._errors: dict[tuple[str, str, str], int] = {}
+        self._headroom: dict[tuple[str, str], float] = {}
+
+    def record(self, exchange: str, endpoint: str, phase: str, seconds: float) -> None:
+        key = (exchange, endpoint, phase)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.record(int(seconds * 1_000_000))
+
+    def count_response(self, exchange: str, endpoint: str, status: int) -> None:
+        with self._lock:
+            key = (exchange, endpoint, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if status >= 400:
+                self._errors[key] = self._errors.get(key, 0) + 1
+
+    def count_error(self, exchange: str, endpoint: str, kind: str) -> None:
+        """ 응답을 받지 못한 요청 (`kind`는 예외 class 이름) """
+        with self._lock:
+            key = (exchange, endpoint, kind)
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def set_headroom(self, exchange: str, headroom: dict[str, float]) -> None:
+        with self._lock:
+            for rule, value in headroom.items():
+                self._headroom[(exchange, rule)] = value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+            self._errors.clear()
+            self._headroom.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """ {'latency': {exchange: {endpoint: {phase: {count, mean_ms, p50_ms, ..., max_ms}}}},
+             'requests': {exchange: {endpoint: {status: count}}},
+             'errors': {exchange: {endpoint: {status 또는 예외 이름: count}}},
+             'headroom': {exchange: {rule: 0 ~ 1}}}
+        """
+        with self._lock:
+            latency: dict = {}
+            for (exchange, endpoint, phase), histogram in sorted(self._histograms.items()):
+                stats = {'count': histogram.count, 'mean_ms': histogram.total / histogram.count / 1000}
+                for name, value in zip(QUANTILES, histogram.percentiles(QUANTILES.values())):
+                    stats[f'{name}_ms'] = value / 1000
+                stats['max_ms'] = histogram.max / 1000
+                latency.setdefault(exchange, {}).setdefault(endpoint, {})[phase] = stats
+
+            requests: dict = {}
+            for (exchange, endpoint, status), count in sorted(self._requests.items()):
+                requests.setdefault(exchange, {}).setdefault(endpoint, {})[status] = count
+            errors: dict = {}
+            for (exchange, endpoint, kind), count in sorted(self._errors.items()):
+                errors.setdefault(exchange, {}).setdefault(endpoint, {})[kind] = count
+            headroom: dict = {}
+            for (exchange, rule), value in sorted(self._headroom.items()):
+                headroom.setdefault(exchange, {})[rule] = value
+
+        return {'latency': latency, 'requests': requests, 'errors': errors, 'headroom': headroom}
+
+    def prometheus_text(self) -> str:
+        """ Prometheus text exposition format (단계 시간은 summary, 초 단위) """
+        lines = [
+            '# HELP api_request_phase_seconds Time spent in each phase of a REST request.',
+            '# TYPE api_request_phase_seconds summary',
+        ]
+        with self._lock:
+            for (exchange, endpoint, phase), histogram in sorted(self._histograms.items()):
+                labels = _labels(exchange=exchange, endpoint=endpoint, phase=phase)
+                for q, value in zip(QUANTILES.values(), histogram.percentiles(QUANTILES.values())):
+                    lines.append(f'api_request_phase_seconds{{{labels},quantile="{q}"}} {value / 1_000_000}')
+                lines.append(f'api_request_phase_seconds_sum{{{labels}}} {histogram.total / 1_000_000}')
+                lines.append(f'api_request_phase_seconds_count{{{labels}}} {histogram.count}')
+
+            lines += [
+                '# HELP api_requests_total Responses received, by HTTP status.',
+                '# TYPE api_requests_total counter',
+            ]
+            for (exchange, endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'api_requests_total{{{_labels(exchange=exchange, endpoint=endpoint, status=status)}}} {count}')
+
+            lines += [
+                '# HELP api_request_errors_total Requests that failed, by HTTP status or exception type.',
+                '# TYPE api_request_errors_total counter',
+            ]
+            for (exchange, endpoint, kind), count in sorted(self._errors.items()):
+                lines.append(f'api_request_errors_total{{{_labels(exchange=exchange, endpoint=endpoint, kind=kind)}}} {count}')
+
+            lines += [
+                '# HELP api_rate_limit_headroom Fraction of each client-side rate limit rule still available.',
+                '# TYPE api_rate_limit_headroom gauge',
+            ]
+            for (exchange, rule), value in sorted(self._headroom.items()):
+                lines.append(f'api_rate_limit_headroom{{{_labels(exchange=exchange, rule=rule)}}} {value:.6g}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+class RequestTimer:
+    """ 요청 하나의 단계 별 시간을 재서 `Metrics`에 기록
+
+        client의 `request` / `request_async`가 단계가 끝날 때마다 `lap()`을 호출하고,
+        응답을 받으면 `received()`, 예외가 나면 `failed()`를 호출함
+    """
+    __slots__ = ('_metrics', '_exchange', '_endpoint', '_rate_limiter', '_started', '_last', '_connect')
+
+    def __init__(self, metrics: Metrics, exchange: str, endpoint: str, rate_limiter: 'RateLimiter | None'):
+        self._metrics = metrics
+        self._exchange = exchange
+        self._endpoint = endpoint
+        self._rate_limiter = rate_limiter
+        self._started = self._last = time.perf_counter()
+        self._connect = 0.0
+
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._metrics.record(self._exchange, self._endpoint, phase, now - self._last)
+        self._last = now
+
+    def connected(self, seconds: float) -> None:
+        """ aiohttp trace에서 새 연결을 연 시간을 받음 (ttfb에서 뺌) """
+        self._connect += seconds
+        self._metrics.record(self._exchange, self._endpoint, 'connect', seconds)
+
+    def received(self, res: 'requests.Response') -> None:
+        """ sync 요청 : requests는 body까지 읽고 반환하므로, `elapsed`(응답 header까지)로 ttfb와 read를 나눔 """
+        now = time.perf_counter()
+        ttfb = res.elapsed.total_seconds()
+        self._metrics.record(self._exchange, self._endpoint, 'ttfb', ttfb)
+        self._metrics.record(self._exchange, self._endpoint, 'read', max(0.0, now - self._last - ttfb))
+        self._last = now
+        self._finish(res.status_code)
+
+        # parse는 호출한 쪽에서 `json()`을 부를 때 일어나므로, 이 응답의 `json`만 시간을 재는 함수로 바꿔둠
+        parse = res.json
+
+        def timed_json(**kwargs):
+            started = time.perf_counter()
+            try:
+                return parse(**kwargs)
+            finally:
+                self._metrics.record(self._exchange, self._endpoint, 'parse', time.perf_counter() - started)
+
+        res.json = timed_json
+
+    def headers_received(self) -> None:
+        """ async 요청 : 응답 header를 받은 시점 """
+        now = time.perf_counter()
+        self._metrics.record(self._exchange, self._endpoint, 'ttfb', now - self._last - self._connect)
+        self._last = now
+
+    async def json(self, res: 'aiohttp.ClientResponse') -> Any:
+        """ async 요청 : body를 읽고 parsing하면서 read / parse를 따로 기록 """
+        await res.read()
+        self.lap('read')
+        self._finish(res.status)
+        data = await res.json(loads=serialization.loads)
+        self.lap('parse')
+        return data
+
+    def failed(self, e: BaseException) -> None:
+        self._metrics.count_error(self._exchange, self._endpoint, type(e).__name__)
+
+    def _finish(self, status: int) -> None:
+        self._metrics.record(self._exchange, self._endpoint, 'total', self._last - self._started)
+        self._metrics.count_response(self._exchange, self._endpoint, status)
+        if self._rate_limiter is not None:
+            self._metrics.set_headroom(self._exchange, self._rate_limiter.headroom())
+
+
+class _NullTimer:
+    """ metrics를 켜지 않았을 때 client가 사용하는 timer (아무것도 기록하지 않음) """
+    __slots__ = ()
+
+    def lap(self, phase: str) -> None:
+        pass
+
+    def received(self, res) -> None:
+        pass
+
+    def headers_received(self) -> None:
+        pass
+
+    async def json(self, res) -> Any:
+        return await res.json(loads=serialization.loads)
+
+    def failed(self, e: BaseException) -> None:
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+_metrics: Metrics | None = None
+
+
+def enable() -> Metrics:
+    """ 기록을 시작 (이미 켜져 있으면 같은 `Metrics`를 반환) """
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
+
+
+def disable() -> None:
+    global _metrics
+    _metrics = None
+
+
+def current() -> Metrics | None:
+    return _metrics
+
+
+def timer(exchange: str, endpoint: str, rate_limiter: 'RateLimiter | None' = None) -> RequestTimer | _NullTimer:
+    metrics = _metrics
+    if metrics is None:
+        return NULL_TIMER
+    return RequestTimer(metrics, exchange, endpoint, rate_limiter)
+
+
+def trace_config() -> 'aiohttp.TraceConfig':
+    """ `trace_request_ctx`로 넘긴 RequestTimer에 새 연결을 연 시간을 알려주는 aiohttp trace """
+    import aiohttp
+
+    async def on_connection_create_start(session, ctx, params) -> None:
+        ctx.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params) -> None:
+        if isinstance(ctx.trace_request_ctx, RequestTimer):
+            ctx.trace_request_ctx.connected(time.perf_counter() - ctx.connect_started)
+
+    config = aiohttp.TraceConfig()
+    config.on_connection_create_start.append(on_connection_create_start)
+    config.on_connection_create_end.append(on_connection_create_end)
+    return config
+
+
+def snapshot() -> dict[str, Any]:
+    return _metrics.snapshot() if _metrics is not None else {'latency': {}, 'requests': {}, 'errors': {}, 'headroom': {}}
+
+
+def prometheus_text() -> str:
+    return _metrics.prometheus_text() if _metrics is not None else ''
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """ 기록을 켜고, `/metrics`를 daemon thread의 HTTP 서버로 노출 (멈출 때는 `server.shutdown()`) """
+    enable()
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f'metrics 서버 시작 (http://{host}:{server.server_address[1]}/metrics)')
+    return server
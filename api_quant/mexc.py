@@ -1,12 +1,12 @@
-import hashlib
-import hmac
-import time
 from typing import Any
 from urllib.parse import urlencode
 
-import aiohttp
 import requests
 
+from .clock import ClockSync
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -14,16 +14,30 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class BaseApiClient:
+class BaseApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/api/v3/time'
+
     def __init__(
         self,
         key_pair: tuple[str, str],
         base_url: str,
+        pool_config: PoolConfig | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
     
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(res.json()['serverTime'])
+
     def get(
         self,
         endpoint: str,
@@ -80,18 +94,17 @@ class BaseApiClient:
         if require_api_key:
             headers['X-MEXC-APIKEY'] = self._api_key
         
+        url = self._base_url + endpoint
         if require_signature:
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
         
-        return requests.request(
+        return self._session.request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params=params,
         )
@@ -116,19 +129,17 @@ class BaseApiClient:
         if require_api_key:
             headers['X-MBX-APIKEY'] = self._api_key
         
+        url = self._base_url + endpoint
         if require_signature:
-            
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
         
-        async with aiohttp.request(
+        async with self._get_async_session().request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params={k: str(params[k]) for k in params},
         ) as res:
@@ -141,45 +152,53 @@ class SpotApiClient(BaseApiClient):
     """ Spot / Margin / Savings / Mining
         https://binance-docs.github.io/apidocs/spot/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://api.mexc.com')
+    def __init__(self, key_pair: tuple[str, str], pool_config: PoolConfig | None = None):
+        super().__init__(key_pair, 'https://api.mexc.com', pool_config)
 
 class SpotTestnetApiClient(BaseApiClient):
     """ Spot Testnet
         Doesn't support endpoints starting with `/sapi`
         https://testnet.binance.vision/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://testnet.binance.vision')
+    def __init__(self, key_pair: tuple[str, str], pool_config: PoolConfig | None = None):
+        super().__init__(key_pair, 'https://testnet.binance.vision', pool_config)
 
 
 class FuturesApiClient(BaseApiClient):
     """ USDⓢ-M Futures
         https://binance-docs.github.io/apidocs/futures/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://fapi.binance.com')
+    SERVER_TIME_ENDPOINT = '/fapi/v1/time'
+
+    def __init__(self, key_pair: tuple[str, str], pool_config: PoolConfig | None = None):
+        super().__init__(key_pair, 'https://fapi.binance.com', pool_config)
 
 
 class FuturesTestnetApiClient(BaseApiClient):
     """ USDⓢ-M Futures Testnet
         https://binance-docs.github.io/apidocs/futures/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://testnet.binancefuture.com')
+    SERVER_TIME_ENDPOINT = '/fapi/v1/time'
+
+    def __init__(self, key_pair: tuple[str, str], pool_config: PoolConfig | None = None):
+        super().__init__(key_pair, 'https://testnet.binancefuture.com', pool_config)
 
 
 class CoinMarginFuturesApiClient(BaseApiClient):
     """ COIN-M Futures
         https://binance-docs.github.io/apidocs/delivery/en/
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://dapi.binance.com')
+    SERVER_TIME_ENDPOINT = '/dapi/v1/time'
+
+    def __init__(self, key_pair: tuple[str, str], pool_config: PoolConfig | None = None):
+        super().__init__(key_pair, 'https://dapi.binance.com', pool_config)
 
 
 class OptionsApiClient(BaseApiClient):
     """ European Options ("Vanilla Options")
         https://binance-docs.github.io/apidocs/voptions/en/#general-info
     """
-    def __init__(self, key_pair: tuple[str, str]):
-        super().__init__(key_pair, 'https://eapi.binance.com')
+    SERVER_TIME_ENDPOINT = '/eapi/v1/time'
+
+    def __init__(self, key_pair: tuple[str, str], pool_config: PoolConfig | None = None):
+        super().__init__(key_pair, 'https://eapi.binance.com', pool_config)
@@ -1,15 +1,15 @@
-import base64
 import datetime
-import hashlib
-import hmac
-import json
-import time
 from typing import Any
 from urllib.parse import urlencode
 
-import aiohttp
 import requests
 
+from . import metrics, ratelimit, serialization
+from .clock import ClockSync
+from .ratelimit import RateLimiter
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -17,20 +17,64 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class ApiClient:
+def request_body(params: dict[str, Any] | list[dict[str, Any]]) -> dict[str, str] | list[dict[str, str]]:
+    """ POST body의 값을 문자열로 변환 (batch endpoint는 주문 목록을 list로 받음) """
+    if isinstance(params, list):
+        return [{k: str(v) for k, v in p.items()} for p in params]
+    return {k: str(v) for k, v in params.items()}
+
+
+class ApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/api/v5/public/time'
+
     def __init__(
         self,
         key_pair: tuple[str, str],
         passphrase: str,
         base_url: str = 'https://www.okx.com',
-        is_demo: bool = False
+        is_demo: bool = False,
+        pool_config: PoolConfig | None = None,
+        rate_limiter: RateLimiter | None = None,
     ):
         self._api_key = key_pair[0]
         self._passphrase = passphrase
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
         self._is_demo = is_demo
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
+        self._rate_limiter = rate_limiter if rate_limiter is not None else ratelimit.okx()
     
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        return self._rate_limiter
+
+    @property
+    def is_demo(self) -> bool:
+        return self._is_demo
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(res.json()['data'][0]['ts'])
+
+    def ws_login_message(self) -> dict:
+        """ private WebSocket login 메시지 (서명 : 초 단위 timestamp + 'GET/users/self/verify') """
+        timestamp = str(int(self._clock.now()))
+        return {
+            'op': 'login',
+            'args': [{
+                'apiKey': self._api_key,
+                'passphrase': self._passphrase,
+                'timestamp': timestamp,
+                'sign': self._signer.b64digest(f'{timestamp}GET/users/self/verify'),
+            }],
+        }
+
     def get(
         self,
         endpoint: str,
@@ -42,7 +86,7 @@ class ApiClient:
     def post(
         self,
         endpoint: str,
-        params: dict[str, Any] | None = None,
+        params: dict[str, Any] | list[dict[str, Any]] | None = None,
         require_signature: bool = False,
     ) -> requests.Response:
         return self.request(method='post', endpoint=endpoint, params=params, require_signature=require_signature)
@@ -51,36 +95,42 @@ class ApiClient:
         self,
         method: str,
         endpoint: str,
-        params: dict[str, Any] | None = None,
+        params: dict[str, Any] | list[dict[str, Any]] | None = None,
         require_signature: bool = False,
+        timeout: float | None = None,
     ) -> requests.Response:
         if params is None:
             params = {}
         
+        timer = metrics.timer('okx', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint, params)
+        timer.lap('queue')
+
         headers = {}
         
+        # OKX는 실제로 전송된 request path(query string 포함)로 서명을 검증하므로,
+        # 한 번 만든 request path를 서명과 URL에 그대로 사용
+        request_path = endpoint
+        body = None
+        if method.upper() == 'GET':
+            if params:
+                request_path += '?' + urlencode([(k, v) for k, v in sorted(params.items()) if v is not None])
+        else:
+            # 서명한 bytes를 그대로 body로 보내도록 한 번만 serialize
+            body = serialization.dumps(request_body(params))
+            headers['Content-Type'] = 'application/json'
+        
         if require_signature:
-            now = time.time()
+            now = self._clock.now()
             timestamp = datetime.datetime.utcfromtimestamp(now).isoformat(timespec='milliseconds') + 'Z'
             
             if method.upper() == 'GET':
-                query_string = '&'.join(
-                    [str(k) + '=' + str(v) for k, v in sorted(params.items()) if v is not None]
-                )
-                if params:
-                    prehash = f'{timestamp}{method.upper()}{endpoint}?{query_string}'
-                else:
-                    prehash = f'{timestamp}{method.upper()}{endpoint}'
+                prehash = f'{timestamp}{method.upper()}{request_path}'
             else:
-                prehash = f'{timestamp}{method.upper()}{endpoint}{json.dumps(params)}'
+                prehash = f'{timestamp}{method.upper()}{endpoint}'.encode() + body
             
-            sign = base64.b64encode(
-                hmac.new(
-                    self._secret_key.encode(),
-                    msg=prehash.encode(),
-                    digestmod=hashlib.sha256
-                ).digest()
-            ).decode()
+            sign = self._signer.b64digest(prehash)
             
             headers |= {
                 'OK-ACCESS-KEY': self._api_key,
@@ -91,53 +141,69 @@ class ApiClient:
         
         if self._is_demo:
             headers |= {'x-simulated-trading': '1'}
+        timer.lap('sign')
         
         if method.upper() == 'GET':
-            return requests.request(
+            res = self._send(
+                timer,
                 method=method,
-                url=self._base_url + endpoint,
+                url=self._base_url + request_path,
                 headers=headers,
-                params={k: str(params[k]) for k in params},
+                timeout=timeout,
             )
         else:
-            return requests.request(
+            res = self._send(
+                timer,
                 method=method,
-                url=self._base_url + endpoint,
+                url=self._base_url + request_path,
                 headers=headers,
-                json={k: str(params[k]) for k in params},
+                data=body,
+                timeout=timeout,
             )
+        
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(method, endpoint, res.status_code, res.headers)
+        return res
     
     async def request_async(
         self,
         method: str,
         endpoint: str,
-        params: dict[str, Any] | None = None,
+        params: dict[str, Any] | list[dict[str, Any]] | None = None,
         require_signature: bool = False,
     ):
         if params is None:
             params = {}
         
+        timer = metrics.timer('okx', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(method, endpoint, params)
+        timer.lap('queue')
+
         headers = {}
         
+        # OKX는 실제로 전송된 request path(query string 포함)로 서명을 검증하므로,
+        # 한 번 만든 request path를 서명과 URL에 그대로 사용
+        request_path = endpoint
+        body = None
+        if method.upper() == 'GET':
+            if params:
+                request_path += '?' + urlencode([(k, v) for k, v in sorted(params.items()) if v is not None])
+        else:
+            # 서명한 bytes를 그대로 body로 보내도록 한 번만 serialize
+            body = serialization.dumps(request_body(params))
+            headers['Content-Type'] = 'application/json'
+        
         if require_signature:
-            now = time.time()
+            now = self._clock.now()
             timestamp = datetime.datetime.utcfromtimestamp(now).isoformat(timespec='milliseconds') + 'Z'
-    
+            
             if method.upper() == 'GET':
-                query_string = '&'.join(
-                    [str(k) + '=' + str(v) for k, v in sorted(params.items()) if v is not None]
-                )
-                prehash = f'{timestamp}{method.upper()}{endpoint}?{query_string}'
+                prehash = f'{timestamp}{method.upper()}{request_path}'
             else:
-                prehash = f'{timestamp}{method.upper()}{endpoint}{json.dumps(params)}'
-    
-            sign = base64.b64encode(
-                hmac.new(
-                    self._secret_key.encode(),
-                    msg=prehash.encode(),
-                    digestmod=hashlib.sha256
-                ).digest()
-            ).decode()
+                prehash = f'{timestamp}{method.upper()}{endpoint}'.encode() + body
+            
+            sign = self._signer.b64digest(prehash)
     
             headers |= {
                 'OK-ACCESS-KEY': self._api_key,
@@ -148,24 +214,30 @@ class ApiClient:
         
         if self._is_demo:
             headers |= {'x-simulated-trading': '1'}
+        timer.lap('sign')
         
         if method.upper() == 'GET':
-            async with aiohttp.request(
+            async with self._send_async(
+                timer,
                 method=method,
-                url=self._base_url + endpoint,
+                url=self._base_url + request_path,
                 headers=headers,
-                params={k: str(params[k]) for k in params},
             ) as res:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(method, endpoint, res.status, res.headers)
                 # TODO : Error handling
                 # TODO : Is it ok to return JSON directly?
-                return await res.json()
+                return await timer.json(res)
         else:
-            async with aiohttp.request(
+            async with self._send_async(
+                timer,
                 method=method,
-                url=self._base_url + endpoint,
+                url=self._base_url + request_path,
                 headers=headers,
-                json={k: str(params[k]) for k in params},
+                data=body,
             ) as res:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(method, endpoint, res.status, res.headers)
                 # TODO : Error handling
                 # TODO : Is it ok to return JSON directly?
-                return await res.json()
+                return await timer.json(res)
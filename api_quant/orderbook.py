@@ -0,0 +1,126 @@
+from bisect import bisect_left, insort
+
+
+class SequenceGap(Exception):
+    """ 받은 delta의 sequence가 이어지지 않아서 book을 다시 받아야 하는 경우 """
+    def __init__(self, symbol: str, message: str):
+        super().__init__(f'{symbol}: {message}')
+        self.symbol = symbol
+
+
+class BookSide:
+    """ 한쪽(bid 또는 ask) 호가, 가격 -> 수량
+
+        가격은 오름차순 list로 함께 관리해서 최우선 호가와 depth를 정렬 없이 읽음
+        `keep_raw=True`이면 거래소가 보낸 가격/수량 문자열도 보관 (OKX checksum 계산용)
+    """
+    __slots__ = ('is_bid', 'levels', 'prices', 'raw')
+
+    def __init__(self, is_bid: bool, keep_raw: bool = False):
+        self.is_bid = is_bid
+        self.levels: dict[float, float] = {}
+        self.prices: list[float] = []
+        self.raw: dict[float, tuple[str, str]] | None = {} if keep_raw else None
+
+    def clear(self) -> None:
+        self.levels.clear()
+        self.prices.clear()
+        if self.raw is not None:
+            self.raw.clear()
+
+    def set(self, price: str | float, qty: str | float) -> None:
+        """ 수량이 0이면 그 가격의 호가를 삭제 """
+        p = float(price)
+        q = float(qty)
+        if q == 0:
+            if self.levels.pop(p, None) is not None:
+                del self.prices[bisect_left(self.prices, p)]
+                if self.raw is not None:
+                    self.raw.pop(p, None)
+            return
+
+        if p not in self.levels:
+            insort(self.prices, p)
+        self.levels[p] = q
+        if self.raw is not None:
+            self.raw[p] = (str(price), str(qty))
+
+    def best(self) -> tuple[float, float] | None:
+        if not self.prices:
+            return None
+        p = self.prices[-1] if self.is_bid else self.prices[0]
+        return p, self.levels[p]
+
+    def depth(self, n: int | None = None) -> list[tuple[float, float]]:
+        """ 최우선 호가부터 n개 (가격, 수량) """
+        prices = reversed(self.prices) if self.is_bid else iter(self.prices)
+        result = []
+        for p in prices:
+            if n is not None and len(result) >= n:
+                break
+            result.append((p, self.levels[p]))
+        return result
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class OrderBook:
+    """ 종목 하나의 L2 호가창 (snapshot + delta로 갱신)
+
+        `sequence`는 거래소가 보낸 마지막 update id (Binance u, Bybit u, OKX seqId)
+        `synced`가 False인 동안은 snapshot을 다시 받는 중이므로 읽은 값을 믿으면 안 됨
+    """
+    def __init__(self, exchange: str, symbol: str, keep_raw: bool = False):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True, keep_raw=keep_raw)
+        self.asks = BookSide(is_bid=False, keep_raw=keep_raw)
+        self.sequence: int | None = None
+        self.timestamp: float | None = None
+        self.synced = False
+
+    def apply_snapshot(self, bids, asks, sequence: int | None = None, timestamp: float | None = None) -> None:
+        """ `bids`, `asks`는 [price, qty, ...] 형태의 목록 (가격/수량은 문자열 또는 숫자) """
+        self.bids.clear()
+        self.asks.clear()
+        self.apply_delta(bids, asks, sequence, timestamp)
+        self.synced = True
+
+    def apply_delta(self, bids, asks, sequence: int | None = None, timestamp: float | None = None) -> None:
+        for level in bids:
+            self.bids.set(level[0], level[1])
+        for level in asks:
+            self.asks.set(level[0], level[1])
+        if sequence is not None:
+            self.sequence = sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+    def invalidate(self) -> None:
+        self.synced = False
+
+    def best_bid(self) -> tuple[float, float] | None:
+        return self.bids.best()
+
+    def best_ask(self) -> tuple[float, float] | None:
+        return self.asks.best()
+
+    def mid(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self) -> float | None:
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def depth(self, n: int | None = None) -> tuple[list[tuple[float, float]], list[tuple[float, float]]]:
+        return self.bids.depth(n), self.asks.depth(n)
+
+    def __repr__(self) -> str:
+        return (f'OrderBook({self.exchange}, {self.symbol}, bid={self.best_bid()}, ask={self.best_ask()}, '
+                f'seq={self.sequence}, synced={self.synced})')
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import deque
+
+# 거래소 별 REST 미체결 주문 응답의 주문 id / 종목 field
+ORDER_ID_FIELDS = {'bnc': 'orderId', 'byb': 'orderId', 'okx': 'ordId', 'upt': 'uuid'}
+SYMBOL_FIELDS = {'bnc': 'symbol', 'byb': 'symbol', 'okx': 'instId', 'upt': 'market'}
+
+
+def order_key(exchange: str, order: dict) -> str:
+    # Binance는 현물과 선물의 주문 id가 겹칠 수 있으므로 상품 종류를 붙임
+    if exchange == 'bnc':
+        return f'{order.get("instrument_type", "spot")}:{order["orderId"]}'
+    return str(order[ORDER_ID_FIELDS[exchange]])
+
+
+class OpenOrderCache:
+    """ private stream으로 갱신하는 거래소 별 미체결 주문과 체결 내역
+
+        - 주문은 REST 미체결 주문 조회와 같은 형식(+ `instrument_type`)으로 보관해서 조회 결과를 그대로 대체할 수 있음
+        - stream이 연결되어 있고 연결 이후 REST 조회로 한 번 맞춘(reconcile) 거래소만 `ready`
+          (ready가 아니면 호출하는 쪽에서 REST로 조회해야 함)
+        - 모든 method는 thread safe (stream은 background loop thread에서, 조회는 다른 thread에서 호출)
+    """
+    def __init__(self, max_fills: int = 10_000):
+        self._lock = threading.Lock()
+        self._max_fills = max_fills
+        # exchange -> 주문 key -> (갱신 시각, 주문)
+        self._orders: dict[str, dict[str, tuple[float, dict]]] = {}
+        # exchange -> 주문 key -> (stream으로 체결 완료/취소를 받은 시각, 상품 종류)
+        # 그 전에 시작한 REST 조회 결과가 닫힌 주문을 되살리지 않도록 reconcile 때까지 기억함
+        self._closed: dict[str, dict[str, tuple[float, str | None]]] = {}
+        self._fills: dict[str, deque] = {}
+        # exchange -> stream 이름 -> 사용 가능 여부
+        self._streams: dict[str, dict[str, bool]] = {}
+        # exchange -> reconcile 때 REST 결과와 달랐던 주문 수 (누적, 처음 채울 때는 제외)
+        self.drift: dict[str, int] = {}
+        # exchange (또는 'exchange-instrument_type') -> 마지막 reconcile 시각
+        self.reconciled_at: dict[str, float] = {}
+
+    def update(self, exchange: str, order: dict, is_open: bool) -> None:
+        """ stream으로 받은 주문 상태를 반영 (체결 완료/취소된 주문은 삭제) """
+        key = order_key(exchange, order)
+        with self._lock:
+            orders = self._orders.setdefault(exchange, {})
+            closed = self._closed.setdefault(exchange, {})
+            if is_open:
+                orders[key] = (time.monotonic(), order)
+                closed.pop(key, None)
+            else:
+                orders.pop(key, None)
+                closed[key] = (time.monotonic(), order.get('instrument_type'))
+
+    def get(self, exchange: str, key: str) -> dict | None:
+        with self._lock:
+            entry = self._orders.get(exchange, {}).get(key)
+        return None if entry is None else dict(entry[1])
+
+    def add_fill(self, exchange: str, fill: dict) -> None:
+        with self._lock:
+            fills = self._fills.get(exchange)
+            if fills is None:
+                fills = self._fills[exchange] = deque(maxlen=self._max_fills)
+            fills.append(fill)
+
+    def open_orders(self, exchange: str, symbols: set[str] | None = None) -> list[dict]:
+        """ 미체결 주문 목록 (복사본), `symbols`를 주면 그 종목만 """
+        field = SYMBOL_FIELDS[exchange]
+        with self._lock:
+            orders = [order for _, order in self._orders.get(exchange, {}).values()]
+        return [dict(order) for order in orders if symbols is None or order[field] in symbols]
+
+    def fills(self, exchange: str, limit: int | None = None) -> list[dict]:
+        """ 최근 체결 내역 (오래된 것부터) """
+        with self._lock:
+            fills = list(self._fills.get(exchange, ()))
+        return fills[-limit:] if limit else fills
+
+    def reconcile(
+            self,
+            exchange: str,
+            orders: list[dict],
+            started_at: float,
+            instrument_type: str | None = None,
+    ) -> int:
+        """ REST로 조회한 미체결 주문으로 cache를 맞추고, 달랐던 주문 수를 반환
+
+            `started_at`(time.monotonic) 이후 stream으로 갱신되거나 닫힌 주문은 REST 결과보다 최신이므로 그대로 둠
+            `instrument_type`을 주면 그 상품의 주문만 맞춤 (Binance처럼 상품 별로 stream이 따로 있는 경우)
+        """
+        fetched = {order_key(exchange, order): order for order in orders}
+        scope = exchange if instrument_type is None else f'{exchange}-{instrument_type}'
+        with self._lock:
+            current = self._orders.setdefault(exchange, {})
+            closed = self._closed.setdefault(exchange, {})
+            drift = 0
+            for key in list(current):
+                updated_at, order = current[key]
+                if instrument_type is not None and order.get('instrument_type') != instrument_type:
+                    continue
+                if key not in fetched and updated_at < started_at:
+                    del current[key]
+                    drift += 1
+            now = time.monotonic()
+            for key, order in fetched.items():
+                if key in closed and closed[key][0] >= started_at:
+                    continue
+                entry = current.get(key)
+                if entry is None:
+                    drift += 1
+                elif entry[0] >= started_at:
+                    continue
+                current[key] = (now, order)
+
+            # 이번 조회보다 먼저 닫힌 주문은 이후의 조회에도 나오지 않으므로 더 기억할 필요가 없음
+            for key, (closed_at, closed_type) in list(closed.items()):
+                if closed_at < started_at and (instrument_type is None or closed_type == instrument_type):
+                    del closed[key]
+
+            if scope not in self.reconciled_at:
+                drift = 0
+            self.drift[exchange] = self.drift.get(exchange, 0) + drift
+            self.reconciled_at[scope] = now
+        return drift
+
+    def set_stream_state(self, exchange: str, stream: str, ready: bool) -> None:
+        with self._lock:
+            self._streams.setdefault(exchange, {})[stream] = ready
+
+    def ready(self, exchange: str) -> bool:
+        with self._lock:
+            streams = self._streams.get(exchange)
+            return bool(streams) and all(streams.values())
@@ -0,0 +1,411 @@
+""" 거래소 공통 주문 형식
+
+Binance, Bybit, OKX, Upbit의 주문 응답(REST 미체결 주문 조회, private stream)을 거래소 별 parser로 바로 변환
+
+- `Order`        : 주문 하나 (`__slots__`, 가격 / 수량은 Decimal, 원본 dict는 보관하지 않음)
+- `OrderColumns` : 많은 주문을 열 별로 보관 (가격 / 수량은 10 ** scale 배 한 정수 array)
+
+    orders = parse_orders('bnc', res.json(), 'perp')
+    columns = OrderColumns.from_raw('okx', res.json()['data'])
+
+OKX perp의 수량은 계약 수 기준 (instruments.Instrument.contract_value를 곱하면 base asset 수량)
+"""
+import datetime
+import sys
+from array import array
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Callable, Iterable
+
+# 'BTCUSDT'처럼 구분자가 없는 symbol을 나눌 때 끝에서부터 비교하는 quote asset (긴 것부터)
+QUOTE_ASSETS = ('FDUSD', 'USDT', 'USDC', 'BUSD', 'TUSD', 'USD', 'BTC', 'ETH', 'BNB', 'EUR', 'TRY', 'BRL', 'KRW')
+
+_SIDES = {
+    'BUY': 'buy', 'SELL': 'sell',  # Binance
+    'Buy': 'buy', 'Sell': 'sell',  # Bybit
+    'buy': 'buy', 'sell': 'sell',  # OKX
+    'bid': 'buy', 'ask': 'sell',  # Upbit
+}
+
+# 거래소 별 주문 상태 -> 'open', 'partially_filled', 'filled', 'canceled', 'rejected', 'expired', 'untriggered'
+BINANCE_STATUS = {
+    'NEW': 'open',
+    'PARTIALLY_FILLED': 'partially_filled',
+    'FILLED': 'filled',
+    'CANCELED': 'canceled',
+    'PENDING_CANCEL': 'open',
+    'REJECTED': 'rejected',
+    'EXPIRED': 'expired',
+    'EXPIRED_IN_MATCH': 'expired',
+}
+BYBIT_STATUS = {
+    'New': 'open',
+    'Created': 'open',
+    'PartiallyFilled': 'partially_filled',
+    'Filled': 'filled',
+    'Cancelled': 'canceled',
+    'PartiallyFilledCanceled': 'canceled',
+    'Rejected': 'rejected',
+    'Deactivated': 'canceled',
+    'Untriggered': 'untriggered',
+    'Triggered': 'open',
+}
+OKX_STATUS = {
+    'live': 'open',
+    'partially_filled': 'partially_filled',
+    'filled': 'filled',
+    'canceled': 'canceled',
+    'mmp_canceled': 'canceled',
+}
+UPBIT_STATUS = {
+    'wait': 'open',
+    'watch': 'untriggered',
+    'done': 'filled',
+    'cancel': 'canceled',
+}
+OPEN_STATUSES = frozenset(('open', 'partially_filled', 'untriggered'))
+
+_symbol_cache: dict[str, tuple[str, str]] = {}
+
+
+def split_symbol(symbol: str) -> tuple[str, str]:
+    """ 'BTCUSDT' -> ('BTC', 'USDT') (quote asset을 알 수 없으면 (symbol, '')) """
+    pair = _symbol_cache.get(symbol)
+    if pair is None:
+        pair = (symbol, '')
+        for quote in QUOTE_ASSETS:
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                pair = (sys.intern(symbol[:-len(quote)]), quote)
+                break
+        _symbol_cache[symbol] = pair
+    return pair
+
+
+def _split_okx(symbol: str) -> tuple[str, str]:
+    """ 'BTC-USDT' / 'BTC-USDT-SWAP' -> ('BTC', 'USDT') """
+    base, _, rest = symbol.partition('-')
+    return base, rest.partition('-')[0]
+
+
+def _split_upbit(symbol: str) -> tuple[str, str]:
+    """ 'KRW-BTC' -> ('BTC', 'KRW') """
+    quote, _, base = symbol.partition('-')
+    return base, quote
+
+
+SYMBOL_SPLITTERS: dict[str, Callable[[str], tuple[str, str]]] = {
+    'bnc': split_symbol,
+    'byb': split_symbol,
+    'okx': _split_okx,
+    'upt': _split_upbit,
+}
+
+
+def _iso_ms(value: str | None) -> int | None:
+    """ Upbit 'created_at' (ex. '2024-01-01T09:00:00+09:00') -> epoch ms """
+    if not value:
+        return None
+    return int(datetime.datetime.fromisoformat(value).timestamp() * 1000)
+
+
+def _int_or_none(value: Any) -> int | None:
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+# 거래소 별 parser는 주문 dict에서 아래 순서의 tuple을 만듦 (가격 / 수량은 원본 문자열 그대로)
+# (instrument_type, symbol, base, quote, order_id, client_order_id, side, order_type, status,
+#  price, qty, filled_qty, created_ms, updated_ms)
+Fields = tuple
+
+
+def _fields_binance(o: dict, instrument_type: str) -> Fields:
+    symbol = o['symbol']
+    base, quote = split_symbol(symbol)
+    return (
+        o.get('instrument_type', instrument_type), symbol, base, quote,
+        str(o['orderId']), o.get('clientOrderId') or None,
+        _SIDES[o['side']], o['type'].lower(), BINANCE_STATUS.get(o.get('status'), 'open'),
+        o.get('price'), o.get('origQty'), o.get('executedQty'),
+        o.get('time'), o.get('updateTime'),
+    )
+
+
+def _fields_bybit(o: dict, instrument_type: str) -> Fields:
+    symbol = o['symbol']
+    base, quote = split_symbol(symbol)
+    return (
+        o.get('instrument_type', instrument_type), symbol, base, quote,
+        o['orderId'], o.get('orderLinkId') or None,
+        _SIDES[o['side']], o['orderType'].lower(), BYBIT_STATUS.get(o.get('orderStatus'), 'open'),
+        o.get('price'), o.get('qty'), o.get('cumExecQty'),
+        _int_or_none(o.get('createdTime')), _int_or_none(o.get('updatedTime')),
+    )
+
+
+def _fields_okx(o: dict, instrument_type: str) -> Fields:
+    symbol = o['instId']
+    base, quote = _split_okx(symbol)
+    if 'instrument_type' in o:
+        instrument_type = o['instrument_type']
+    elif 'instType' in o:
+        instrument_type = 'perp' if o['instType'] == 'SWAP' else 'spot'
+    return (
+        instrument_type, symbol, base, quote,
+        o['ordId'], o.get('clOrdId') or None,
+        _SIDES[o['side']], o['ordType'], OKX_STATUS.get(o.get('state'), 'open'),
+        o.get('px'), o.get('sz'), o.get('accFillSz'),
+        _int_or_none(o.get('cTime')), _int_or_none(o.get('uTime')),
+    )
+
+
+def _fields_upbit(o: dict, instrument_type: str) -> Fields:
+    symbol = o['market']
+    base, quote = _split_upbit(symbol)
+    status = UPBIT_STATUS.get(o.get('state'), 'open')
+    filled_qty = o.get('executed_volume')
+    if status == 'open' and filled_qty and float(filled_qty) > 0:
+        status = 'partially_filled'
+    created_ms = _iso_ms(o.get('created_at'))
+    return (
+        o.get('instrument_type', instrument_type), symbol, base, quote,
+        o['uuid'], o.get('identifier') or None,
+        _SIDES[o['side']], o['ord_type'], status,
+        o.get('price'), o.get('volume'), filled_qty,
+        created_ms, created_ms,
+    )
+
+
+PARSERS: dict[str, Callable[[dict, str], Fields]] = {
+    'bnc': _fields_binance,
+    'byb': _fields_bybit,
+    'okx': _fields_okx,
+    'upt': _fields_upbit,
+}
+
+
+def _fields_parser(exchange: str) -> Callable[[dict, str], Fields]:
+    parser = PARSERS.get(exchange)
+    if parser is None:
+        raise ValueError(f'알 수 없는 거래소입니다. ({exchange})')
+    return parser
+
+
+def _decimal_or_none(v: Any) -> Decimal | None:
+    if v is None or v == '':
+        return None
+    return Decimal(v)
+
+
+class Order:
+    """ 거래소 공통 형식의 주문
+
+        `symbol`은 거래소 형식 그대로 (ex. 'BTCUSDT', 'BTC-USDT-SWAP', 'KRW-BTC'), `base` / `quote`로 종목을 비교
+        시장가 주문처럼 값이 없는 가격 / 수량은 None
+    """
+    __slots__ = (
+        'exchange', 'instrument_type', 'symbol', 'base', 'quote', 'order_id', 'client_order_id',
+        'side', 'order_type', 'status', 'price', 'qty', 'filled_qty', 'created_ms', 'updated_ms',
+    )
+
+    def __init__(
+            self,
+            exchange: str,
+            instrument_type: str,
+            symbol: str,
+            base: str,
+            quote: str,
+            order_id: str,
+            client_order_id: str | None,
+            side: str,
+            order_type: str,
+            status: str,
+            price: Decimal | None,
+            qty: Decimal | None,
+            filled_qty: Decimal | None,
+            created_ms: int | None = None,
+            updated_ms: int | None = None,
+    ):
+        self.exchange = exchange
+        self.instrument_type = instrument_type
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.side = side
+        self.order_type = order_type
+        self.status = status
+        self.price = price
+        self.qty = qty
+        self.filled_qty = filled_qty
+        self.created_ms = created_ms
+        self.updated_ms = updated_ms
+
+    @classmethod
+    def from_fields(cls, exchange: str, fields: Fields) -> 'Order':
+        (instrument_type, symbol, base, quote, order_id, client_order_id, side, order_type, status,
+         price, qty, filled_qty, created_ms, updated_ms) = fields
+        return cls(
+            exchange, instrument_type, symbol, base, quote, order_id, client_order_id, side, order_type, status,
+            _decimal_or_none(price), _decimal_or_none(qty), _decimal_or_none(filled_qty), created_ms, updated_ms,
+        )
+
+    @property
+    def canonical_symbol(self) -> str:
+        """ 거래소와 관계없는 종목 이름 (ex. 'BTC/USDT') """
+        return f'{self.base}/{self.quote}'
+
+    @property
+    def remaining_qty(self) -> Decimal | None:
+        if self.qty is None:
+            return None
+        return self.qty - (self.filled_qty or 0)
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in OPEN_STATUSES
+
+    def to_dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Order):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (
+            f'Order({self.exchange} {self.instrument_type} {self.symbol} {self.side} {self.order_type} '
+            f'{self.qty}@{self.price} filled={self.filled_qty} {self.status} id={self.order_id})'
+        )
+
+
+def parse_order(exchange: str, order: dict, instrument_type: str = 'spot') -> Order:
+    """ 거래소 응답의 주문 하나를 `Order`로 변환
+
+        `instrument_type`은 응답에 상품 정보가 없을 때 사용 (조회 결과에 붙인 'instrument_type', OKX 'instType'이 우선)
+    """
+    return Order.from_fields(exchange, _fields_parser(exchange)(order, instrument_type))
+
+
+def parse_orders(exchange: str, orders: Iterable[dict], instrument_type: str = 'spot') -> list[Order]:
+    parser = _fields_parser(exchange)
+    from_fields = Order.from_fields
+    return [from_fields(exchange, parser(order, instrument_type)) for order in orders]
+
+
+def to_scaled(value: Any, scale: int) -> int:
+    """ 10진수 문자열을 10 ** scale 배 한 정수로 변환 (scale 자리 아래는 반올림, 값이 없으면 0) """
+    if value is None or value == '':
+        return 0
+    s = str(value)
+    whole, _, frac = s.partition('.')
+    if len(frac) > scale or 'e' in s or 'E' in s:
+        return int(Decimal(s).scaleb(scale).to_integral_value(ROUND_HALF_EVEN))
+    return int(whole + frac.ljust(scale, '0'))
+
+
+_ONE = Decimal(1)
+# array('q')에 들어가는 값의 범위
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def from_scaled(value: int, scale: int) -> Decimal:
+    """ `to_scaled`의 반대 (소수점 아래의 0은 없앰, ex. 7000000000000 -> Decimal('70000')) """
+    d = Decimal(value).scaleb(-scale).normalize()
+    # normalize()는 정수의 끝자리 0도 지수로 바꾸므로 (7E+4) 다시 정수로 되돌림
+    return d.quantize(_ONE) if d.as_tuple().exponent > 0 else d
+
+
+class OrderColumns:
+    """ 주문 목록을 열 별로 보관 (수천 개의 주문을 적은 메모리로 들고 있거나 한꺼번에 계산할 때)
+
+        - 문자열 열은 list (같은 값은 같은 객체를 공유), 가격 / 수량은 10 ** `scale` 배 한 int64 array (값이 없으면 0)
+        - 가격 / 수량의 절댓값은 `max_value()`(scale=8이면 약 9.2e10)까지만 담을 수 있고, 넘으면 OverflowError
+          (OKX의 계약 수나 가격이 아주 낮은 종목의 수량처럼 큰 값을 다루면 `scale`을 낮춰야 함)
+        - `columns[i]`로 i번째 주문을 `Order`로 꺼냄
+    """
+    __slots__ = (
+        'scale', 'exchange', 'instrument_type', 'symbol', 'order_id', 'client_order_id', 'side', 'order_type',
+        'status', 'price', 'qty', 'filled_qty', 'updated_ms',
+    )
+
+    def __init__(self, scale: int = 8):
+        self.scale = scale
+        self.exchange: list[str] = []
+        self.instrument_type: list[str] = []
+        self.symbol: list[str] = []
+        self.order_id: list[str] = []
+        self.client_order_id: list[str | None] = []
+        self.side: list[str] = []
+        self.order_type: list[str] = []
+        self.status: list[str] = []
+        self.price = array('q')
+        self.qty = array('q')
+        self.filled_qty = array('q')
+        self.updated_ms = array('q')
+
+    @classmethod
+    def from_raw(cls, exchange: str, orders: Iterable[dict], instrument_type: str = 'spot', scale: int = 8) -> 'OrderColumns':
+        columns = cls(scale)
+        columns.extend_raw(exchange, orders, instrument_type)
+        return columns
+
+    def max_value(self) -> Decimal:
+        """ 가격 / 수량 열에 담을 수 있는 가장 큰 값 """
+        return Decimal(_INT64_MAX).scaleb(-self.scale)
+
+    def extend_raw(self, exchange: str, orders: Iterable[dict], instrument_type: str = 'spot') -> None:
+        """ 거래소 응답의 주문 목록을 `Order`를 만들지 않고 바로 열에 추가
+
+            범위를 넘는 가격 / 수량이 있으면 그 주문부터는 추가하지 않고 OverflowError (앞의 주문은 추가된 상태)
+        """
+        parser = _fields_parser(exchange)
+        scale = self.scale
+        intern = sys.intern
+        for order in orders:
+            (instrument_type_, symbol, _base, _quote, order_id, client_order_id, side, order_type, status,
+             price, qty, filled_qty, _created_ms, updated_ms) = parser(order, instrument_type)
+            # 열의 길이가 어긋나지 않도록 array에 넣을 값을 먼저 확인
+            scaled_price, scaled_qty, scaled_filled_qty = scaled = (
+                to_scaled(price, scale), to_scaled(qty, scale), to_scaled(filled_qty, scale)
+            )
+            if max(scaled) > _INT64_MAX or min(scaled) < _INT64_MIN:
+                raise OverflowError(
+                    f'scale={scale}인 OrderColumns에 담을 수 없는 값입니다. '
+                    f'(order_id={order_id}, price={price}, qty={qty}, filled_qty={filled_qty}, max={self.max_value()})'
+                )
+            self.exchange.append(exchange)
+            self.instrument_type.append(instrument_type_)
+            self.symbol.append(intern(symbol))
+            self.order_id.append(order_id)
+            self.client_order_id.append(client_order_id)
+            self.side.append(side)
+            self.order_type.append(intern(order_type))
+            self.status.append(status)
+            self.price.append(scaled_price)
+            self.qty.append(scaled_qty)
+            self.filled_qty.append(scaled_filled_qty)
+            self.updated_ms.append(updated_ms or 0)
+
+    def __len__(self) -> int:
+        return len(self.order_id)
+
+    def __getitem__(self, i: int) -> Order:
+        symbol = self.symbol[i]
+        base, quote = SYMBOL_SPLITTERS[self.exchange[i]](symbol)
+        price, qty = self.price[i], self.qty[i]
+        return Order(
+            self.exchange[i], self.instrument_type[i], symbol, base, quote, self.order_id[i], self.client_order_id[i],
+            self.side[i], self.order_type[i], self.status[i],
+            from_scaled(price, self.scale) if price else None,
+            from_scaled(qty, self.scale) if qty else None,
+            from_scaled(self.filled_qty[i], self.scale),
+            None, self.updated_ms[i] or None,
+        )
+
+    def nbytes(self) -> int:
+        """ 열 객체 자체의 크기 (list가 가리키는 문자열은 제외) """
+        return sum(sys.getsizeof(getattr(self, name)) for name in self.__slots__[1:])
+
@@ -0,0 +1,308 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """ `interval`초 동안 `limit`만큼의 weight를 사용할 수 있는 limit (token bucket으로 관리) """
+    name: str
+    limit: int
+    interval: float
+
+
+# 요청 하나가 각 rule에서 소모하는 weight. 고정값 또는 request parameter를 받아 계산하는 함수
+Cost = dict[str, int] | Callable[[dict[str, Any]], dict[str, int]]
+# 응답 header에서 읽은 rule 별 남은 weight
+HeaderParser = Callable[[str, str, Mapping[str, str]], dict[str, float]]
+
+
+class _Bucket:
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated')
+
+    def __init__(self, rule: RateLimitRule):
+        self.capacity = float(rule.limit)
+        self.rate = rule.limit / rule.interval
+        self.tokens = float(rule.limit)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """ 거래소 / endpoint 별 weight를 반영한 client-side rate limiter
+
+        - 요청 전에 `acquire()`(또는 `acquire_async()`)를 호출하면, weight가 남을 때까지 기다린 뒤(queueing) 소모함
+        - 응답을 받으면 `update()`로 거래소가 알려준 사용량(header)에 맞춰 남은 weight를 보정
+        - 429 / 418 응답을 받으면 `Retry-After`만큼 (없으면 `penalty`초) 모든 요청을 멈춤
+    """
+    def __init__(
+            self,
+            rules: list[RateLimitRule],
+            endpoint_costs: dict[str, Cost] | None = None,
+            default_cost: Cost | None = None,
+            header_parser: HeaderParser | None = None,
+            penalty: float = 1.0,
+    ):
+        self._rules = {rule.name: rule for rule in rules}
+        self._buckets = {rule.name: _Bucket(rule) for rule in rules}
+        self._endpoint_costs = endpoint_costs or {}
+        self._default_cost = default_cost or {}
+        self._header_parser = header_parser
+        self._penalty = penalty
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def cost(self, method: str, endpoint: str, params: dict[str, Any] | list | None = None) -> dict[str, int]:
+        cost = self._endpoint_costs.get(f'{method.upper()} {endpoint}')
+        if cost is None:
+            cost = self._endpoint_costs.get(endpoint, self._default_cost)
+        if callable(cost):
+            cost = cost(params or {})
+        return {name: weight for name, weight in cost.items() if name in self._buckets}
+
+    def _reserve(self, cost: dict[str, int]) -> float:
+        """ weight가 충분하면 소모하고 0을, 부족하면 기다려야 할 시간(초)을 반환 """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._blocked_until:
+                return self._blocked_until - now
+
+            wait = 0.0
+            for name, weight in cost.items():
+                bucket = self._buckets[name]
+                bucket.refill(now)
+                # limit보다 큰 weight는 bucket이 가득 찼을 때 보내도록 함
+                weight = min(weight, bucket.capacity)
+                if bucket.tokens < weight:
+                    wait = max(wait, (weight - bucket.tokens) / bucket.rate)
+            if wait > 0:
+                return wait
+
+            for name, weight in cost.items():
+                self._buckets[name].tokens -= min(weight, self._buckets[name].capacity)
+            return 0.0
+
+    def acquire(self, method: str, endpoint: str, params: dict[str, Any] | list | None = None) -> float:
+        """ 필요한 weight를 확보할 때까지 기다리고, 기다린 시간(초)을 반환 """
+        cost = self.cost(method, endpoint, params)
+        waited = 0.0
+        while (wait := self._reserve(cost)) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+    async def acquire_async(self, method: str, endpoint: str, params: dict[str, Any] | list | None = None) -> float:
+        import asyncio
+
+        cost = self.cost(method, endpoint, params)
+        waited = 0.0
+        while (wait := self._reserve(cost)) > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+        return waited
+
+    def update(self, method: str, endpoint: str, status: int, headers: Mapping[str, str]) -> None:
+        if status in (418, 429):
+            retry_after = headers.get('Retry-After')
+            penalty = float(retry_after) if retry_after else self._penalty
+            with self._lock:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + penalty)
+            logger.warning(f'Rate limit에 도달하였습니다. {penalty}초 동안 요청을 멈춥니다. ({status=}, {method=}, {endpoint=})')
+
+        if self._header_parser is None:
+            return
+        remaining = self._header_parser(method, endpoint, headers)
+        if not remaining:
+            return
+        with self._lock:
+            now = time.monotonic()
+            for name, tokens in remaining.items():
+                bucket = self._buckets.get(name)
+                if bucket is None:
+                    continue
+                bucket.refill(now)
+                # 거래소가 알려준 값이 더 보수적일 때만 반영 (아직 응답이 오지 않은 요청이 있을 수 있으므로)
+                bucket.tokens = min(bucket.tokens, tokens)
+
+    def headroom(self) -> dict[str, float]:
+        """ rule 별 남은 weight의 비율 (0 ~ 1) """
+        with self._lock:
+            now = time.monotonic()
+            for bucket in self._buckets.values():
+                bucket.refill(now)
+            return {name: bucket.tokens / bucket.capacity for name, bucket in self._buckets.items()}
+
+
+def parse_remaining_req(value: str) -> tuple[str, int | None, int | None]:
+    """ Upbit `Remaining-Req` header (ex. 'group=default; min=1800; sec=29') -> (group, min, sec)
+
+        header에 없는 field는 None (현재 Upbit은 `min`을 보내지 않음, 없는 값을 0으로 보면 limit을 소진한 것으로 오해함)
+    """
+    fields = dict(part.strip().split('=', 1) for part in value.split(';') if '=' in part)
+    remaining_min = fields.get('min')
+    remaining_sec = fields.get('sec')
+    return (
+        fields.get('group', 'default'),
+        None if remaining_min is None else int(remaining_min),
+        None if remaining_sec is None else int(remaining_sec),
+    )
+
+
+def _binance_weight(limit_by_symbol: int, limit_all: int) -> Callable[[dict[str, Any]], dict[str, int]]:
+    return lambda params: {'REQUEST_WEIGHT': limit_by_symbol if params.get('symbol') else limit_all}
+
+
+def _binance_header_parser(rules: dict[str, int]) -> HeaderParser:
+    def parse(method: str, endpoint: str, headers: Mapping[str, str]) -> dict[str, float]:
+        remaining = {}
+        for header, (name, limit) in (
+                ('X-MBX-USED-WEIGHT-1M', ('REQUEST_WEIGHT', rules.get('REQUEST_WEIGHT'))),
+                ('X-MBX-ORDER-COUNT-10S', ('ORDERS_10S', rules.get('ORDERS_10S'))),
+                ('X-MBX-ORDER-COUNT-1M', ('ORDERS_1M', rules.get('ORDERS_1M'))),
+                ('X-MBX-ORDER-COUNT-1D', ('ORDERS_1D', rules.get('ORDERS_1D'))),
+        ):
+            used = headers.get(header)
+            if used is not None and limit is not None:
+                remaining[name] = limit - int(used)
+        return remaining
+    return parse
+
+
+def binance_spot() -> RateLimiter:
+    rules = [
+        RateLimitRule('REQUEST_WEIGHT', 6000, 60),
+        RateLimitRule('ORDERS_10S', 100, 10),
+        RateLimitRule('ORDERS_1D', 200_000, 86_400),
+    ]
+    order = {'REQUEST_WEIGHT': 1, 'ORDERS_10S': 1, 'ORDERS_1D': 1}
+    return RateLimiter(
+        rules,
+        endpoint_costs={
+            'POST /api/v3/order': order,
+            'GET /api/v3/openOrders': _binance_weight(6, 80),
+            'GET /api/v3/exchangeInfo': {'REQUEST_WEIGHT': 20},
+            'GET /api/v3/depth': lambda params: {
+                'REQUEST_WEIGHT': 5 if int(params.get('limit', 100)) <= 100 else
+                25 if int(params['limit']) <= 500 else 50 if int(params['limit']) <= 1000 else 250
+            },
+        },
+        default_cost={'REQUEST_WEIGHT': 1},
+        header_parser=_binance_header_parser({rule.name: rule.limit for rule in rules}),
+    )
+
+
+def binance_futures() -> RateLimiter:
+    rules = [
+        RateLimitRule('REQUEST_WEIGHT', 2400, 60),
+        RateLimitRule('ORDERS_10S', 300, 10),
+        RateLimitRule('ORDERS_1M', 1200, 60),
+    ]
+    return RateLimiter(
+        rules,
+        endpoint_costs={
+            'POST /fapi/v1/order': {'REQUEST_WEIGHT': 0, 'ORDERS_10S': 1, 'ORDERS_1M': 1},
+            'POST /fapi/v1/batchOrders': {'REQUEST_WEIGHT': 5, 'ORDERS_10S': 5, 'ORDERS_1M': 1},
+            'GET /fapi/v1/openOrders': _binance_weight(1, 40),
+            'GET /fapi/v1/depth': lambda params: {
+                'REQUEST_WEIGHT': 2 if int(params.get('limit', 500)) <= 50 else
+                5 if int(params['limit']) <= 100 else 10 if int(params['limit']) <= 500 else 20
+            },
+        },
+        default_cost={'REQUEST_WEIGHT': 1},
+        header_parser=_binance_header_parser({rule.name: rule.limit for rule in rules}),
+    )
+
+
+BYBIT_ENDPOINT_LIMITS = {
+    '/v5/order/create': 10,
+    '/v5/order/cancel': 10,
+    '/v5/order/cancel-all': 10,
+    '/v5/order/create-batch': 10,
+    '/v5/order/cancel-batch': 10,
+    '/v5/order/realtime': 50,
+}
+
+
+def _bybit_header_parser(method: str, endpoint: str, headers: Mapping[str, str]) -> dict[str, float]:
+    remaining = headers.get('X-Bapi-Limit-Status')
+    if remaining is None or endpoint not in BYBIT_ENDPOINT_LIMITS:
+        return {}
+    return {endpoint: int(remaining)}
+
+
+def bybit() -> RateLimiter:
+    rules = [RateLimitRule('IP', 600, 5)]
+    rules += [RateLimitRule(endpoint, limit, 1) for endpoint, limit in BYBIT_ENDPOINT_LIMITS.items()]
+    return RateLimiter(
+        rules,
+        endpoint_costs={endpoint: {'IP': 1, endpoint: 1} for endpoint in BYBIT_ENDPOINT_LIMITS},
+        default_cost={'IP': 1},
+        header_parser=_bybit_header_parser,
+    )
+
+
+# endpoint -> (2초 당 limit, batch 요청인지 여부)
+OKX_ENDPOINT_LIMITS = {
+    '/api/v5/trade/order': (60, False),
+    '/api/v5/trade/batch-orders': (300, True),
+    '/api/v5/trade/cancel-order': (60, False),
+    '/api/v5/trade/cancel-batch-orders': (300, True),
+    '/api/v5/trade/amend-order': (60, False),
+    '/api/v5/trade/orders-pending': (60, False),
+    '/api/v5/public/instruments': (20, False),
+    '/api/v5/public/time': (10, False),
+}
+
+
+def okx() -> RateLimiter:
+    # OKX는 사용량을 header로 알려주지 않으므로 endpoint 별 limit만 관리 (batch 요청은 주문 수만큼 소모)
+    endpoint_costs: dict[str, Cost] = {}
+    for endpoint, (limit, is_batch) in OKX_ENDPOINT_LIMITS.items():
+        if is_batch:
+            endpoint_costs[endpoint] = (lambda e: lambda params: {e: len(params) if isinstance(params, list) else 1})(endpoint)
+        else:
+            endpoint_costs[endpoint] = {endpoint: 1}
+    return RateLimiter(
+        [RateLimitRule(endpoint, limit, 2) for endpoint, (limit, _) in OKX_ENDPOINT_LIMITS.items()],
+        endpoint_costs=endpoint_costs,
+    )
+
+
+def _upbit_header_parser(method: str, endpoint: str, headers: Mapping[str, str]) -> dict[str, float]:
+    value = headers.get('Remaining-Req')
+    if value is None:
+        return {}
+    group, _remaining_min, remaining_sec = parse_remaining_req(value)
+    if remaining_sec is None:
+        return {}
+    return {group if group in ('default', 'order') else 'quotation': remaining_sec}
+
+
+def upbit() -> RateLimiter:
+    return RateLimiter(
+        [
+            RateLimitRule('default', 30, 1),
+            RateLimitRule('order', 8, 1),
+            RateLimitRule('quotation', 10, 1),
+        ],
+        endpoint_costs={
+            'POST /v1/orders': {'order': 1},
+            **{endpoint: {'quotation': 1} for endpoint in (
+                '/v1/market/all', '/v1/candles/minutes/', '/v1/candles/days', '/v1/candles/weeks',
+                '/v1/candles/months', '/v1/trades/ticks', '/v1/ticker', '/v1/orderbook',
+            )},
+        },
+        default_cost={'default': 1},
+        header_parser=_upbit_header_parser,
+    )
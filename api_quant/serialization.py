@@ -0,0 +1,37 @@
+""" REST 요청 body와 응답 / WebSocket 메시지의 JSON encode, decode
+
+orjson이 설치되어 있으면 orjson을, 없으면 표준 json을 사용 (둘 다 공백 없는 UTF-8 JSON을 만듦)
+서명하는 쪽과 보내는 쪽이 `dumps()`가 만든 같은 bytes를 사용하도록 해서 body를 한 번만 만듦
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(data: str | bytes | bytearray | memoryview) -> Any:
+        return orjson.loads(data)
+else:
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj).encode()
+
+    def loads(data: str | bytes | bytearray | memoryview) -> Any:
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+
+def dumps_str(obj: Any) -> str:
+    """ WebSocket text frame처럼 문자열로 보내야 하는 경우 """
+    return dumps(obj).decode()
@@ -0,0 +1,236 @@
+import contextlib
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics, serialization
+
+if TYPE_CHECKING:
+    import asyncio
+
+    import aiohttp
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """ Connection pool settings shared by every exchange ApiClient
+        `pool_connections` : number of per-host pools kept by the session
+        `pool_maxsize`     : max idle connections kept alive per host
+        `pool_block`       : wait for a free connection instead of opening an extra one
+        `keep_alive`       : reuse connections between requests (False sends `Connection: close` / forces the
+                             aiohttp connector to close each connection after its response)
+        `max_retries`      : retries of the requests adapter on connection errors (0: fail fast, never resend an order)
+        `limit`            : max connections of the aiohttp connector (all hosts)
+        `ttl_dns_cache`    : seconds to cache DNS lookups in the aiohttp connector
+        `keepalive_timeout`: seconds an idle aiohttp connection is kept open
+    """
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    pool_block: bool = False
+    keep_alive: bool = True
+    max_retries: int = 0
+    limit: int = 100
+    ttl_dns_cache: int = 300
+    keepalive_timeout: float = 30.0
+
+
+DEFAULT_POOL_CONFIG = PoolConfig()
+
+
+class JsonResponse(requests.Response):
+    """ `json()`을 `serialization.loads`(orjson이 있으면 orjson)로 parsing하는 Response """
+    def json(self, **kwargs):
+        if kwargs:
+            return super().json(**kwargs)
+        try:
+            return serialization.loads(self.content)
+        except json.JSONDecodeError as e:
+            # requests의 `json()`과 같은 예외를 발생시킴
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos) from e
+
+
+class _JsonResponseAdapter(HTTPAdapter):
+    def build_response(self, req, resp) -> JsonResponse:
+        response = super().build_response(req, resp)
+        response.__class__ = JsonResponse
+        return response
+
+
+def create_session(config: PoolConfig | None = None) -> requests.Session:
+    if config is None:
+        config = DEFAULT_POOL_CONFIG
+
+    adapter = _JsonResponseAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+        pool_block=config.pool_block,
+        max_retries=config.max_retries,
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    # requests.Session은 기본적으로 keep-alive를 사용하므로, 끄는 경우에만 header를 덮어씀
+    if not config.keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+
+def create_async_session(config: PoolConfig | None = None) -> 'aiohttp.ClientSession':
+    """ 실행 중인 event loop 안에서 호출해야 함 """
+    # aiohttp는 import에만 수백 ms가 걸리므로, sync 요청만 하는 script가 비용을 치르지 않도록 처음 사용할 때 import
+    import aiohttp
+
+    if config is None:
+        config = DEFAULT_POOL_CONFIG
+
+    if config.keep_alive:
+        connector = aiohttp.TCPConnector(
+            limit=config.limit,
+            limit_per_host=config.pool_maxsize,
+            ttl_dns_cache=config.ttl_dns_cache,
+            keepalive_timeout=config.keepalive_timeout,
+        )
+    else:
+        connector = aiohttp.TCPConnector(
+            limit=config.limit,
+            limit_per_host=config.pool_maxsize,
+            ttl_dns_cache=config.ttl_dns_cache,
+            force_close=True,
+        )
+
+    # metrics를 켠 뒤에 만든 session만 새 연결을 연 시간을 기록 (trace callback은 모든 요청에서 호출되므로)
+    trace_configs = [metrics.trace_config()] if metrics.current() is not None else None
+    return aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
+
+
+def _close_without_loop(session: 'aiohttp.ClientSession') -> None:
+    """ event loop가 닫혀서 `await session.close()`를 할 수 없는 session의 연결을 끊음
+
+        transport.close()는 loop에 callback을 예약해야 하므로 socket을 shutdown해서 서버와의 연결을 끊고
+        (fd는 transport가 GC될 때 반환됨), connector를 닫힌 상태로 만들어서 남은 연결을 버림
+    """
+    import socket
+
+    connector = session.connector
+    if connector is None:
+        return
+    protocols = [proto for conns in connector._conns.values() for proto, _ in conns]
+    protocols += connector._acquired
+    for proto in protocols:
+        transport = proto.transport
+        sock = transport.get_extra_info('socket') if transport is not None else None
+        if sock is None:
+            continue
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    connector._close()
+    session.detach()
+    logger.debug('async session을 만든 event loop가 이미 닫혀서 연결을 바로 끊었습니다.')
+
+
+class SessionMixin:
+    """ ApiClient에 sync(requests) / async(aiohttp) session과 그 lifecycle을 제공
+
+        sync  : `with client:` 또는 `client.close()`
+        async : `async with client:` 또는 `await client.aclose()`
+
+        async session은 만든 event loop에 묶여 있으므로, loop가 바뀌거나 `close()`를 호출하면 그 loop에서 닫도록 예약함
+        (loop가 이미 닫혔으면 (ex. `asyncio.run`을 두 번 호출) 기다리지 않고 connector의 연결을 바로 끊음)
+    """
+    _session: requests.Session
+    _pool_config: PoolConfig | None
+    _async_session: 'aiohttp.ClientSession | None' = None
+    _async_session_loop: 'asyncio.AbstractEventLoop | None' = None
+
+    def _init_sessions(self, pool_config: PoolConfig | None) -> None:
+        self._pool_config = pool_config
+        self._session = create_session(pool_config)
+        self._async_session = None
+        self._async_session_loop = None
+
+    def _get_async_session(self) -> 'aiohttp.ClientSession':
+        import asyncio
+
+        # aiohttp.ClientSession은 생성된 event loop에 묶여 있으므로, loop가 바뀌면 새로 생성
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_session_loop is not loop:
+            self._discard_async_session()
+            self._async_session = create_async_session(self._pool_config)
+            self._async_session_loop = loop
+        return self._async_session
+
+    def _discard_async_session(self) -> None:
+        """ async session을 만든 event loop에서 닫도록 예약하고 참조를 버림 (loop가 닫혔으면 바로 끊음) """
+        import asyncio
+
+        session, loop = self._async_session, self._async_session_loop
+        self._async_session = None
+        self._async_session_loop = None
+        if session is None or session.closed:
+            return
+        if loop is not None and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+        else:
+            _close_without_loop(session)
+
+    def _send(self, timer: 'metrics.RequestTimer | metrics._NullTimer', **kwargs) -> requests.Response:
+        """ `self._session.request(**kwargs)`, 응답 / 예외를 `timer`에 기록 """
+        try:
+            res = self._session.request(**kwargs)
+        except Exception as e:
+            timer.failed(e)
+            raise
+        timer.received(res)
+        return res
+
+    @contextlib.asynccontextmanager
+    async def _send_async(
+            self,
+            timer: 'metrics.RequestTimer | metrics._NullTimer',
+            **kwargs,
+    ) -> AsyncIterator['aiohttp.ClientResponse']:
+        """ `self._get_async_session().request(**kwargs)`, 응답 header를 받은 시점과 예외를 `timer`에 기록 """
+        try:
+            async with self._get_async_session().request(trace_request_ctx=timer, **kwargs) as res:
+                timer.headers_received()
+                yield res
+        except Exception as e:
+            timer.failed(e)
+            raise
+
+    def close(self) -> None:
+        self._session.close()
+        self._discard_async_session()
+
+    async def aclose(self) -> None:
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+        self._async_session_loop = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    async def __aenter__(self):
+        self._get_async_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
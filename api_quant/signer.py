@@ -0,0 +1,34 @@
+import base64
+import hashlib
+import hmac
+
+
+class HmacSigner:
+    """ secret key로 key setup을 마친 HMAC 객체를 보관하고, 메시지마다 복사해서 서명
+
+        `hmac.new(secret.encode(), ...)`를 매 요청마다 호출하면 secret encoding과
+        ipad/opad 계산을 반복하게 되므로, 한 번 만든 prototype을 `copy()`해서 사용함
+    """
+    __slots__ = ('_prototype',)
+
+    def __init__(self, secret_key: str | bytes, digestmod=hashlib.sha256):
+        if isinstance(secret_key, str):
+            secret_key = secret_key.encode()
+        self._prototype = hmac.new(secret_key, digestmod=digestmod)
+
+    def digest(self, msg: str | bytes) -> bytes:
+        if isinstance(msg, str):
+            msg = msg.encode()
+        h = self._prototype.copy()
+        h.update(msg)
+        return h.digest()
+
+    def hexdigest(self, msg: str | bytes) -> str:
+        if isinstance(msg, str):
+            msg = msg.encode()
+        h = self._prototype.copy()
+        h.update(msg)
+        return h.hexdigest()
+
+    def b64digest(self, msg: str | bytes) -> str:
+        return base64.b64encode(self.digest(msg)).decode()
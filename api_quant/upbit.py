@@ -1,13 +1,20 @@
 import hashlib
 import random
-import uuid
-from typing import Any
+import threading
+import time
+from typing import TYPE_CHECKING, Any
 from urllib.parse import urlencode, unquote
 
-import aiohttp
-import jwt  # PyJWT
 import requests
 
+from . import metrics, ratelimit, serialization
+from .jwt_builder import Hs256TokenBuilder
+from .ratelimit import RateLimiter, parse_remaining_req
+from .session import PoolConfig, SessionMixin
+
+if TYPE_CHECKING:
+    import asyncio
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -16,7 +23,27 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class ApiClient:
+def encode_query(params: dict[str, Any] | None) -> tuple[str, str] | None:
+    """ request parameter를 Upbit 형식의 query string과 그 SHA512 hash로 변환 (parameter가 없으면 None) """
+    if params is None:
+        return None
+
+    # Upbit에서는 array 형태로 입력되는 인자를 PHP 스타일로 받음 (ex. "a=1&b[]=2&b[]=3&c=4")
+    # `urllib.parse.urlencode` 함수를 바로 사용하기 위해, sequence 형태 인자의 key 값에 "[]"를 붙여줌
+    params_with_seq_identified = {}
+    for k, v in params.items():
+        if isinstance(v, list | tuple | set):
+            params_with_seq_identified[k + '[]'] = v
+        else:
+            params_with_seq_identified[k] = v
+
+    # URL에는 encoding된 query string을, query hash에는 decoding된 문자열을 사용
+    query_string = urlencode(params_with_seq_identified, doseq=True)
+    query_hash = hashlib.sha512(unquote(query_string).encode()).hexdigest()
+    return query_string, query_hash
+
+
+class ApiClient(SessionMixin):
     EXCHANGE_API_ENDPOINTS = [
         '/v1/accounts',  # 전체 계좌 조회
         '/v1/orders/chance',  # 주문 가능 정보
@@ -51,10 +78,23 @@ class ApiClient:
             self,
             key_pair: tuple[str, str],
             base_url: str = 'https://api.upbit.com',
+            pool_config: PoolConfig | None = None,
+            rate_limiter: RateLimiter | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._token_builder = Hs256TokenBuilder(self._api_key, self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._rate_limiter = rate_limiter if rate_limiter is not None else ratelimit.upbit()
+
+    @property
+    def rate_limiter(self) -> RateLimiter | None:
+        return self._rate_limiter
+
+    def ws_auth_headers(self) -> dict[str, str]:
+        """ private WebSocket(myOrder, myAsset) 연결 시 보내는 인증 header """
+        return {'Authorization': f'Bearer {self._token_builder.build()}'}
 
     def get(self, endpoint: str, params: dict[str, Any] | None = None) -> requests.Response:
         return self.request(method='get', endpoint=endpoint, params=params)
@@ -70,58 +110,46 @@ class ApiClient:
             method: str,
             endpoint: str,
             params: dict[str, Any] | None = None,
+            timeout: float | None = None,
     ) -> requests.Response:
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
 
+        timer = metrics.timer('upt', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint, params)
+        timer.lap('queue')
+
         # 인증이 필요하지 않은 Quotation API의 경우, IP를 기반으로 limit을 확인하므로 key rotating이 필요하지 않음
         if endpoint in RevolverApiClient.QUOTATION_API_ENDPOINTS or endpoint.startswith('candles/minutes/'):
             # 2022년 8월 4일 기준, Quotation API에서 request parameter를 받는 endpoint는 없음
-            return requests.request(method=method, url=self._base_url + endpoint)
-
-        # Upbit에서는 array 형태로 입력되는 인자를 PHP 스타일로 받음 (ex. "a=1&b[]=2&b[]=3&c=4")
-        # `urllib.parse.urlencode` 함수를 바로 사용하기 위해, sequence 형태 인자의 key 값에 "[]"를 붙여줌
-        params_with_seq_identified: dict[str, Any] | None = None
-        if params is not None:
-            params_with_seq_identified = {}
-            for k, v in params.items():
-                if isinstance(v, list | tuple | set):
-                    params_with_seq_identified[k + '[]'] = v
-                else:
-                    params_with_seq_identified[k] = v
-
-        payload = {
-            'access_key': self._api_key,
-            'nonce': str(uuid.uuid4()),
-        }
-        if params_with_seq_identified is not None:
-            # Upbit 형식에 맞춰 payload에 내용 추가
-            m = hashlib.sha512()
-            m.update(unquote(urlencode(params_with_seq_identified, doseq=True)).encode())
-            payload['query_hash'] = m.hexdigest()
-            payload['query_hash_alg'] = 'SHA512'
-
-        jwt_token = jwt.encode(payload, self._secret_key)
-
-        if method.lower == 'post':
-            res = requests.request(
-                method=method,
-                url=self._base_url + endpoint,
-                headers={
-                    'Authorization': f'Bearer {jwt_token}',
-                },
-                json=payload,
-            )
+            res = self._send(timer, method=method, url=self._base_url + endpoint, timeout=timeout)
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(method, endpoint, res.status_code, res.headers)
+            return res
+
+        url = self._base_url + endpoint
+        encoded = encode_query(params)
+        if encoded is None:
+            jwt_token = self._token_builder.build()
         else:
-            res = requests.request(
-                method=method,
-                url=self._base_url + endpoint,
-                headers={
-                    'Authorization': f'Bearer {jwt_token}',
-                },
-                params=params_with_seq_identified,
-            )
-
+            query_string, query_hash = encoded
+            jwt_token = self._token_builder.build(query_hash)
+            url += '?' + query_string
+        timer.lap('sign')
+
+        res = self._send(
+            timer,
+            method=method,
+            url=url,
+            headers={
+                'Authorization': f'Bearer {jwt_token}',
+            },
+            timeout=timeout,
+        )
+
+        if self._rate_limiter is not None:
+            self._rate_limiter.update(method, endpoint, res.status_code, res.headers)
         return res
 
     async def request_async(
@@ -133,68 +161,114 @@ class ApiClient:
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
 
+        timer = metrics.timer('upt', endpoint, self._rate_limiter)
+        if self._rate_limiter is not None:
+            await self._rate_limiter.acquire_async(method, endpoint, params)
+        timer.lap('queue')
+
         # 인증이 필요하지 않은 Quotation API의 경우, IP를 기반으로 limit을 확인하므로 key rotating이 필요하지 않음
         if endpoint in RevolverApiClient.QUOTATION_API_ENDPOINTS or endpoint.startswith('candles/minutes/'):
             # 2022년 8월 4일 기준, Quotation API에서 request parameter를 받는 endpoint는 없음
-            async with aiohttp.request(
+            async with self._send_async(
+                    timer,
                     method=method,
                     url=self._base_url + endpoint,
             ) as res:
+                if self._rate_limiter is not None:
+                    self._rate_limiter.update(method, endpoint, res.status, res.headers)
                 # TODO : Error handling
                 # TODO : Is it ok to return JSON directly?
-                return await res.json()
+                return await timer.json(res)
 
-        # Upbit에서는 array 형태로 입력되는 인자를 PHP 스타일로 받음 (ex. "a=1&b[]=2&b[]=3&c=4")
-        # `urllib.parse.urlencode` 함수를 바로 사용하기 위해, sequence 형태 인자의 key 값에 "[]"를 붙여줌
-        params_with_seq_identified: dict[str, Any] | None = None
-        if params is not None:
-            params_with_seq_identified = {}
-            for k, v in params.items():
-                if isinstance(v, list | tuple | set):
-                    params_with_seq_identified[k + '[]'] = v
-                else:
-                    params_with_seq_identified[k] = str(v)
-
-        payload = {
-            'access_key': self._api_key,
-            'nonce': str(uuid.uuid4()),
-        }
-        if params_with_seq_identified is not None:
-            # Upbit 형식에 맞춰 payload에 내용 추가
-            m = hashlib.sha512()
-            m.update(unquote(urlencode(params_with_seq_identified, doseq=True)).encode())
-            payload['query_hash'] = m.hexdigest()
-            payload['query_hash_alg'] = 'SHA512'
-
-        jwt_token = jwt.encode(payload, self._secret_key)
-
-        if method.lower == 'post':
-            async with aiohttp.request(
-                    method=method,
-                    url=self._base_url + endpoint,
-                    headers={
-                        'Authorization': f'Bearer {jwt_token}',
-                    },
-                    json={k: str(payload[k]) for k in payload},
-            ) as res:
-                # TODO : Error handling
-                # TODO : Is it ok to return JSON directly?
-                return await res.json()
+        url = self._base_url + endpoint
+        encoded = encode_query(params)
+        if encoded is None:
+            jwt_token = self._token_builder.build()
         else:
-            async with aiohttp.request(
-                    method=method,
-                    url=self._base_url + endpoint,
-                    headers={
-                        'Authorization': f'Bearer {jwt_token}',
-                    },
-                    params=params_with_seq_identified,
-            ) as res:
-                # TODO : Error handling
-                # TODO : Is it ok to return JSON directly?
-                return await res.json()
-
+            query_string, query_hash = encoded
+            jwt_token = self._token_builder.build(query_hash)
+            url += '?' + query_string
+        timer.lap('sign')
 
-class RevolverApiClient:
+        async with self._send_async(
+                timer,
+                method=method,
+                url=url,
+                headers={
+                    'Authorization': f'Bearer {jwt_token}',
+                },
+        ) as res:
+            if self._rate_limiter is not None:
+                self._rate_limiter.update(method, endpoint, res.status, res.headers)
+            # TODO : Error handling
+            # TODO : Is it ok to return JSON directly?
+            return await timer.json(res)
+
+
+# async 요청이 key를 기다리는 최대 간격 (다른 thread의 요청이 끝난 것을 확인하는 주기)
+ASYNC_KEY_POLL_INTERVAL = 0.05
+
+# Upbit Exchange API의 key 당 초당 요청 수 (Remaining-Req header의 group 기준)
+REVOLVER_GROUP_LIMITS = {
+    'default': 30,
+    'order': 8,
+}
+
+
+def request_group(method: str, endpoint: str) -> str:
+    return 'order' if method.upper() == 'POST' and endpoint == '/v1/orders' else 'default'
+
+
+class _KeyState:
+    """ key 하나의 group 별 남은 요청 수와 cooldown 상태 (Remaining-Req header로 갱신) """
+    __slots__ = (
+        'access_key', 'secret_key', 'token_builder', 'remaining', 'reset_at', 'cooldown_until', 'last_used', 'in_flight',
+    )
+
+    def __init__(self, access_key: str, secret_key: str):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.token_builder = Hs256TokenBuilder(access_key, secret_key)
+        self.remaining = dict(REVOLVER_GROUP_LIMITS)
+        self.reset_at = {group: 0.0 for group in REVOLVER_GROUP_LIMITS}
+        self.cooldown_until = 0.0
+        self.last_used = 0.0
+        self.in_flight = 0
+
+    def headroom(self, group: str, now: float) -> int:
+        # 초당 limit이 초기화된 뒤라면 limit 전체를 사용할 수 있음
+        if now >= self.reset_at[group]:
+            return REVOLVER_GROUP_LIMITS[group]
+        return self.remaining[group]
+
+    def on_dispatch(self, group: str, now: float) -> None:
+        if now >= self.reset_at[group]:
+            self.remaining[group] = REVOLVER_GROUP_LIMITS[group]
+            self.reset_at[group] = now + 1
+        self.remaining[group] -= 1
+        self.last_used = now
+        self.in_flight += 1
+
+    def on_response(self, group: str, status: int, remaining_req: str | None, now: float) -> None:
+        self.in_flight -= 1
+        if remaining_req is not None:
+            header_group, remaining_min, remaining_sec = parse_remaining_req(remaining_req)
+            if header_group in self.remaining:
+                group = header_group
+            if remaining_sec is not None:
+                self.remaining[group] = remaining_sec
+                self.reset_at[group] = now + 1
+            # 분당 남은 요청 수는 header에 있을 때만 확인 (없는 값을 0으로 보고 key를 쉬게 하지 않음)
+            if remaining_min is not None and remaining_min <= 0:
+                # 분당 limit까지 소진한 경우, 다음 분까지 사용하지 않음
+                self.cooldown_until = max(self.cooldown_until, now + 60 - time.time() % 60)
+        if status == 429:
+            self.remaining[group] = 0
+            self.reset_at[group] = now + 1
+            self.cooldown_until = max(self.cooldown_until, now + 1)
+
+
+class RevolverApiClient(SessionMixin):
     EXCHANGE_API_ENDPOINTS = [
         '/v1/accounts',  # 전체 계좌 조회
         '/v1/orders/chance',  # 주문 가능 정보
@@ -229,23 +303,111 @@ class RevolverApiClient:
             self,
             key_pairs: list[tuple[str, str]],
             base_url: str = 'https://api.upbit.com',
+            pool_config: PoolConfig | None = None,
+            max_in_flight_per_key: int = 8,
     ):
         self._key_pairs: list[tuple[str, str]] = []
+        self._key_states: list[_KeyState] = []
+        self._max_in_flight_per_key = max_in_flight_per_key
+        # key 상태를 보호하는 lock이자, 요청이 끝나 key에 여유가 생겼음을 기다리는 thread에게 알리는 condition
+        self._released = threading.Condition()
+        self._async_released: 'asyncio.Condition | None' = None
+        self._async_released_loop: 'asyncio.AbstractEventLoop | None' = None
         for access_key, secret_key in key_pairs:
             self.add_key_pair(access_key, secret_key)
-        random.shuffle(self._key_pairs)
+        random.shuffle(self._key_states)
 
-        self._index = 0
         self._base_url = base_url
+        self._init_sessions(pool_config)
 
     def add_key_pair(self, access_key: str, secret_key: str) -> None:
         # TODO : 주어진 key pair가 유효한지 확인 (정상적으로 입력이 되었는지?, 만료가 되지는 않았는지?)
         self._key_pairs.append((access_key, secret_key))
-
-    def get_next_key_pair(self) -> tuple[str, str]:
-        _a, _s = self._key_pairs[self._index]
-        self._index = (self._index + 1) % len(self._key_pairs)
-        return _a, _s
+        self._key_states.append(_KeyState(access_key, secret_key))
+
+    def _try_acquire_key(self, group: str) -> tuple[_KeyState | None, float | None]:
+        """ cooldown 중이 아니고 동시 요청 수에 여유가 있는 key 중 남은 요청 수가 가장 많은 key를 선택
+
+            선택할 key가 없으면 다음 key를 쓸 수 있을 때까지의 시간을 반환
+            (진행 중인 요청이 끝나야만 쓸 수 있는 경우 None), `self._released`를 잡은 상태에서 호출해야 함
+        """
+        now = time.monotonic()
+        best: _KeyState | None = None
+        best_score: tuple[int, float] | None = None
+        for state in self._key_states:
+            if state.cooldown_until > now or state.in_flight >= self._max_in_flight_per_key:
+                continue
+            # 남은 요청 수가 같으면 가장 오래 전에 사용한 key를 선택
+            score = (state.headroom(group, now), -state.last_used)
+            if best_score is None or score > best_score:
+                best, best_score = state, score
+
+        if best is None or best_score[0] <= 0:
+            next_ready: float | None = None
+            for state in self._key_states:
+                if state.in_flight >= self._max_in_flight_per_key:
+                    continue
+                ready = max(state.cooldown_until, state.reset_at[group] if state.headroom(group, now) <= 0 else now)
+                next_ready = ready if next_ready is None else min(next_ready, ready)
+            return None, None if next_ready is None else max(0.0, next_ready - now)
+
+        best.on_dispatch(group, now)
+        return best, 0.0
+
+    def _acquire_key(self, group: str) -> _KeyState:
+        with self._released:
+            while True:
+                state, wait = self._try_acquire_key(group)
+                if state is not None:
+                    return state
+                # 모든 key가 limit에 도달한 경우, 가장 먼저 풀리는 key를 기다림
+                self._released.wait(wait)
+
+    def _release_key(self, state: _KeyState, group: str, status: int, remaining_req: str | None) -> None:
+        with self._released:
+            state.on_response(group, status, remaining_req, time.monotonic())
+            self._released.notify_all()
+
+    def _get_async_released(self) -> 'asyncio.Condition':
+        import asyncio
+
+        # asyncio.Condition도 event loop에 묶여 있으므로, loop가 바뀌면 새로 생성
+        loop = asyncio.get_running_loop()
+        if self._async_released is None or self._async_released_loop is not loop:
+            self._async_released = asyncio.Condition()
+            self._async_released_loop = loop
+        return self._async_released
+
+    async def _acquire_key_async(self, group: str) -> _KeyState:
+        import asyncio
+
+        released = self._get_async_released()
+        while True:
+            with self._released:
+                state, wait = self._try_acquire_key(group)
+            if state is not None:
+                return state
+            # 다른 thread에서 끝난 요청은 알림을 받을 수 없으므로, 짧은 주기로 다시 확인
+            timeout = ASYNC_KEY_POLL_INTERVAL if wait is None else min(wait, ASYNC_KEY_POLL_INTERVAL)
+            async with released:
+                try:
+                    await asyncio.wait_for(released.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release_key_async(self, state: _KeyState, group: str, status: int, remaining_req: str | None) -> None:
+        self._release_key(state, group, status, remaining_req)
+        released = self._get_async_released()
+        async with released:
+            released.notify_all()
+
+    def get_next_key_pair(self, group: str = 'default') -> tuple[str, str]:
+        state = self._acquire_key(group)
+        # 요청 없이 key만 가져가는 경우이므로, 동시 요청 수에서는 바로 제외
+        with self._released:
+            state.in_flight -= 1
+            self._released.notify_all()
+        return state.access_key, state.secret_key
 
     def get(self, endpoint: str, params: dict[str, Any] | None = None) -> requests.Response:
         return self.request(method='get', endpoint=endpoint, params=params)
@@ -261,6 +423,7 @@ class RevolverApiClient:
             method: str,
             endpoint: str,
             params: dict[str, Any] | None = None,
+            timeout: float | None = None,
     ) -> requests.Response:
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
@@ -268,63 +431,135 @@ class RevolverApiClient:
         # 인증이 필요하지 않은 Quotation API의 경우, IP를 기반으로 limit을 확인하므로 key rotating이 필요하지 않음
         if endpoint in RevolverApiClient.QUOTATION_API_ENDPOINTS or endpoint.startswith('candles/minutes/'):
             # 2022년 8월 4일 기준, Quotation API에서 request parameter를 받는 endpoint는 없음
-            return requests.request(method=method, url=self._base_url + endpoint)
+            return self._session.request(method=method, url=self._base_url + endpoint, timeout=timeout)
         elif endpoint not in RevolverApiClient.EXCHANGE_API_ENDPOINTS:
             raise ValueError(f'알 수 없는 endpoint입니다. ({endpoint})')
 
-        # Upbit에서는 array 형태로 입력되는 인자를 PHP 스타일로 받음 (ex. "a=1&b[]=2&b[]=3&c=4")
-        # `urllib.parse.urlencode` 함수를 바로 사용하기 위해, sequence 형태 인자의 key 값에 "[]"를 붙여줌
-        params_with_seq_identified: dict[str, Any] | None = None
-        if params is not None:
-            params_with_seq_identified = {}
-            for k, v in params.items():
-                if isinstance(v, list | tuple | set):
-                    params_with_seq_identified[k + '[]'] = v
-                else:
-                    params_with_seq_identified[k] = v
-
-        # API limit이 걸려있지 않는 key를 만날 때까지 반복하여 요청
+        # query string과 query hash는 key와 무관하므로 재시도 전에 한 번만 계산
+        url = self._base_url + endpoint
+        encoded = encode_query(params)
+        query_hash: str | None = None
+        if encoded is not None:
+            query_string, query_hash = encoded
+            url += '?' + query_string
+
+        # 남은 요청 수가 가장 많은 key로 요청하고, 429를 받으면 그 key는 cooldown 후 다른 key로 재시도
+        group = request_group(method, endpoint)
         res: requests.Response | None = None
-        for _tries in range(len(self._key_pairs)):
+        for _tries in range(len(self._key_states)):
+            state = self._acquire_key(group)
+
             # 인증에 필요한 JWT token을 계산하는 과정
-            access_key, secret_key = self.get_next_key_pair()
-            payload = {
-                'access_key': access_key,
-                'nonce': str(uuid.uuid4()),
-            }
-            if params_with_seq_identified is not None:
-                # Upbit 형식에 맞춰 payload에 내용 추가
-                m = hashlib.sha512()
-                m.update(unquote(urlencode(params_with_seq_identified, doseq=True)).encode())
-                payload['query_hash'] = m.hexdigest()
-                payload['query_hash_alg'] = 'SHA512'
-
-            jwt_token = jwt.encode(payload, secret_key)
-
-            if method.lower == 'post':
-                res = requests.request(
-                    method=method,
-                    url=self._base_url + endpoint,
-                    headers={
-                        'Authorization': f'Bearer {jwt_token}',
-                    },
-                    json=payload,
-                )
-            else:
-                res = requests.request(
+            jwt_token = state.token_builder.build(query_hash)
+
+            try:
+                res = self._session.request(
                     method=method,
-                    url=self._base_url + endpoint,
+                    url=url,
                     headers={
                         'Authorization': f'Bearer {jwt_token}',
                     },
-                    params=params_with_seq_identified,
+                    timeout=timeout,
                 )
+            except BaseException:
+                self._release_key(state, group, 0, None)
+                raise
+            self._release_key(state, group, res.status_code, res.headers.get('Remaining-Req'))
 
             # `429 Too Many Requests` 오류가 아닌 경우, 반환
             if res.status_code != 429:
                 return res
 
+            access_key = state.access_key
             logger.warning(f'API key limit에 도달하였습니다. 다른 key로 시도합니다. ({access_key=}, {method=}, {endpoint=}, {params=})')
 
-        logger.error(f'총 {len(self._key_pairs)}개의 API키의 {endpoint} endpoint의 limit이 다다랐습니다.')
-        return res
\ No newline at end of file
+        logger.error(f'총 {len(self._key_states)}개의 API키의 {endpoint} endpoint의 limit이 다다랐습니다.')
+        return res
+
+    async def request_async(
+            self,
+            method: str,
+            endpoint: str,
+            params: dict[str, Any] | None = None,
+    ) -> Any:
+        if not endpoint.startswith('/'):
+            endpoint = '/' + endpoint
+
+        # 인증이 필요하지 않은 Quotation API의 경우, IP를 기반으로 limit을 확인하므로 key rotating이 필요하지 않음
+        if endpoint in RevolverApiClient.QUOTATION_API_ENDPOINTS or endpoint.startswith('candles/minutes/'):
+            async with self._get_async_session().request(method=method, url=self._base_url + endpoint) as res:
+                # TODO : Error handling
+                return await res.json()
+        elif endpoint not in RevolverApiClient.EXCHANGE_API_ENDPOINTS:
+            raise ValueError(f'알 수 없는 endpoint입니다. ({endpoint})')
+
+        url = self._base_url + endpoint
+        encoded = encode_query(params)
+        query_hash: str | None = None
+        if encoded is not None:
+            query_string, query_hash = encoded
+            url += '?' + query_string
+
+        # key 별 동시 요청 수(`max_in_flight_per_key`)를 넘지 않도록 key를 나눠 쓰고, 429를 받으면 다른 key로 재시도
+        # 응답이 JSON이 아닌 경우는 GET만 다른 key로 재시도 (주문/취소는 이미 접수되었을 수 있으므로 바로 예외)
+        group = request_group(method, endpoint)
+        result: Any = None
+        for _tries in range(len(self._key_states)):
+            state = await self._acquire_key_async(group)
+            jwt_token = state.token_builder.build(query_hash)
+
+            try:
+                async with self._get_async_session().request(
+                        method=method,
+                        url=url,
+                        headers={
+                            'Authorization': f'Bearer {jwt_token}',
+                        },
+                ) as res:
+                    status = res.status
+                    remaining_req = res.headers.get('Remaining-Req')
+                    body = await res.read()
+            except BaseException:
+                await self._release_key_async(state, group, 0, None)
+                raise
+            # body를 decode하기 전에 key를 돌려놓아서, decode에 실패해도 key의 상태(남은 요청 수, cooldown)는 반영됨
+            await self._release_key_async(state, group, status, remaining_req)
+
+            access_key = state.access_key
+            try:
+                result = serialization.loads(body)
+            except ValueError as e:
+                # ex. 앞단 proxy의 HTML 오류 page
+                if status != 429 and method.upper() != 'GET':
+                    raise ValueError(
+                        f'JSON이 아닌 응답을 받았습니다. 요청이 접수되었는지 확인하세요. ({status=}, {method=}, {endpoint=}, {params=})'
+                    ) from e
+                result = e
+                logger.warning(f'JSON이 아닌 응답을 받았습니다. 다른 key로 시도합니다. ({access_key=}, {status=}, {method=}, {endpoint=}, {params=})')
+                continue
+
+            # `429 Too Many Requests` 오류가 아닌 경우, 반환
+            if status != 429:
+                return result
+
+            logger.warning(f'API key limit에 도달하였습니다. 다른 key로 시도합니다. ({access_key=}, {method=}, {endpoint=}, {params=})')
+
+        logger.error(f'총 {len(self._key_states)}개의 API키로 {endpoint} 요청에 실패했습니다.')
+        if isinstance(result, ValueError):
+            raise result
+        return result
+
+    async def request_many_async(
+            self,
+            calls: list[tuple[str, str, dict[str, Any] | None]],
+    ) -> list[Any]:
+        """ (method, endpoint, params) 목록을 모든 key에 나눠서 동시에 요청하고, 입력 순서대로 결과를 반환
+
+            실패한 요청은 결과 자리에 예외 객체를 담아서 반환
+        """
+        import asyncio
+
+        return await asyncio.gather(
+            *(self.request_async(method, endpoint, params) for method, endpoint, params in calls),
+            return_exceptions=True,
+        )
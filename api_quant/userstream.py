@@ -0,0 +1,427 @@
+import asyncio
+import os
+import time
+from decimal import Decimal
+from typing import Any, Callable
+
+import aiohttp
+
+from . import serialization
+from .background import BackgroundLoop
+from .ordercache import OpenOrderCache
+from .session import PoolConfig, create_async_session
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+class UserStream:
+    """ 거래소 하나의 private WebSocket(주문/체결) 연결을 유지하면서 `OpenOrderCache`를 갱신
+
+        - 연결(인증, 구독)할 때마다 `fetch_open_orders`(REST 조회)로 cache를 맞춘 뒤 ready로 표시
+        - 연결 중에도 `reconcile_interval`초마다 REST 조회로 빠진 이벤트를 보정
+        - 연결이 끊기면 ready를 해제하고 (조회는 REST로 돌아감) 두 배씩 늘어나는 간격으로 다시 연결
+
+        subclass가 연결 URL, 인증/구독, 메시지를 cache에 반영하는 방법을 정의
+    """
+    exchange: str
+    WS_URL: str
+    # WebSocket ping frame 외에 거래소가 요구하는 application level ping (없으면 None)
+    PING_MESSAGE: str | dict | None = None
+    # 이 stream이 다루는 상품 종류 (None이면 거래소의 모든 주문)
+    instrument_type: str | None = None
+
+    def __init__(
+            self,
+            client,
+            cache: OpenOrderCache,
+            fetch_open_orders: Callable[[], list[dict]],
+            ws_url: str | None = None,
+            reconcile_interval: float = 60.0,
+            ping_interval: float = 20,
+            reconnect_delay: float = 1.0,
+            max_reconnect_delay: float = 30.0,
+            pool_config: PoolConfig | None = None,
+    ):
+        self._client = client
+        self.cache = cache
+        self._fetch_open_orders = fetch_open_orders
+        self.ws_url = ws_url or self.WS_URL
+        self._reconcile_interval = reconcile_interval
+        self._ping_interval = ping_interval
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._pool_config = pool_config
+
+        self._http: aiohttp.ClientSession | None = None
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._stopped = False
+        self.message_count = 0
+        self.reconnect_count = 0
+
+    @property
+    def name(self) -> str:
+        return self.exchange if self.instrument_type is None else f'{self.exchange}-{self.instrument_type}'
+
+    async def connect_url(self) -> str:
+        return self.ws_url
+
+    def connect_headers(self) -> dict[str, str] | None:
+        return None
+
+    async def on_open(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        """ 인증과 구독 """
+        raise NotImplementedError
+
+    def handle(self, message: Any) -> None:
+        raise NotImplementedError
+
+    def background_tasks(self) -> list:
+        """ 연결되어 있는 동안 함께 실행할 coroutine (ex. listenKey 연장) """
+        return []
+
+    async def send(self, message: str | dict | list) -> None:
+        await self._ws.send_str(message if isinstance(message, str) else serialization.dumps_str(message))
+
+    async def receive_json(self, ws: aiohttp.ClientWebSocketResponse, timeout: float = 10) -> Any:
+        msg = await ws.receive(timeout)
+        if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+            raise ConnectionError(f'{self.name} 인증 중 연결이 끊어졌습니다. ({msg.type!r})')
+        return serialization.loads(msg.data)
+
+    async def reconcile(self) -> int:
+        """ REST로 미체결 주문을 조회해서 cache를 맞춤 """
+        started_at = time.monotonic()
+        orders = await asyncio.get_running_loop().run_in_executor(None, self._fetch_open_orders)
+        if self.instrument_type is not None:
+            orders = [o for o in orders if o.get('instrument_type') == self.instrument_type]
+        drift = self.cache.reconcile(self.exchange, orders, started_at, self.instrument_type)
+        if drift:
+            logger.warning(f'{self.name} 미체결 주문 {drift}개를 REST 조회 결과로 보정했습니다.')
+        return drift
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def run(self) -> None:
+        self._http = create_async_session(self._pool_config)
+        delay = self._reconnect_delay
+        try:
+            while not self._stopped:
+                try:
+                    # 인증 메시지의 timestamp가 loop 안에서 처음 동기화를 기다리지 않도록 연결 전에 맞춤
+                    clock = getattr(self._client, 'clock', None)
+                    if clock is not None:
+                        await clock.wait_synced()
+                    url = await self.connect_url()
+                    async with self._http.ws_connect(
+                            url, headers=self.connect_headers(), heartbeat=self._ping_interval, max_msg_size=0
+                    ) as ws:
+                        self._ws = ws
+                        await self.on_open(ws)
+                        # 구독한 뒤에 조회해야 그 사이에 바뀐 주문을 놓치지 않음
+                        await self.reconcile()
+                        self.cache.set_stream_state(self.exchange, self.name, True)
+                        delay = self._reconnect_delay
+                        await self._read(ws)
+                except Exception as e:
+                    # 인증 실패, REST 조회 실패 등도 다시 연결해서 재시도
+                    logger.warning(f'{self.name} private stream 연결이 끊어졌습니다. ({e!r})')
+                finally:
+                    self._ws = None
+                    self.cache.set_stream_state(self.exchange, self.name, False)
+
+                if self._stopped:
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_reconnect_delay)
+                self.reconnect_count += 1
+        finally:
+            await self._http.close()
+
+    async def _ping(self) -> None:
+        while True:
+            await asyncio.sleep(self._ping_interval)
+            await self.send(self.PING_MESSAGE)
+
+    async def _reconcile_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning(f'{self.name} 미체결 주문 보정에 실패했습니다. ({e!r})')
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        tasks = [asyncio.create_task(self._reconcile_periodically())]
+        if self.PING_MESSAGE is not None:
+            tasks.append(asyncio.create_task(self._ping()))
+        tasks.extend(asyncio.create_task(coro) for coro in self.background_tasks())
+        try:
+            async for msg in ws:
+                if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    break
+                try:
+                    message = serialization.loads(msg.data)
+                except ValueError:
+                    # ex. OKX의 'pong'
+                    continue
+                self.message_count += 1
+                self.handle(message)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def _fill(exchange: str, instrument_type: str, symbol: str, order_id, trade_id, side: str, price, qty, timestamp) -> dict:
+    return {
+        'exchange': exchange,
+        'instrument_type': instrument_type,
+        'symbol': symbol,
+        'order_id': str(order_id),
+        'trade_id': str(trade_id),
+        'side': 'buy' if side.lower() in ('buy', 'bid') else 'sell',
+        'price': Decimal(str(price)),
+        'qty': Decimal(str(qty)),
+        'timestamp': int(timestamp),
+    }
+
+
+class BinanceUserStream(UserStream):
+    """ Binance user data stream (listenKey), 선물/현물 stream을 따로 연결
+
+        listenKey는 60분 동안 연장하지 않으면 만료되므로 30분마다 연장
+    """
+    exchange = 'bnc'
+    LISTEN_KEY_ENDPOINTS = {'perp': '/fapi/v1/listenKey', 'spot': '/api/v3/userDataStream'}
+    WS_URLS = {'perp': 'wss://fstream.binance.com/ws/', 'spot': 'wss://stream.binance.com:9443/ws/'}
+    OPEN_STATUSES = ('NEW', 'PARTIALLY_FILLED')
+    KEEPALIVE_INTERVAL = 30 * 60
+
+    def __init__(self, client, cache: OpenOrderCache, fetch_open_orders: Callable[[], list[dict]],
+                 instrument_type: str = 'perp', **kwargs):
+        self.instrument_type = instrument_type
+        kwargs.setdefault('ws_url', self.WS_URLS[instrument_type])
+        super().__init__(client, cache, fetch_open_orders, **kwargs)
+        self._listen_key: str | None = None
+
+    def _listen_key_request(self, method: str) -> dict:
+        params = {'listenKey': self._listen_key} if method != 'post' and self.instrument_type == 'spot' else None
+        return self._client.request(
+            method=method,
+            endpoint=self.LISTEN_KEY_ENDPOINTS[self.instrument_type],
+            params=params,
+            require_api_key=True,
+        ).json()
+
+    async def connect_url(self) -> str:
+        res = await asyncio.get_running_loop().run_in_executor(None, self._listen_key_request, 'post')
+        self._listen_key = res['listenKey']
+        return self.ws_url + self._listen_key
+
+    async def on_open(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        # listenKey로 연결하면 별도의 인증/구독이 필요 없음
+        pass
+
+    def background_tasks(self) -> list:
+        return [self._keepalive()]
+
+    async def _keepalive(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.KEEPALIVE_INTERVAL)
+            try:
+                await loop.run_in_executor(None, self._listen_key_request, 'put')
+            except Exception as e:
+                logger.warning(f'{self.name} listenKey 연장에 실패했습니다. ({e!r})')
+
+    def handle(self, message: Any) -> None:
+        event = message.get('e')
+        if event == 'listenKeyExpired':
+            # 다시 연결하면서 새 listenKey를 받음
+            asyncio.get_running_loop().create_task(self._ws.close())
+            return
+        if event == 'ORDER_TRADE_UPDATE':
+            o = message['o']
+        elif event == 'executionReport':
+            o = message
+        else:
+            return
+
+        order = {
+            'symbol': o['s'],
+            'orderId': o['i'],
+            'clientOrderId': o['c'],
+            'side': o['S'],
+            'type': o['o'],
+            'timeInForce': o['f'],
+            'price': o['p'],
+            'origQty': o['q'],
+            'executedQty': o['z'],
+            'status': o['X'],
+            'instrument_type': self.instrument_type,
+        }
+        self.cache.update(self.exchange, order, o['X'] in self.OPEN_STATUSES)
+        if o['x'] == 'TRADE':
+            self.cache.add_fill(self.exchange, _fill(
+                self.exchange, self.instrument_type, o['s'], o['i'], o['t'], o['S'], o['L'], o['l'], o['T'],
+            ))
+
+
+class BybitUserStream(UserStream):
+    """ Bybit v5 private stream (order, execution topic) """
+    exchange = 'byb'
+    WS_URL = 'wss://stream.bybit.com/v5/private'
+    PING_MESSAGE = {'op': 'ping'}
+    OPEN_STATUSES = ('New', 'PartiallyFilled', 'Untriggered')
+    # REST 조회와 같이 linear(perp), spot 주문만 cache에 둠
+    INSTRUMENT_TYPES = {'linear': 'perp', 'spot': 'spot'}
+
+    async def on_open(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        await self.send(self._client.ws_auth_message())
+        while True:
+            res = await self.receive_json(ws)
+            if res.get('op') == 'auth':
+                break
+        if not res.get('success'):
+            raise ConnectionError(f'{self.name} 인증에 실패했습니다. ({res.get("ret_msg")})')
+        await self.send({'op': 'subscribe', 'args': ['order', 'execution']})
+
+    def handle(self, message: Any) -> None:
+        topic = message.get('topic')
+        if topic == 'order':
+            for o in message['data']:
+                instrument_type = self.INSTRUMENT_TYPES.get(o.get('category'))
+                if instrument_type is None:
+                    continue
+                order = dict(o, instrument_type=instrument_type)
+                self.cache.update(self.exchange, order, o['orderStatus'] in self.OPEN_STATUSES)
+        elif topic == 'execution':
+            for e in message['data']:
+                instrument_type = self.INSTRUMENT_TYPES.get(e.get('category'))
+                if instrument_type is None or e.get('execType', 'Trade') != 'Trade':
+                    continue
+                self.cache.add_fill(self.exchange, _fill(
+                    self.exchange, instrument_type, e['symbol'], e['orderId'], e['execId'], e['side'],
+                    e['execPrice'], e['execQty'], e['execTime'],
+                ))
+
+
+class OkxUserStream(UserStream):
+    """ OKX private orders channel (모든 상품) """
+    exchange = 'okx'
+    WS_URL = 'wss://ws.okx.com:8443/ws/v5/private'
+    DEMO_WS_URL = 'wss://wspap.okx.com:8443/ws/v5/private'
+    PING_MESSAGE = 'ping'
+    OPEN_STATES = ('live', 'partially_filled')
+
+    def __init__(self, client, cache: OpenOrderCache, fetch_open_orders: Callable[[], list[dict]], **kwargs):
+        if getattr(client, 'is_demo', False):
+            kwargs.setdefault('ws_url', self.DEMO_WS_URL)
+        super().__init__(client, cache, fetch_open_orders, **kwargs)
+
+    async def on_open(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        await self.send(self._client.ws_login_message())
+        while True:
+            res = await self.receive_json(ws)
+            if res.get('event') in ('login', 'error'):
+                break
+        if res.get('event') != 'login' or res.get('code') != '0':
+            raise ConnectionError(f'{self.name} login에 실패했습니다. ({res.get("msg")})')
+        await self.send({'op': 'subscribe', 'args': [{'channel': 'orders', 'instType': 'ANY'}]})
+
+    def handle(self, message: Any) -> None:
+        if message.get('arg', {}).get('channel') != 'orders' or 'data' not in message:
+            return
+        for o in message['data']:
+            instrument_type = 'perp' if o.get('instType') == 'SWAP' else 'spot'
+            order = dict(o, instrument_type=instrument_type)
+            self.cache.update(self.exchange, order, o['state'] in self.OPEN_STATES)
+            if o.get('tradeId') and o.get('fillSz') not in (None, '', '0'):
+                self.cache.add_fill(self.exchange, _fill(
+                    self.exchange, instrument_type, o['instId'], o['ordId'], o['tradeId'], o['side'],
+                    o['fillPx'], o['fillSz'], o['fillTime'],
+                ))
+
+
+def _str_or_none(v) -> str | None:
+    # REST 응답과 같이 숫자는 문자열로 보관 (시장가 주문의 price 등은 null)
+    return None if v is None else str(v)
+
+
+class UpbitUserStream(UserStream):
+    """ Upbit myOrder
+
+        state가 trade인 메시지의 price, volume은 체결 가격, 체결 수량이므로 주문 가격/수량은 cache에 있던 값을 유지
+    """
+    exchange = 'upt'
+    WS_URL = 'wss://api.upbit.com/websocket/v1/private'
+    instrument_type = None
+
+    def connect_headers(self) -> dict[str, str] | None:
+        return self._client.ws_auth_headers()
+
+    async def on_open(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        await self.send([{'ticket': os.urandom(8).hex()}, {'type': 'myOrder'}])
+
+    def handle(self, message: Any) -> None:
+        if message.get('type') != 'myOrder':
+            return
+        state = message['state']
+        order = self.cache.get(self.exchange, message['uuid']) or {
+            'uuid': message['uuid'],
+            'market': message['code'],
+            'side': message['ask_bid'].lower(),
+            'ord_type': message['order_type'],
+            'price': _str_or_none(message.get('price')),
+            'volume': _str_or_none(message.get('volume')),
+            'instrument_type': 'spot',
+        }
+        order['remaining_volume'] = _str_or_none(message.get('remaining_volume'))
+        order['executed_volume'] = _str_or_none(message.get('executed_volume'))
+
+        if state == 'trade':
+            order['state'] = 'wait'
+            self.cache.add_fill(self.exchange, _fill(
+                self.exchange, 'spot', message['code'], message['uuid'], message['trade_uuid'], message['ask_bid'],
+                message['price'], message['volume'], message['trade_timestamp'],
+            ))
+            is_open = Decimal(order['remaining_volume'] or 0) > 0
+        else:
+            order['state'] = state
+            is_open = state in ('wait', 'watch')
+        self.cache.update(self.exchange, order, is_open)
+
+
+class UserStreamGroup:
+    """ 여러 `UserStream`을 background loop thread에서 실행 (동기 코드에서 시작/종료) """
+    def __init__(self, streams: list[UserStream], loop: BackgroundLoop | None = None):
+        self.streams = streams
+        self._loop = loop or BackgroundLoop('user-stream')
+        self._futures = []
+
+    def start(self) -> 'UserStreamGroup':
+        self._futures = [self._loop.submit(stream.run()) for stream in self.streams]
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        for stream in self.streams:
+            self._loop.run(stream.stop(), timeout)
+        self._loop.stop(timeout)
+
+    def status(self) -> dict[str, dict]:
+        return {
+            stream.name: {
+                'ready': stream.cache.ready(stream.exchange),
+                'messages': stream.message_count,
+                'reconnects': stream.reconnect_count,
+                'drift': stream.cache.drift.get(stream.exchange, 0),
+            }
+            for stream in self.streams
+        }
@@ -1,12 +1,12 @@
-import hashlib
-import hmac
-import time
 from typing import Any
 from urllib.parse import urlencode
 
-import aiohttp
 import requests
 
+from .clock import ClockSync
+from .session import PoolConfig, SessionMixin
+from .signer import HmacSigner
+
 try:
     from util import logger
 except ModuleNotFoundError:
@@ -15,15 +15,29 @@ except ModuleNotFoundError:
     logger = logging.getLogger(__name__)
 
 
-class ApiClient:
+class ApiClient(SessionMixin):
+    SERVER_TIME_ENDPOINT = '/openapi/v1/time'
+
     def __init__(
             self,
             key_pair: tuple[str, str],
-            base_url: str = 'https://api.adenasoft.link'
+            base_url: str = 'https://api.adenasoft.link',
+            pool_config: PoolConfig | None = None,
     ):
         self._api_key = key_pair[0]
         self._secret_key = key_pair[1]
+        self._signer = HmacSigner(self._secret_key)
         self._base_url = base_url
+        self._init_sessions(pool_config)
+        self._clock = ClockSync(self._fetch_server_time_ms)
+
+    @property
+    def clock(self) -> ClockSync:
+        return self._clock
+
+    def _fetch_server_time_ms(self) -> int:
+        res = self._session.get(self._base_url + self.SERVER_TIME_ENDPOINT, timeout=1)
+        return int(res.json()['serverTime'])
 
     def get(
             self,
@@ -85,19 +99,18 @@ class ApiClient:
         if require_api_key:
             headers['X-BH-APIKEY'] = self._api_key
 
+        url = self._base_url + endpoint
         if require_signature:
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             params['recvWindow'] = 5000
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
 
-        return requests.request(
+        return self._session.request(
             method=method,
-            url=self._base_url + endpoint,
+            url=url,
             headers=headers,
             params=params,
         )
@@ -122,19 +135,18 @@ class ApiClient:
         if require_api_key:
             headers['X-BH-APIKEY'] = self._api_key
 
+        url = self._base_url + endpoint
         if require_signature:
-            params['timestamp'] = int(time.time() * 1000)
+            params['timestamp'] = self._clock.now_ms()
             params['recvWindow'] = 5000
             query_string = urlencode(params)
-            params['signature'] = hmac.new(
-                self._secret_key.encode(),
-                msg=query_string.encode(),
-                digestmod=hashlib.sha256
-            ).hexdigest()
+            # 서명한 query string을 그대로 URL에 붙여서 다시 encoding하지 않도록 함
+            url += '?' + query_string + '&signature=' + self._signer.hexdigest(query_string)
+            params = {}
 
-        async with aiohttp.request(
+        async with self._get_async_session().request(
                 method=method,
-                url=self._base_url + endpoint,
+                url=url,
                 headers=headers,
                 params={k: str(params[k]) for k in params},
         ) as res:
@@ -146,5 +158,6 @@ class WiseApiClient(ApiClient):
     def __init__(
             self,
             key_pair: tuple[str, str],
+            pool_config: PoolConfig | None = None,
     ):
-        super().__init__(key_pair, 'https://api.wisebitcoin.exchange')
+        super().__init__(key_pair, 'https://api.wisebitcoin.exchange', pool_config)
@@ -0,0 +1,313 @@
+import asyncio
+import itertools
+import threading
+from typing import Any
+
+import aiohttp
+
+from . import serialization
+from .background import BackgroundLoop
+from .session import PoolConfig, create_async_session
+
+try:
+    from util import logger
+except ModuleNotFoundError:
+    import logging
+
+    logger = logging.getLogger(__name__)
+
+
+class WsUnavailable(ConnectionError):
+    """ 연결(인증)되어 있지 않아서 요청을 보내지 못한 경우 (REST로 다시 보내도 안전) """
+
+
+class WsResponseLost(ConnectionError):
+    """ 요청을 보낸 뒤 응답을 받기 전에 연결이 끊어지거나 시간이 초과된 경우
+
+        주문이 접수되었을 수 있으므로 REST로 다시 보내지 말고 미체결 주문을 조회해서 확인해야 함
+    """
+
+
+class OrderSession:
+    """ 인증된 WebSocket 하나로 주문/정정/취소를 보내고, 응답은 요청 id로 찾아서 반환
+
+        - background loop thread에서 연결을 유지하고, 끊기면 두 배씩 늘어나는 간격으로 다시 연결
+        - 동기 코드에서는 `call`, asyncio 코드에서는 `request`를 사용
+        - 응답은 같은 요청을 REST로 보냈을 때의 응답 형식으로 변환해서 반환
+
+        subclass가 URL, 인증, 요청/응답 형식을 정의
+    """
+    exchange: str
+    WS_URL: str
+    # WebSocket ping frame 외에 거래소가 요구하는 application level ping (없으면 None)
+    PING_MESSAGE: str | dict | None = None
+    # 'place', 'amend', 'cancel' -> 거래소의 WebSocket method/op 이름
+    OPS: dict[str, str]
+
+    def __init__(
+            self,
+            client,
+            ws_url: str | None = None,
+            loop: BackgroundLoop | None = None,
+            timeout: float = 5.0,
+            ping_interval: float = 20,
+            reconnect_delay: float = 1.0,
+            max_reconnect_delay: float = 30.0,
+            pool_config: PoolConfig | None = None,
+    ):
+        self._client = client
+        self.ws_url = ws_url or self.WS_URL
+        # loop를 받지 않았으면 session 전용 loop를 만들고 stop할 때 같이 멈춤
+        self._owns_loop = loop is None
+        self._loop = loop or BackgroundLoop(f'{self.exchange}-order-session')
+        self._timeout = timeout
+        self._ping_interval = ping_interval
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._pool_config = pool_config
+
+        self._ids = itertools.count(1)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._connected = threading.Event()
+        self._stopped = False
+        self._future = None
+        self.reconnect_count = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def build_request(self, request_id: str, action: str, params: dict) -> dict:
+        raise NotImplementedError
+
+    def response_id(self, message: dict) -> str | None:
+        raise NotImplementedError
+
+    def parse_response(self, message: dict) -> Any:
+        raise NotImplementedError
+
+    async def authenticate(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        pass
+
+    def start(self) -> 'OrderSession':
+        if self._future is None:
+            self._future = self._loop.submit(self.run())
+        return self
+
+    def wait_connected(self, timeout: float | None = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._future is not None:
+            self._loop.run(self._stop(), timeout)
+            try:
+                self._future.result(timeout)
+            except Exception:
+                pass
+            self._future = None
+        if self._owns_loop:
+            self._loop.stop(timeout)
+
+    async def _stop(self) -> None:
+        self._stopped = True
+        if self._ws is not None:
+            await self._ws.close()
+
+    def call(self, action: str, params: dict, timeout: float | None = None) -> Any:
+        """ 동기 코드에서 요청을 보내고 응답을 기다림 """
+        # 연결되어 있지 않으면 loop로 넘어가지 않고 바로 실패시켜서 REST로 보내도록 함
+        if not self._connected.is_set():
+            raise WsUnavailable(f'{self.exchange} 주문 WebSocket이 연결되어 있지 않습니다.')
+        return self._loop.run(self.request(action, params, timeout))
+
+    async def request(self, action: str, params: dict, timeout: float | None = None) -> Any:
+        ws = self._ws
+        if ws is None or not self._connected.is_set():
+            raise WsUnavailable(f'{self.exchange} 주문 WebSocket이 연결되어 있지 않습니다.')
+
+        request_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            try:
+                await ws.send_str(serialization.dumps_str(self.build_request(request_id, action, params)))
+            except (aiohttp.ClientError, ConnectionError, RuntimeError) as e:
+                raise WsUnavailable(f'{self.exchange} 요청을 보내지 못했습니다. ({e!r})') from e
+
+            try:
+                message = await asyncio.wait_for(future, timeout or self._timeout)
+            except asyncio.TimeoutError:
+                raise WsResponseLost(f'{self.exchange} 응답 시간이 초과되었습니다. (id={request_id})')
+        finally:
+            self._pending.pop(request_id, None)
+
+        return self.parse_response(message)
+
+    async def run(self) -> None:
+        http = create_async_session(self._pool_config)
+        delay = self._reconnect_delay
+        try:
+            while not self._stopped:
+                try:
+                    # 서명에 쓰는 timestamp가 loop 안에서 처음 동기화를 기다리지 않도록 연결 전에 맞춤
+                    clock = getattr(self._client, 'clock', None)
+                    if clock is not None:
+                        await clock.wait_synced()
+                    async with http.ws_connect(self.ws_url, heartbeat=self._ping_interval, max_msg_size=0) as ws:
+                        self._ws = ws
+                        await self.authenticate(ws)
+                        self._connected.set()
+                        delay = self._reconnect_delay
+                        await self._read(ws)
+                except Exception as e:
+                    logger.warning(f'{self.exchange} 주문 WebSocket 연결이 끊어졌습니다. ({e!r})')
+                finally:
+                    self._connected.clear()
+                    self._ws = None
+                    # 응답을 기다리던 요청은 접수 여부를 알 수 없음
+                    for request_id, future in list(self._pending.items()):
+                        if not future.done():
+                            future.set_exception(WsResponseLost(f'{self.exchange} 응답 전에 연결이 끊어졌습니다. (id={request_id})'))
+
+                if self._stopped:
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_reconnect_delay)
+                self.reconnect_count += 1
+        finally:
+            await http.close()
+
+    async def _ping(self) -> None:
+        while True:
+            await asyncio.sleep(self._ping_interval)
+            message = self.PING_MESSAGE
+            await self._ws.send_str(message if isinstance(message, str) else serialization.dumps_str(message))
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        ping_task = asyncio.create_task(self._ping()) if self.PING_MESSAGE is not None else None
+        try:
+            async for msg in ws:
+                if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    break
+                try:
+                    message = serialization.loads(msg.data)
+                except ValueError:
+                    continue
+                future = self._pending.get(self.response_id(message))
+                if future is not None and not future.done():
+                    future.set_result(message)
+        finally:
+            if ping_task is not None:
+                ping_task.cancel()
+
+    async def receive_json(self, ws: aiohttp.ClientWebSocketResponse, timeout: float = 10) -> Any:
+        msg = await ws.receive(timeout)
+        if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+            raise ConnectionError(f'{self.exchange} 인증 중 연결이 끊어졌습니다. ({msg.type!r})')
+        return serialization.loads(msg.data)
+
+
+class BinanceOrderSession(OrderSession):
+    """ Binance WebSocket API (요청마다 HMAC 서명)
+
+        응답 : REST와 같이 성공하면 주문 정보, 실패하면 {'code': ..., 'msg': ...}
+    """
+    exchange = 'bnc'
+    WS_URLS = {'perp': 'wss://ws-fapi.binance.com/ws-fapi/v1', 'spot': 'wss://ws-api.binance.com:443/ws-api/v3'}
+    OPS = {'place': 'order.place', 'amend': 'order.modify', 'cancel': 'order.cancel'}
+
+    def __init__(self, client, instrument_type: str = 'perp', **kwargs):
+        kwargs.setdefault('ws_url', self.WS_URLS[instrument_type])
+        super().__init__(client, **kwargs)
+        self.instrument_type = instrument_type
+
+    def build_request(self, request_id: str, action: str, params: dict) -> dict:
+        return {'id': request_id, 'method': self.OPS[action], 'params': self._client.ws_signed_params(params)}
+
+    def response_id(self, message: dict) -> str | None:
+        return message.get('id')
+
+    def parse_response(self, message: dict) -> Any:
+        if 'error' in message:
+            return message['error']
+        return message.get('result')
+
+
+class BybitOrderSession(OrderSession):
+    """ Bybit v5 trade WebSocket (연결 후 한 번 인증)
+
+        응답 : REST와 같이 {'retCode': ..., 'retMsg': ..., 'result': ..., 'retExtInfo': ..., 'time': ...}
+    """
+    exchange = 'byb'
+    WS_URL = 'wss://stream.bybit.com/v5/trade'
+    PING_MESSAGE = {'op': 'ping'}
+    OPS = {'place': 'order.create', 'amend': 'order.amend', 'cancel': 'order.cancel'}
+    RECV_WINDOW = 5000
+
+    async def authenticate(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        await ws.send_str(serialization.dumps_str(self._client.ws_auth_message()))
+        while True:
+            res = await self.receive_json(ws)
+            if res.get('op') == 'auth':
+                break
+        if res.get('retCode', 0 if res.get('success') else -1) != 0:
+            raise ConnectionError(f'{self.exchange} 인증에 실패했습니다. ({res.get("retMsg")})')
+
+    def build_request(self, request_id: str, action: str, params: dict) -> dict:
+        return {
+            'reqId': request_id,
+            'header': {
+                'X-BAPI-TIMESTAMP': str(self._client.clock.now_ms()),
+                'X-BAPI-RECV-WINDOW': str(self.RECV_WINDOW),
+            },
+            'op': self.OPS[action],
+            'args': [params],
+        }
+
+    def response_id(self, message: dict) -> str | None:
+        return message.get('reqId')
+
+    def parse_response(self, message: dict) -> Any:
+        return {
+            'retCode': message.get('retCode'),
+            'retMsg': message.get('retMsg'),
+            'result': message.get('data'),
+            'retExtInfo': message.get('retExtInfo', {}),
+            'time': (message.get('header') or {}).get('Timenow'),
+        }
+
+
+class OkxOrderSession(OrderSession):
+    """ OKX private WebSocket (연결 후 login, spot/perp 모두 같은 연결 사용)
+
+        응답 : REST와 같이 {'code': ..., 'msg': ..., 'data': [{'ordId': ..., 'sCode': ..., 'sMsg': ...}]}
+    """
+    exchange = 'okx'
+    WS_URL = 'wss://ws.okx.com:8443/ws/v5/private'
+    DEMO_WS_URL = 'wss://wspap.okx.com:8443/ws/v5/private'
+    PING_MESSAGE = 'ping'
+    OPS = {'place': 'order', 'amend': 'amend-order', 'cancel': 'cancel-order'}
+
+    def __init__(self, client, **kwargs):
+        if getattr(client, 'is_demo', False):
+            kwargs.setdefault('ws_url', self.DEMO_WS_URL)
+        super().__init__(client, **kwargs)
+
+    async def authenticate(self, ws: aiohttp.ClientWebSocketResponse) -> None:
+        await ws.send_str(serialization.dumps_str(self._client.ws_login_message()))
+        while True:
+            res = await self.receive_json(ws)
+            if res.get('event') in ('login', 'error'):
+                break
+        if res.get('event') != 'login' or res.get('code') != '0':
+            raise ConnectionError(f'{self.exchange} login에 실패했습니다. ({res.get("msg")})')
+
+    def build_request(self, request_id: str, action: str, params: dict) -> dict:
+        return {'id': request_id, 'op': self.OPS[action], 'args': [{k: str(v) for k, v in params.items()}]}
+
+    def response_id(self, message: dict) -> str | None:
+        return message.get('id')
+
+    def parse_response(self, message: dict) -> Any:
+        return {'code': message.get('code'), 'msg': message.get('msg'), 'data': message.get('data', [])}
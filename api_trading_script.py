@@ -1,20 +1,134 @@
-import pandas as pd
 import datetime
-from api import get_api_key_pair, binance, bybit, okx, upbit
+import os
+from api_quant import get_api_key_pair, instruments
+from api_quant.lazy import LazyClient
+from api_quant.ordercache import OpenOrderCache
+from api_quant.orders import Order, parse_order, parse_orders
 from pprint import pprint
 from collections import defaultdict
 from decimal import Decimal
 from typing import Literal
 import re
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 
-# bnc_futures = binance.FuturesTestnetApiClient(get_api_key_pair('binance_testnet'))
-bnc_futures = binance.FuturesApiClient(get_api_key_pair('binance'))
-bnc_spot = binance.SpotApiClient(get_api_key_pair('binance'))
-#byb = bybit.TestnetApiClient(get_api_key_pair('bybit_testnet'))
-byb = bybit.ApiClient(get_api_key_pair('bybit'))
-# okx = okx.ApiClient(get_api_key_pair('okx_testnet'), 'Shinhan@1',is_demo=True)
-okx = okx.ApiClient(get_api_key_pair('okx'), 'Shinhan@1', is_demo=False)
-upt = upbit.ApiClient(get_api_key_pair('upbit'))
+
+# 모든 거래소 요청을 보낼 base URL (benchmarks/mock_exchange.py 같은 로컬 서버로 보낼 때), 없으면 거래소 기본 URL
+BASE_URL = os.environ.get('API_BASE_URL')
+
+
+def _base_url_option() -> dict:
+    return {'base_url': BASE_URL} if BASE_URL else {}
+
+
+# client는 처음 요청할 때 생성 (거래소 module import와 key 읽기도 그때 함)
+# 한 거래소만 주문하는 script는 나머지 거래소의 client를 만들지 않음
+def _create_bnc_futures():
+    from api_quant import binance
+    # return binance.FuturesTestnetApiClient(get_api_key_pair('binance_testnet'))
+    return binance.FuturesApiClient(get_api_key_pair('binance'), **_base_url_option())
+
+
+def _create_bnc_spot():
+    from api_quant import binance
+    return binance.SpotApiClient(get_api_key_pair('binance'), **_base_url_option())
+
+
+def _create_byb():
+    from api_quant import bybit
+    # return bybit.TestnetApiClient(get_api_key_pair('bybit_testnet'))
+    return bybit.ApiClient(get_api_key_pair('bybit'), **_base_url_option())
+
+
+def _create_okx():
+    from api_quant import okx
+    # return okx.ApiClient(get_api_key_pair('okx_testnet'), 'Shinhan@1',is_demo=True)
+    return okx.ApiClient(get_api_key_pair('okx'), 'Shinhan@1', is_demo=False, **_base_url_option())
+
+
+def _create_upt():
+    from api_quant import upbit
+    return upbit.ApiClient(get_api_key_pair('upbit'), **_base_url_option())
+
+
+bnc_futures = LazyClient(_create_bnc_futures)
+bnc_spot = LazyClient(_create_bnc_spot)
+byb = LazyClient(_create_byb)
+okx = LazyClient(_create_okx)
+upt = LazyClient(_create_upt)
+
+
+def use_clients(**clients) -> None:
+    """ 거래소 client를 이미 만든 client로 바꿈 (mock server, testnet 등)
+
+        key는 bnc_futures, bnc_spot, byb, okx, upt
+        use_clients(**mock.clients())   # benchmarks/mock_exchange.py
+    """
+    lazy_clients = {'bnc_futures': bnc_futures, 'bnc_spot': bnc_spot, 'byb': byb, 'okx': okx, 'upt': upt}
+    for name, client in clients.items():
+        if name not in lazy_clients:
+            raise ValueError(f'알 수 없는 client입니다. ({name})')
+        lazy_clients[name].set(client)
+
+# 종목 정보(contract value, tick size 등)는 주문마다 조회하지 않고 메모리에서 응답
+instrument_registry = instruments.InstrumentRegistry(
+    loaders={
+        'bnc': lambda: instruments.load_binance(bnc_spot, bnc_futures),
+        'byb': lambda: instruments.load_bybit(byb),
+        'okx': lambda: instruments.load_okx(okx),
+        'upt': lambda: instruments.load_upbit(upt),
+    },
+    snapshot_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'settings/instruments.json'),
+)
+
+EXCHANGES = ('bnc', 'byb', 'okx', 'upt')
+
+# spot/perp 조회, bulk 취소 endpoint가 없는 거래소의 취소 등 여러 요청을 동시에 보낼 때 공유하는 thread pool
+# (이 pool 안에서 다시 이 pool에 작업을 넣고 기다리지 않도록 주의)
+CONCURRENCY = 8
+executor = ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix='api')
+
+# private stream(`start_user_streams`)으로 갱신하는 미체결 주문 cache
+# stream이 연결되어 있는 거래소는 미체결 주문 조회와 취소 전 조회를 REST 대신 cache로 처리
+order_cache = OpenOrderCache()
+user_streams = None
+
+# WebSocket 주문 session (`start_ws_order_entry`), (exchange, instrument_type) -> session
+# session이 연결되어 있으면 주문/정정/취소를 WebSocket으로 보내고, 연결이 끊겨 있으면 REST로 보냄
+ws_order_sessions: dict = {}
+ws_order_loop = None
+
+# 거래소 별 batch 취소 endpoint가 한 번에 받는 최대 주문 수
+BINANCE_BATCH_CANCEL_SIZE = 10
+OKX_BATCH_CANCEL_SIZE = 20
+
+
+def tag_instrument_type(orders: list[dict], instrument_type: str) -> list[dict]:
+    for order in orders:
+        order['instrument_type'] = instrument_type
+    return orders
+
+
+@dataclass
+class CancelReport:
+    """ 거래소 하나의 취소 결과
+        `elapsed_ms` : 미체결 주문 조회부터 모든 취소 요청이 끝날 때까지 걸린 시간
+        `requests`   : 보낸 취소 요청 수 (bulk endpoint를 쓰면 취소한 주문 수보다 적음)
+        `responses`  : 취소 요청 별 응답
+        `attempts`   : 취소를 시도한 횟수 (kill switch에서 남은 주문을 다시 취소한 경우 2 이상)
+        `remaining`  : 취소 후 다시 조회한 미체결 주문 수 (조회하지 않았으면 None)
+        `error`      : 실패하거나 제한 시간을 넘긴 경우 그 사유
+    """
+    exchange: str
+    elapsed_ms: float
+    requests: int
+    responses: list = field(default_factory=list)
+    attempts: int = 1
+    remaining: int | None = None
+    error: str | None = None
 
 
 def place_order(
@@ -102,68 +216,707 @@ def place_order(
     return result
 
 
+# 거래소 별 batch 주문 endpoint가 한 번에 받는 최대 주문 수
+BINANCE_BATCH_ORDER_SIZE = 5
+BYBIT_BATCH_ORDER_SIZE = 10
+OKX_BATCH_ORDER_SIZE = 20
+
+
+def place_orders(orders: list[dict]) -> list:
+    """ 여러 주문을 거래소/상품 별로 묶어서 batch endpoint로 제출하고, 입력 순서대로 주문 별 결과를 반환
+
+        `orders`의 각 원소는 `place_order`의 인자와 같은 key를 가진 dict
+        batch endpoint가 없는 Binance spot, Upbit은 한 건씩 순서대로 제출
+        모든 주문의 요청 params를 먼저 만들어서, 잘못된 주문이 하나라도 있으면 아무것도 제출하지 않고 ValueError
+        요청 하나(batch 한 묶음 또는 한 건)가 실패하면 그 요청에 들어 있던 주문의 결과 자리에 예외를 넣고 나머지 요청은 계속 제출
+    """
+    results: list = [None] * len(orders)
+
+    params: list[dict] = []
+    for i, order in enumerate(orders):
+        try:
+            params.append(_order_params(order['exchange'], order['instrument_type'])(*_order_args(order)))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f'orders[{i}]: {e}') from e
+
+    groups: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for i, order in enumerate(orders):
+        groups[(order['exchange'], order['instrument_type'])].append(i)
+
+    # OKX batch 주문은 spot과 perp를 한 요청에 섞을 수 있음
+    okx_indices = groups.pop(('okx', 'perp'), []) + groups.pop(('okx', 'spot'), [])
+    if okx_indices:
+        place_orders_okx(params, okx_indices, results)
+
+    for (exchange, instrument_type), indices in groups.items():
+        if exchange == 'bnc' and instrument_type == 'perp':
+            place_orders_binance_perpetual(params, indices, results)
+        elif exchange == 'byb':
+            place_orders_bybit(params, indices, results)
+        else:
+            for i in indices:
+                try:
+                    results[i] = _submit_order(exchange, instrument_type, params[i])
+                except Exception as e:
+                    results[i] = e
+
+    return results
+
+
+def _order_args(order: dict) -> tuple:
+    return (
+        order['base_asset'],
+        order['quote_asset'],
+        order['side'],
+        order['qty'],
+        order['order_type'],
+        order.get('price'),
+    )
+
+
+def _order_params(exchange: str, instrument_type: str):
+    """ (exchange, instrument_type)의 주문 params를 만드는 함수 """
+    order_params = {
+        ('bnc', 'perp'): order_params_binance,
+        ('bnc', 'spot'): order_params_binance,
+        ('byb', 'perp'): order_params_bybit_perpetual,
+        ('byb', 'spot'): order_params_bybit_spot,
+        ('okx', 'perp'): order_params_okx_perpetual,
+        ('okx', 'spot'): order_params_okx_spot,
+        ('upt', 'spot'): order_params_upbit_spot,
+    }.get((exchange, instrument_type))
+    if order_params is None:
+        raise ValueError(f'{exchange} {instrument_type} 주문은 지원하지 않습니다.')
+    return order_params
+
+
+def _submit_order(exchange: str, instrument_type: str, params: dict):
+    """ `_order_params`로 만든 params로 주문 한 건을 제출 """
+    if exchange == 'upt':
+        return upt.request(method='post', endpoint='/v1/orders', params=params).json()
+    return _order_request(exchange, instrument_type, 'place', params)
+
+
+def _fail_chunk(chunk: list[int], results: list, error: Exception) -> None:
+    for i in chunk:
+        results[i] = error
+
+
+def place_orders_binance_perpetual(params: list[dict], indices: list[int], results: list) -> None:
+    for start in range(0, len(indices), BINANCE_BATCH_ORDER_SIZE):
+        chunk = indices[start:start + BINANCE_BATCH_ORDER_SIZE]
+        batch = [params[i] for i in chunk]
+
+        try:
+            res = bnc_futures.request(
+                method='post',
+                endpoint='/fapi/v1/batchOrders',
+                params={'batchOrders': json.dumps(batch, separators=(',', ':'))},
+                require_signature=True
+            ).json()
+        except Exception as e:
+            _fail_chunk(chunk, results, e)
+            continue
+
+        # 주문 별 결과(성공한 주문 또는 오류)가 요청 순서대로 반환되고, 요청 자체가 실패하면 오류 하나만 반환됨
+        for j, i in enumerate(chunk):
+            results[i] = res[j] if isinstance(res, list) else res
+
+
+def place_orders_bybit(params: list[dict], indices: list[int], results: list) -> None:
+    for start in range(0, len(indices), BYBIT_BATCH_ORDER_SIZE):
+        chunk = indices[start:start + BYBIT_BATCH_ORDER_SIZE]
+        batch = []
+        for i in chunk:
+            order = dict(params[i])
+            category = order.pop('category')
+            batch.append(order)
+
+        try:
+            res = byb.request(
+                method='post',
+                endpoint='/v5/order/create-batch',
+                params={'category': category, 'request': batch},
+                require_signature=True
+            ).json()
+        except Exception as e:
+            _fail_chunk(chunk, results, e)
+            continue
+
+        # 주문 별 결과는 `result.list`에, 주문 별 성공 여부는 `retExtInfo.list`에 같은 순서로 반환됨
+        result_list = (res.get('result') or {}).get('list') or []
+        ext_list = (res.get('retExtInfo') or {}).get('list') or []
+        for j, i in enumerate(chunk):
+            if j < len(result_list) and j < len(ext_list):
+                results[i] = result_list[j] | ext_list[j]
+            else:
+                results[i] = res
+
+
+def place_orders_okx(params: list[dict], indices: list[int], results: list) -> None:
+    for start in range(0, len(indices), OKX_BATCH_ORDER_SIZE):
+        chunk = indices[start:start + OKX_BATCH_ORDER_SIZE]
+        batch = [params[i] for i in chunk]
+
+        try:
+            res = okx.request(
+                method='post',
+                endpoint='/api/v5/trade/batch-orders',
+                params=batch,
+                require_signature=True,
+            ).json()
+        except Exception as e:
+            _fail_chunk(chunk, results, e)
+            continue
+
+        # 주문 별 결과(sCode, sMsg 포함)가 요청 순서대로 `data`에 반환됨
+        data = res.get('data') or []
+        for j, i in enumerate(chunk):
+            results[i] = data[j] if j < len(data) else res
+
+
 def cancel_order(
         exchange: str,
         base_asset: str | None = None,
-        quote_asset: str | None = None
-):
+        quote_asset: str | None = None,
+        deadline_at: float | None = None,
+) -> CancelReport:
+    # `deadline_at`(time.perf_counter 기준)을 주면 각 요청의 HTTP timeout을 그때까지 남은 시간으로 제한
+    started = time.perf_counter()
+
     if exchange == 'bnc':
-        result = cancel_order_binance(
+        responses = cancel_order_binance(
             base_asset,
             quote_asset,
-
+            deadline_at=deadline_at,
         )
 
     if exchange == 'byb':
-        result = cancel_order_bybit(
+        responses = cancel_order_bybit(
             base_asset,
             quote_asset,
+            deadline_at=deadline_at,
         )
 
     if exchange == 'okx':
-        result = cancel_order_okx()
+        responses = cancel_order_okx(
+            base_asset,
+            quote_asset,
+            deadline_at=deadline_at,
+        )
 
     if exchange == 'upt':
-        result = cancel_order_upbit()
+        responses = cancel_order_upbit(deadline_at=deadline_at)
+
+    return CancelReport(
+        exchange=exchange,
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+        requests=len(responses),
+        responses=responses,
+    )
+
+
+# kill switch는 거래소 별 작업이 각자 `executor`에 취소 요청을 넣고 기다리므로, 별도의 pool에서 실행
+kill_switch_executor = ThreadPoolExecutor(max_workers=len(EXCHANGES), thread_name_prefix='kill-switch')
+
+
+def kill_switch(
+        deadline: float = 10.0,
+        retries: int = 2,
+) -> dict[str, CancelReport]:
+    """ 모든 거래소의 모든 미체결 주문을 동시에 취소
+
+        - 거래소 별로 가장 빠른 취소 방법(`cancel_order`의 bulk 취소)을 사용
+        - 취소 후 미체결 주문을 다시 조회해서 남은 주문이 있으면 `retries`번까지 다시 취소
+        - `deadline`초가 지나면 끝나지 않은 거래소는 기다리지 않고 error='timeout'으로 보고
+        - 각 요청의 HTTP timeout은 deadline까지 남은 시간으로 제한해서, 응답이 없는 요청이 worker를 deadline 뒤까지 붙잡지 않음
+    """
+    started = time.perf_counter()
+    deadline_at = started + deadline
+
+    futures = {
+        kill_switch_executor.submit(_kill_switch_exchange, exchange, deadline_at, retries): exchange
+        for exchange in EXCHANGES
+    }
+    done, not_done = wait(futures, timeout=deadline)
+
+    reports = {futures[future]: future.result() for future in done}
+    for future in not_done:
+        exchange = futures[future]
+        reports[exchange] = CancelReport(exchange=exchange, elapsed_ms=deadline * 1000, requests=0, error='timeout')
+
+    return {exchange: reports[exchange] for exchange in EXCHANGES}
+
+
+def _kill_switch_exchange(exchange: str, deadline_at: float, retries: int) -> CancelReport:
+    started = time.perf_counter()
+    report = CancelReport(exchange=exchange, elapsed_ms=0, requests=0, attempts=0)
+
+    try:
+        for _ in range(1 + retries):
+            cancel_report = cancel_order(exchange, deadline_at=deadline_at)
+            report.attempts += 1
+            report.requests += cancel_report.requests
+            report.responses.extend(cancel_report.responses)
+
+            # 취소 요청이 받아들여졌어도 주문이 남아 있을 수 있으므로 (새로 들어온 주문, 일부 실패 등) 다시 조회
+            # (cache는 취소 이벤트가 아직 도착하지 않았을 수 있으므로 REST로 조회)
+            if time.perf_counter() >= deadline_at:
+                break
+            report.remaining = len(query_open_order(exchange, use_cache=False, deadline_at=deadline_at))
+            if report.remaining == 0 or time.perf_counter() >= deadline_at:
+                break
+    except Exception as e:
+        report.error = repr(e)
+
+    report.elapsed_ms = (time.perf_counter() - started) * 1000
+    return report
+
+
+def start_user_streams(
+        exchanges: tuple[str, ...] = EXCHANGES,
+        reconcile_interval: float = 60.0,
+):
+    """ 거래소 별 private stream(주문/체결)을 background thread에서 시작해서 `order_cache`를 갱신
+
+        연결 직후와 `reconcile_interval`초마다 REST 미체결 주문 조회로 cache를 보정
+        연결이 끊긴 동안은 그 거래소의 조회/취소가 REST로 처리됨
+    """
+    global user_streams
+    if user_streams is not None:
+        return user_streams
+
+    from api_quant import userstream
+
+    options = {'reconcile_interval': reconcile_interval}
+    streams = []
+    if 'bnc' in exchanges:
+        streams += [
+            userstream.BinanceUserStream(bnc_futures.get(), order_cache, open_order_binance, 'perp', **options),
+            userstream.BinanceUserStream(bnc_spot.get(), order_cache, open_order_binance, 'spot', **options),
+        ]
+    if 'byb' in exchanges:
+        streams.append(userstream.BybitUserStream(byb.get(), order_cache, open_order_bybit, **options))
+    if 'okx' in exchanges:
+        streams.append(userstream.OkxUserStream(okx.get(), order_cache, open_order_okx, **options))
+    if 'upt' in exchanges:
+        streams.append(userstream.UpbitUserStream(upt.get(), order_cache, open_order_upbit, **options))
+
+    user_streams = userstream.UserStreamGroup(streams).start()
+    return user_streams
+
+
+def stop_user_streams() -> None:
+    global user_streams
+    if user_streams is not None:
+        user_streams.stop()
+        user_streams = None
+
+
+def start_ws_order_entry(
+        exchanges: tuple[str, ...] = ('bnc', 'byb', 'okx'),
+        connect_timeout: float | None = 10.0,
+) -> dict:
+    """ 거래소 별 WebSocket 주문 session을 background thread에서 연결
+
+        연결된 뒤에는 `place_order`, `amend_order`, `cancel_order_by_id`가 WebSocket으로 처리되고,
+        연결이 끊겨 있는 동안은 REST로 처리됨 (Upbit은 WebSocket 주문을 지원하지 않음)
+        `connect_timeout`초 동안 연결을 기다리고, 그 안에 연결되지 않은 session도 background에서 계속 연결을 시도
+    """
+    global ws_order_loop
+    from api_quant import wstrade
+    from api_quant.background import BackgroundLoop
+
+    if ws_order_loop is None:
+        ws_order_loop = BackgroundLoop('ws-order-entry')
+
+    new_sessions = []
+    if 'bnc' in exchanges and ('bnc', 'perp') not in ws_order_sessions:
+        for instrument_type, client in (('perp', bnc_futures), ('spot', bnc_spot)):
+            session = wstrade.BinanceOrderSession(client.get(), instrument_type, loop=ws_order_loop)
+            ws_order_sessions[('bnc', instrument_type)] = session
+            new_sessions.append(session)
+    # Bybit, OKX는 연결 하나로 spot/perp 주문을 모두 보냄
+    if 'byb' in exchanges and ('byb', 'perp') not in ws_order_sessions:
+        session = wstrade.BybitOrderSession(byb.get(), loop=ws_order_loop)
+        ws_order_sessions[('byb', 'perp')] = ws_order_sessions[('byb', 'spot')] = session
+        new_sessions.append(session)
+    if 'okx' in exchanges and ('okx', 'perp') not in ws_order_sessions:
+        session = wstrade.OkxOrderSession(okx.get(), loop=ws_order_loop)
+        ws_order_sessions[('okx', 'perp')] = ws_order_sessions[('okx', 'spot')] = session
+        new_sessions.append(session)
+
+    for session in new_sessions:
+        session.start()
+    if connect_timeout:
+        deadline = time.monotonic() + connect_timeout
+        for session in new_sessions:
+            session.wait_connected(max(deadline - time.monotonic(), 0))
+    return ws_order_sessions
+
+
+def stop_ws_order_entry() -> None:
+    global ws_order_loop
+    for session in set(ws_order_sessions.values()):
+        session.stop()
+    ws_order_sessions.clear()
+    if ws_order_loop is not None:
+        ws_order_loop.stop()
+        ws_order_loop = None
+
+
+# WebSocket을 쓸 수 없을 때 같은 요청을 보낼 REST endpoint, (exchange, instrument_type) -> action -> (method, endpoint)
+REST_ORDER_ENDPOINTS = {
+    ('bnc', 'perp'): {
+        'place': ('post', '/fapi/v1/order'),
+        'amend': ('put', '/fapi/v1/order'),
+        'cancel': ('delete', '/fapi/v1/order'),
+    },
+    ('bnc', 'spot'): {
+        'place': ('post', '/api/v3/order'),
+        'cancel': ('delete', '/api/v3/order'),
+    },
+    ('byb', 'perp'): {
+        'place': ('post', '/v5/order/create'),
+        'amend': ('post', '/v5/order/amend'),
+        'cancel': ('post', '/v5/order/cancel'),
+    },
+    ('okx', 'perp'): {
+        'place': ('post', '/api/v5/trade/order'),
+        'amend': ('post', '/api/v5/trade/amend-order'),
+        'cancel': ('post', '/api/v5/trade/cancel-order'),
+    },
+}
+REST_ORDER_ENDPOINTS[('byb', 'spot')] = REST_ORDER_ENDPOINTS[('byb', 'perp')]
+REST_ORDER_ENDPOINTS[('okx', 'spot')] = REST_ORDER_ENDPOINTS[('okx', 'perp')]
+
+# WebSocket 응답의 rate limit 초과 오류 code (REST의 429와 같이 rate limiter를 멈춤)
+WS_RATE_LIMIT_CODES = {
+    'bnc': {-1003, -1015},
+    'byb': {10006},
+    'okx': {'50011'},
+}
+
+
+def _order_client(exchange: str, instrument_type: str):
+    if exchange == 'bnc':
+        return bnc_futures if instrument_type == 'perp' else bnc_spot
+    return {'byb': byb, 'okx': okx}[exchange]
+
+
+def _order_request(exchange: str, instrument_type: str, action: str, params: dict):
+    """ 주문/정정/취소 요청을 WebSocket session으로 보내고, 연결되어 있지 않으면 같은 요청을 REST로 보냄
+
+        응답은 어느 쪽으로 보내도 REST 응답 형식
+        요청을 보낸 뒤 응답을 받지 못한 경우(`WsResponseLost`)는 주문이 접수되었을 수 있으므로 REST로 다시 보내지 않고 예외를 그대로 올림
+        WebSocket 요청도 같은 REST endpoint의 weight로 client의 rate limiter를 거쳐서 두 경로가 한도를 함께 씀
+    """
+    endpoints = REST_ORDER_ENDPOINTS[(exchange, instrument_type)]
+    if action not in endpoints:
+        raise ValueError(f'{exchange} {instrument_type}는 {action} 요청을 지원하지 않습니다.')
+    method, endpoint = endpoints[action]
+    client = _order_client(exchange, instrument_type)
+
+    session = ws_order_sessions.get((exchange, instrument_type))
+    if session is not None and session.connected:
+        from api_quant.wstrade import WsUnavailable
+
+        rate_limiter = client.rate_limiter
+        if rate_limiter is not None:
+            rate_limiter.acquire(method, endpoint, params)
+        try:
+            res = session.call(action, dict(params))
+        except WsUnavailable:
+            pass
+        else:
+            if rate_limiter is not None:
+                rate_limiter.update(method, endpoint, 429 if _is_ws_rate_limited(exchange, res) else 200, {})
+            return res
+
+    return client.request(
+        method=method,
+        endpoint=endpoint,
+        params=params,
+        require_signature=True,
+    ).json()
 
-    return result
+
+def _is_ws_rate_limited(exchange: str, res) -> bool:
+    if not isinstance(res, dict):
+        return False
+    codes = WS_RATE_LIMIT_CODES.get(exchange, ())
+    if res.get('code', res.get('retCode')) in codes:
+        return True
+    # OKX는 주문 별 오류를 data[].sCode로 알려줌
+    data = res.get('data')
+    return isinstance(data, list) and any(isinstance(d, dict) and d.get('sCode') in codes for d in data)
+
+
+def amend_order(
+        exchange: str,
+        instrument_type: str,
+        base_asset: str,
+        quote_asset: str,
+        order_id: str | int,
+        qty: Decimal | int | str | None = None,
+        price: str | int | None = None,
+        side: str | None = None,
+):
+    """ 미체결 주문의 수량/가격을 정정
+
+        - Binance perp은 정정할 때도 side가 필요하고 수량과 가격을 모두 보내야 함, Binance spot은 정정을 지원하지 않음
+        - OKX perp의 수량은 다른 주문 함수처럼 base asset 수량으로 받아서 계약 수로 바꿈
+    """
+    base, quote = base_asset.upper(), quote_asset.upper()
+
+    if exchange == 'bnc':
+        if instrument_type == 'spot':
+            raise ValueError('Binance spot은 주문 정정을 지원하지 않습니다. 취소 후 다시 주문해주세요.')
+        if side is None or qty is None or price is None:
+            raise ValueError('Binance perp 주문 정정은 side, qty, price가 모두 필요합니다.')
+        params = {
+            'symbol': f'{base}{quote}',
+            'orderId': order_id,
+            'side': 'BUY' if side == 'buy' else 'SELL',
+            'quantity': str(qty),
+            'price': str(price),
+        }
+
+    elif exchange == 'byb':
+        params = {
+            'category': 'linear' if instrument_type == 'perp' else 'spot',
+            'symbol': f'{base}{quote}',
+            'orderId': str(order_id),
+        }
+        if qty is not None:
+            params['qty'] = str(qty)
+        if price is not None:
+            params['price'] = str(price)
+
+    elif exchange == 'okx':
+        inst_id = f'{base}-{quote}-SWAP' if instrument_type == 'perp' else f'{base}-{quote}'
+        params = {'instId': inst_id, 'ordId': str(order_id)}
+        if qty is not None:
+            if instrument_type == 'perp':
+                ct_val = instrument_registry.get('okx', 'perp', inst_id).contract_value
+                params['newSz'] = str(int(Decimal(str(qty)) / ct_val))
+            else:
+                params['newSz'] = str(qty)
+        if price is not None:
+            params['newPx'] = str(price)
+
+    else:
+        raise ValueError(f'주문 정정을 지원하지 않는 거래소입니다. ({exchange})')
+
+    return _order_request(exchange, instrument_type, 'amend', params)
+
+
+def cancel_order_params(
+        exchange: str,
+        instrument_type: str,
+        base_asset: str,
+        quote_asset: str,
+        order_id: str | int,
+) -> dict:
+    base, quote = base_asset.upper(), quote_asset.upper()
+
+    if exchange == 'bnc':
+        return {'symbol': f'{base}{quote}', 'orderId': order_id}
+    if exchange == 'byb':
+        return {
+            'category': 'linear' if instrument_type == 'perp' else 'spot',
+            'symbol': f'{base}{quote}',
+            'orderId': str(order_id),
+        }
+    if exchange == 'okx':
+        inst_id = f'{base}-{quote}-SWAP' if instrument_type == 'perp' else f'{base}-{quote}'
+        return {'instId': inst_id, 'ordId': str(order_id)}
+    if exchange == 'upt':
+        return {'uuid': str(order_id)}
+    raise ValueError(f'id로 취소를 지원하지 않는 거래소입니다. ({exchange})')
+
+
+def cancel_order_by_id(
+        exchange: str,
+        instrument_type: str,
+        base_asset: str,
+        quote_asset: str,
+        order_id: str | int,
+):
+    """ 주문 하나를 id로 취소 (WebSocket session이 연결되어 있으면 WebSocket으로, Upbit은 REST) """
+    params = cancel_order_params(exchange, instrument_type, base_asset, quote_asset, order_id)
+
+    if exchange == 'upt':
+        return upt.request(
+            method='delete',
+            endpoint='/v1/order',
+            params=params,
+        ).json()
+
+    return _order_request(exchange, instrument_type, 'cancel', params)
+
+
+def order_symbols(
+        exchange: str,
+        base_asset: str | None = None,
+        quote_asset: str | None = None,
+) -> set[str] | None:
+    """ 미체결 주문 응답에 나오는 거래소 별 종목 이름 (perp, spot), base_asset이 없으면 None(모든 종목) """
+    if not base_asset:
+        return None
+    base, quote = base_asset.upper(), quote_asset.upper()
+    if exchange in ('bnc', 'byb'):
+        return {f'{base}{quote}'}
+    if exchange == 'okx':
+        return {f'{base}-{quote}-SWAP', f'{base}-{quote}'}
+    if exchange == 'upt':
+        return {f'{quote}-{base}'}
+    raise ValueError(f'알 수 없는 거래소입니다. ({exchange})')
 
 
 def query_open_order(
         exchange: str,
         base_asset: str | None = None,
-        quote_asset: str | None = None
+        quote_asset: str | None = None,
+        use_cache: bool = True,
+        deadline_at: float | None = None,
+        timeout: float | None = None,
 ):
+    # `deadline_at`(time.perf_counter 기준)이나 `timeout`(초)을 주면 각 요청의 HTTP timeout을 그때까지 남은 시간으로 제한
+    # (gateway 명령처럼 다른 process에서 부를 때는 `timeout`을 씀)
+    # 'all'이면 모든 거래소를 동시에 조회 (반환 형식은 `query_open_order_all` 참고)
+    if timeout is not None:
+        timeout_at = time.perf_counter() + timeout
+        deadline_at = timeout_at if deadline_at is None else min(deadline_at, timeout_at)
+
+    if exchange == 'all':
+        kwargs = {} if deadline_at is None else {'timeout': max(0.0, deadline_at - time.perf_counter())}
+        return query_open_order_all(
+            base_asset,
+            quote_asset,
+            use_cache=use_cache,
+            **kwargs,
+        )
+
+    # private stream이 연결되어 있으면 REST 조회 없이 cache에서 응답
+    if use_cache and order_cache.ready(exchange):
+        return order_cache.open_orders(exchange, order_symbols(exchange, base_asset, quote_asset))
+
     if exchange == 'bnc':
         result = open_order_binance(
             base_asset,
             quote_asset,
+            deadline_at=deadline_at,
         )
 
-    if exchange == 'byb':  # byb V2 는 Symbol 이 필수임.
+    if exchange == 'byb':
         result = open_order_bybit(
             base_asset,
             quote_asset,
-
+            deadline_at=deadline_at,
         )
 
     if exchange == 'okx':
         result = open_order_okx(
             base_asset,
             quote_asset,
+            deadline_at=deadline_at,
         )
 
     if exchange == 'upt':
-        result = open_order_upbit()
+        result = open_order_upbit(
+            base_asset,
+            quote_asset,
+            deadline_at=deadline_at,
+        )
 
     return result
 
 
+# 거래소 별 조회는 각자 `executor`에 spot/perp 조회를 넣고 기다리므로, 별도의 pool에서 실행
+query_executor = ThreadPoolExecutor(max_workers=len(EXCHANGES), thread_name_prefix='query')
+# 거래소 별로 아직 끝나지 않은 `query_open_order_all`의 조회 (timeout된 조회가 끝나기 전에는 다시 넣지 않음)
+_pending_queries: dict[str, Future] = {}
+_pending_queries_lock = threading.Lock()
+
+
+def _request_timeout(deadline_at: float | None) -> float | None:
+    """ `deadline_at`(time.perf_counter 기준)까지 남은 시간 (요청의 HTTP timeout), deadline이 없으면 None """
+    if deadline_at is None:
+        return None
+    remaining = deadline_at - time.perf_counter()
+    if remaining <= 0:
+        raise TimeoutError('deadline이 지나서 요청을 보내지 않았습니다.')
+    return remaining
+
+
+def query_open_order_all(
+        base_asset: str | None = None,
+        quote_asset: str | None = None,
+        timeout: float = 5.0,
+        use_cache: bool = True,
+) -> dict:
+    """ 모든 거래소의 미체결 주문을 동시에 조회해서 하나의 목록으로 합침
+
+        `timeout`초 안에 응답하지 않거나 실패한 거래소는 결과에서 빠지고 `errors`에 사유가 기록됨
+        각 요청의 HTTP timeout도 `timeout`초 안으로 제한하고, 이전 호출에서 timeout된 조회가 아직 끝나지 않은 거래소는
+        새로 조회하지 않고 'busy'로 기록함 (끝나지 않은 요청이 worker를 붙잡고 있는 동안 뒤에 쌓이지 않도록)
+        {'orders': [normalize_open_order 형식, ...], 'errors': {'okx': 'timeout', ...}}
+    """
+    deadline_at = time.perf_counter() + timeout
+
+    errors = {}
+    futures = {}
+    # 동시에 들어온 호출(ex. gateway의 여러 worker)이 같은 거래소 조회를 겹쳐 넣지 않도록 확인과 등록을 함께 함
+    with _pending_queries_lock:
+        for exchange in EXCHANGES:
+            pending = _pending_queries.get(exchange)
+            if pending is not None and not pending.done():
+                errors[exchange] = 'busy'
+                continue
+            future = query_executor.submit(query_open_order, exchange, base_asset, quote_asset, use_cache, deadline_at)
+            _pending_queries[exchange] = future
+            futures[future] = exchange
+    done, not_done = wait(futures, timeout=timeout)
+
+    orders = []
+    for future in done:
+        exchange = futures[future]
+        try:
+            orders.extend(normalize_open_order(exchange, order) for order in future.result())
+        except Exception as e:
+            errors[exchange] = repr(e)
+    for future in not_done:
+        # 이미 보낸 요청은 취소할 수 없으므로, 결과만 기다리지 않음
+        errors[futures[future]] = 'timeout'
+
+    orders.sort(key=lambda order: EXCHANGES.index(order['exchange']))
+    return {'orders': orders, 'errors': errors}
+
+
+def normalize_open_order(exchange: str, order: dict) -> dict:
+    """ 거래소 별 미체결 주문 응답을 공통 형식으로 변환 (`orders.Order`의 필드 + 원본 응답 `raw`)
+
+        OKX perp의 `qty`는 계약 수 기준
+    """
+    return parse_order(exchange, order).to_dict() | {'raw': order}
+
+
+def query_orders(
+        exchange: str,
+        base_asset: str | None = None,
+        quote_asset: str | None = None,
+        use_cache: bool = True,
+) -> list[Order]:
+    """ `query_open_order`의 결과를 거래소 공통 형식의 `Order`로 변환 (원본 dict는 보관하지 않음) """
+    return parse_orders(exchange, query_open_order(exchange, base_asset, quote_asset, use_cache=use_cache))
+
+
 #######################
 ######## OKX ####################
 #######################
 
-def place_order_okx_perpetual(
+def order_params_okx_perpetual(
         base_asset: str,
         quote_asset: str,
         side: str,
@@ -172,38 +925,38 @@ def place_order_okx_perpetual(
         price: str | int | None = None
 ):
     '''OKX Contract Value'''
-    res = okx.request(
-        method='get',
-        endpoint='/api/v5/public/instruments',
-        params={
-            'instType': 'SWAP',
-        },
-        require_signature=True,
-    )
+    ok_ctVal = instrument_registry.get('okx', 'perp', f'{base_asset.upper()}-{quote_asset.upper()}-SWAP').contract_value
+
+    return {
+        'instId': f'{base_asset.upper()}-{quote_asset.upper()}-SWAP',
+        'tdMode': 'cross',
+        'side': side,
+        'ordType': order_type,  # 우리 input 값과 포맷 동일
+        'sz': str(int(qty / ok_ctVal)),
+        'px': str(price),
+        # 'timeInForce' : 'GTC'
+    }
 
-    ok_ctVal_dict = dict([(row['instId'], Decimal(row['ctVal'])) for row in res.json()['data']])
-    ok_ctVal = ok_ctVal_dict[f'{base_asset.upper()}-{quote_asset.upper()}-SWAP']
 
-    result = okx.request(
-        method='post',
-        endpoint='/api/v5/trade/order',
-        params={
-
-            'instId': f'{base_asset.upper()}-{quote_asset.upper()}-SWAP',
-            'tdMode': 'cross',
-            'side': side,
-            'ordType': order_type,  # 우리 input 값과 포맷 동일
-            'sz': str(int(qty / ok_ctVal)),
-            'px': str(price),
-            # 'timeInForce' : 'GTC'
-        },
-        require_signature=True,
-    ).json()
+def place_order_okx_perpetual(
+        base_asset: str,
+        quote_asset: str,
+        side: str,
+        qty: Decimal | int | str,
+        order_type: str,
+        price: str | int | None = None
+):
+    result = _order_request(
+        'okx',
+        'perp',
+        'place',
+        order_params_okx_perpetual(base_asset, quote_asset, side, qty, order_type, price),
+    )
 
     return result
 
 
-def place_order_okx_spot(
+def order_params_okx_spot(
         base_asset: str,
         quote_asset: str,
         side: str,
@@ -219,22 +972,32 @@ def place_order_okx_spot(
     order_type = "limit" 로 설정 필수!
                          """)
 
-    result = okx.request(
-        method='post',
-        endpoint='/api/v5/trade/order',
-        params={
-
-            'instId': f'{base_asset.upper()}-{quote_asset.upper()}',
-            'tdMode': 'cash',
-            # Account Mode 에 따라서 달라짐.  일반적인 single-currecy 모드는 cash 가능. 나머지는 cross 해야함. 따라서 마진 배수도 조심해야 함.
-            'side': side,
-            'ordType': order_type,  # 우리 input 값과 포맷 동일
-            'sz': str(qty),
-            'px': str(price),
-            # 'timeInForce' : 'GTC'
-        },
-        require_signature=True,
-    ).json()
+    return {
+        'instId': f'{base_asset.upper()}-{quote_asset.upper()}',
+        'tdMode': 'cash',
+        # Account Mode 에 따라서 달라짐.  일반적인 single-currecy 모드는 cash 가능. 나머지는 cross 해야함. 따라서 마진 배수도 조심해야 함.
+        'side': side,
+        'ordType': order_type,  # 우리 input 값과 포맷 동일
+        'sz': str(qty),
+        'px': str(price),
+        # 'timeInForce' : 'GTC'
+    }
+
+
+def place_order_okx_spot(
+        base_asset: str,
+        quote_asset: str,
+        side: str,
+        qty: Decimal | int | str,
+        order_type: str,
+        price: str | int | None = None
+):
+    result = _order_request(
+        'okx',
+        'spot',
+        'place',
+        order_params_okx_spot(base_asset, quote_asset, side, qty, order_type, price),
+    )
 
     return result
 
@@ -242,38 +1005,31 @@ def place_order_okx_spot(
 def open_order_okx(
         base_asset: str | None = None,
         quote_asset: str | None = None,
+        deadline_at: float | None = None,
 ):
     if base_asset:
         params_perp = {
             'instId': f'{base_asset.upper()}-{quote_asset.upper()}-SWAP'
         }
         params_spot = {
-                          'instId': f'{base_asset.upper()}-{quote_asset.upper()}'
-                      },
-
-        res_ = okx.request(
-            method='get',
-            endpoint='/api/v5/trade/orders-pending',
-            params=params_perp,
-            require_signature=True,
-        ).json()
-
-        result = res_['data']
-
-        for i in range(len(result)):
-            result[i]['instrument_type'] = 'perp'
-
-        res_spot_ = okx.request(
-            method='get',
-            endpoint='/api/v5/trade/orders-pending',
-            params=params_spot,
-            require_signature=True,
-        ).json()
+            'instId': f'{base_asset.upper()}-{quote_asset.upper()}'
+        }
 
-        result_spot = res_spot_['data']
+        # perp과 spot 조회를 동시에 요청
+        future_perp, future_spot = (
+            executor.submit(
+                okx.request,
+                method='get',
+                endpoint='/api/v5/trade/orders-pending',
+                params=params,
+                require_signature=True,
+                timeout=_request_timeout(deadline_at),
+            )
+            for params in (params_perp, params_spot)
+        )
 
-        for i in range(len(result_spot)):
-            result_spot[i]['instrument_type'] = 'spot'
+        result = tag_instrument_type(future_perp.result().json()['data'], 'perp')
+        result_spot = tag_instrument_type(future_spot.result().json()['data'], 'spot')
 
         result.extend(result_spot)
 
@@ -284,83 +1040,70 @@ def open_order_okx(
             endpoint='/api/v5/trade/orders-pending',
             params=params,
             require_signature=True,
+            timeout=_request_timeout(deadline_at),
         ).json()
         result = result_['data']
 
+        for order in result:
+            order['instrument_type'] = 'perp' if order.get('instType') == 'SWAP' else 'spot'
+
     return result
 
 
 def cancel_order_okx(
         base_asset: str | None = None,
         quote_asset: str | None = None,
+        deadline_at: float | None = None,
 ):
-    if base_asset:
-        open_order_res_ = okx.request(
-            method='get',
-            endpoint='/api/v5/trade/orders-pending',
-            params={
-                'instId': f'{base_asset.upper()}-{quote_asset.upper()}-SWAP'
-            },
-            require_signature=True,
-        ).json()
-
-        open_order_res = open_order_res_['data']
-
-        open_order_res_spot_ = okx.request(
-            method='get',
-            endpoint='/api/v5/trade/orders-pending',
-            params={
-                'instId': f'{base_asset.upper()}-{quote_asset.upper()}'
-            },
-            require_signature=True,
-        ).json()
-
-        open_order_res_spot = open_order_res_spot_['data']
-
-        open_order_res.extend(open_order_res_spot)
-
-        result = []
-        for i in range(len(open_order_res)):
-            res = okx.request(
-                method='post',
-                endpoint='/api/v5/trade/cancel-order',
-                params={
-                    'instId': open_order_res[i]['instId'],
-                    'ordId': open_order_res[i]['ordId']
-                },
-                require_signature=True
-            ).json()
-
-            result.append(res)
+    if order_cache.ready('okx'):
+        # 미체결 주문을 다시 조회하지 않고 cache의 주문을 바로 취소
+        open_order_res = order_cache.open_orders('okx', order_symbols('okx', base_asset, quote_asset))
+    elif base_asset:
+        inst_ids = [
+            f'{base_asset.upper()}-{quote_asset.upper()}-SWAP',
+            f'{base_asset.upper()}-{quote_asset.upper()}',
+        ]
+        open_order_res = []
+        for data in executor.map(
+                lambda inst_id: okx.request(
+                    method='get',
+                    endpoint='/api/v5/trade/orders-pending',
+                    params={'instId': inst_id},
+                    require_signature=True,
+                    timeout=_request_timeout(deadline_at),
+                ).json()['data'],
+                inst_ids,
+        ):
+            open_order_res.extend(data)
     else:
-        open_order_res_ = okx.request(
+        open_order_res = okx.request(
             method='get',
             endpoint='/api/v5/trade/orders-pending',
             params={},
             require_signature=True,
-        ).json()
-
-        open_order_res = open_order_res_['data']
+            timeout=_request_timeout(deadline_at),
+        ).json()['data']
 
-        result = []
-        for i in range(len(open_order_res)):
-            res = okx.request(
-                method='post',
-                endpoint='/api/v5/trade/cancel-order',
-                params={
-                    'instId': open_order_res[i]['instId'],
-                    'ordId': open_order_res[i]['ordId']
-                },
-                require_signature=True
-            ).json()
+    # 한 번에 최대 20개씩 batch로 취소
+    orders = [{'instId': o['instId'], 'ordId': o['ordId']} for o in open_order_res]
+    chunks = [orders[i:i + OKX_BATCH_CANCEL_SIZE] for i in range(0, len(orders), OKX_BATCH_CANCEL_SIZE)]
 
-    return result
+    return list(executor.map(
+        lambda chunk: okx.request(
+            method='post',
+            endpoint='/api/v5/trade/cancel-batch-orders',
+            params=chunk,
+            require_signature=True,
+            timeout=_request_timeout(deadline_at),
+        ).json(),
+        chunks,
+    ))
 
 
 ##########################################
 ##############BYBIT############
 ###############################
-def place_order_bybit_perpetual(
+def order_params_bybit_perpetual(
         base_asset: str,
         quote_asset: str,
         side: str,
@@ -385,7 +1128,7 @@ def place_order_bybit_perpetual(
     #              'position_idx': 0
     #          }
 
-    params = {
+    return {
         'category': 'linear',
         'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
         'side': 'Buy' if side == 'buy' else 'Sell',
@@ -394,17 +1137,26 @@ def place_order_bybit_perpetual(
         'price': str(price),
     }
 
-    result = byb.request(
-        method='post',
-        endpoint='/v5/order/create',
-        params=params,
-        require_signature=True
-    ).json()
+
+def place_order_bybit_perpetual(
+        base_asset: str,
+        quote_asset: str,
+        side: str,
+        qty: Decimal | int | str,
+        order_type: str,
+        price: str | int | None = None
+):
+    result = _order_request(
+        'byb',
+        'perp',
+        'place',
+        order_params_bybit_perpetual(base_asset, quote_asset, side, qty, order_type, price),
+    )
 
     return result
 
 
-def place_order_bybit_spot(
+def order_params_bybit_spot(
         base_asset: str,
         quote_asset: str,
         side: str,
@@ -436,7 +1188,7 @@ def place_order_bybit_spot(
     #     'time_in_force': 'GoodTillCancel',
     # }
 
-    params = {
+    return {
         'category': 'spot',
         'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
         'side': 'Buy' if side == 'buy' else 'Sell',
@@ -445,12 +1197,22 @@ def place_order_bybit_spot(
         'price': str(price),
     }
 
-    result = byb.request(
-        method='post',
-        endpoint='/v5/order/create',
-        params=params,
-        require_signature=True
-    ).json()
+
+def place_order_bybit_spot(
+        base_asset: str,
+        quote_asset: str,
+        side: str,
+        qty: Decimal | int | str,
+        order_type: str,
+        price: str | int | None = None
+
+):
+    result = _order_request(
+        'byb',
+        'spot',
+        'place',
+        order_params_bybit_spot(base_asset, quote_asset, side, qty, order_type, price),
+    )
 
     return result
 
@@ -458,6 +1220,7 @@ def place_order_bybit_spot(
 def open_order_bybit(
         base_asset: str | None = None,
         quote_asset: str | None = None,
+        deadline_at: float | None = None,
 ):
     # result_ = byb.request(
     #     method='get',
@@ -466,31 +1229,30 @@ def open_order_bybit(
     #     require_signature=True
     # ).json()
 
-    result_ = byb.request(
-        method='get',
-        endpoint='/v5/order/realtime',
-        params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                'category': 'linear'},
-        require_signature=True
-    ).json()
-
-    result = result_['result']['list']
-
-    for i in range(len(result)):
-        result[i]['instrument_type'] = 'perp'
-
-    result_spot_ = byb.request(
-        method='get',
-        endpoint='/v5/order/realtime',
-        params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                'category': 'spot'},
-        require_signature=True
-    ).json()
-
-    result_spot = result_spot_['result']['list']
+    if base_asset:
+        symbol = f'{base_asset.upper()}{quote_asset.upper()}'
+        params_perp = {'symbol': symbol, 'category': 'linear'}
+        params_spot = {'symbol': symbol, 'category': 'spot'}
+    else:
+        # symbol이 없으면 linear는 정산 코인(USDT) 기준으로 조회
+        params_perp = {'settleCoin': 'USDT', 'category': 'linear'}
+        params_spot = {'category': 'spot'}
+
+    # perp과 spot 조회를 동시에 요청
+    future_perp, future_spot = (
+        executor.submit(
+            byb.request,
+            method='get',
+            endpoint='/v5/order/realtime',
+            params=params,
+            require_signature=True,
+            timeout=_request_timeout(deadline_at),
+        )
+        for params in (params_perp, params_spot)
+    )
 
-    for i in range(len(result_spot)):
-        result_spot[i]['instrument_type'] = 'spot'
+    result = tag_instrument_type(future_perp.result().json()['result']['list'], 'perp')
+    result_spot = tag_instrument_type(future_spot.result().json()['result']['list'], 'spot')
 
     result.extend(result_spot)
 
@@ -500,68 +1262,31 @@ def open_order_bybit(
 def cancel_order_bybit(
         base_asset: str | None = None,
         quote_asset: str | None = None,
-
+        deadline_at: float | None = None,
 ):
-    # open_order_res_ = byb.request(
-    #     method='get',
-    #     endpoint='/private/linear/order/search',
-    #     params={'symbol':f'{base_asset.upper()}{quote_asset.upper()}'},
-    #     require_signature=True
-    # ).json()
-    #
-    # open_order_res = open_order_res_['result']
-    #
-    open_order_res_ = byb.request(
-        method='get',
-        endpoint='/v5/order/realtime',
-        params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                'category': 'linear'},
-        require_signature=True
-    ).json()
-
-    open_order_res = open_order_res_['result']['list']
-
-    result = []
-    for i in range(len(open_order_res)):
-        res = byb.request(
-            method='post',
-            endpoint='/v5/order/cancel',
-            params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                    'orderId': open_order_res[i]['orderId'],
-                    'category': 'linear',
-                    },
-            require_signature=True
-        ).json()
-
-        result.append(res)
-
-    open_order_res_spot_ = byb.request(
-        method='get',
-        endpoint='/v5/order/realtime',
-        params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                'category': 'spot'},
-        require_signature=True
-    ).json()
-
-    open_order_res_spot = open_order_res_spot_['result']['list']
-
-    result_spot = []
-    for i in range(len(open_order_res_spot)):
-        res_spot = byb.request(
+    if base_asset:
+        symbol = f'{base_asset.upper()}{quote_asset.upper()}'
+        params_list = [
+            {'category': 'linear', 'symbol': symbol},
+            {'category': 'spot', 'symbol': symbol},
+        ]
+    else:
+        # symbol이 없으면 linear는 정산 코인(USDT) 기준으로, spot은 모든 미체결 주문을 취소
+        params_list = [
+            {'category': 'linear', 'settleCoin': 'USDT'},
+            {'category': 'spot'},
+        ]
+
+    return list(executor.map(
+        lambda params: byb.request(
             method='post',
-            endpoint='/v5/order/cancel',
-            params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                    'orderId': open_order_res_spot[i]['orderId'],
-                    'category': 'spot',
-                    },
-            require_signature=True
-        ).json()
-
-        result_spot.append(res_spot)
-
-    result.extend(result_spot)
-
-    return result
+            endpoint='/v5/order/cancel-all',
+            params=params,
+            require_signature=True,
+            timeout=_request_timeout(deadline_at),
+        ).json(),
+        params_list,
+    ))
 
 
 #######################
@@ -569,7 +1294,7 @@ def cancel_order_bybit(
 #######################
 
 
-def place_order_binance_perpetual(
+def order_params_binance(
         base_asset: str,
         quote_asset: str,
         side: str,
@@ -593,12 +1318,23 @@ def place_order_binance_perpetual(
         params_bnc['timeInForce'] = 'GTC'
         params_bnc['price'] = str(price)
 
-    result = bnc_futures.request(
-        method='post',
-        endpoint='/fapi/v1/order',
-        params=params_bnc,
-        require_signature=True
-    ).json()
+    return params_bnc
+
+
+def place_order_binance_perpetual(
+        base_asset: str,
+        quote_asset: str,
+        side: str,
+        qty: Decimal | int | str,
+        order_type: str,
+        price: str | int | None = None
+):
+    result = _order_request(
+        'bnc',
+        'perp',
+        'place',
+        order_params_binance(base_asset, quote_asset, side, qty, order_type, price),
+    )
 
     return result
 
@@ -610,31 +1346,15 @@ def place_order_binance_spot(
         side: str,
         qty: Decimal | int | str,
         order_type: str,
-        price: str | None = None
+        price: str | int | None = None
 
 ):
-    if order_type == 'limit' and not price:
-        raise ValueError('지정가 주문은 가격을 입력해야 합니다. Should !!')
-    elif order_type == 'market' and price is not None:
-        print('시장가 주문은 가격을 입력하지 않아도 됩니다...(주문은 나갔습니다)')
-
-    params_bnc = {
-        'side': 'BUY' if side == 'buy' else 'SELL',
-        'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-        'type': 'LIMIT' if order_type == 'limit' else 'MARKET',
-        'quantity': str(qty),
-    }
-
-    if order_type == 'limit':
-        params_bnc['timeInForce'] = 'GTC'
-        params_bnc['price'] = str(price)
-
-    result = bnc_spot.request(
-        method='post',
-        endpoint='/api/v3/order',
-        params=params_bnc,
-        require_signature=True
-    ).json()
+    result = _order_request(
+        'bnc',
+        'spot',
+        'place',
+        order_params_binance(base_asset, quote_asset, side, qty, order_type, price),
+    )
 
     return result
 
@@ -642,106 +1362,101 @@ def place_order_binance_spot(
 def open_order_binance(
         base_asset: str | None = None,
         quote_asset: str | None = None,
-
+        deadline_at: float | None = None,
 ):
     if base_asset:
-        result = bnc_futures.request(
-            method='get',
-            endpoint='/fapi/v1/openOrders',
-            params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}'},
-            require_signature=True
-        ).json()
-
-        for i in range(len(result)):
-            result[i]['instrument_type'] = 'perp'
-
-        result_spot = bnc_spot.request(
-            method='get',
-            endpoint='/api/v3/openOrders',
-            params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}'},
-            require_signature=True
-        ).json()
-
-        for i in range(len(result_spot)):
-            result_spot[i]['instrument_type'] = 'spot'
-
-        result.extend(result_spot)
-
+        params = {'symbol': f'{base_asset.upper()}{quote_asset.upper()}'}
     else:
-        result = bnc_futures.request(
-            method='get',
-            endpoint='/fapi/v1/openOrders',
-            params={},
-            require_signature=True
-        ).json()
-
-        for i in range(len(result)):
-            result[i]['instrument_type'] = 'perp'
+        params = {}
 
-        result_spot = bnc_spot.request(
-            method='get',
-            endpoint='/api/v3/openOrders',
-            params={},
-            require_signature=True
-        ).json()
+    # perp과 spot 조회를 동시에 요청
+    future_perp = executor.submit(
+        bnc_futures.request,
+        method='get',
+        endpoint='/fapi/v1/openOrders',
+        params=dict(params),
+        require_signature=True,
+        timeout=_request_timeout(deadline_at),
+    )
+    future_spot = executor.submit(
+        bnc_spot.request,
+        method='get',
+        endpoint='/api/v3/openOrders',
+        params=dict(params),
+        require_signature=True,
+        timeout=_request_timeout(deadline_at),
+    )
 
-        for i in range(len(result_spot)):
-            result_spot[i]['instrument_type'] = 'spot'
+    result = tag_instrument_type(future_perp.result().json(), 'perp')
+    result_spot = tag_instrument_type(future_spot.result().json(), 'spot')
 
-        result.extend(result_spot)
+    result.extend(result_spot)
 
     return result
 
 
 def cancel_order_binance(
-        base_asset: str,
-        quote_asset: str,
+        base_asset: str | None = None,
+        quote_asset: str | None = None,
+        deadline_at: float | None = None,
 ):
-    open_order_res = bnc_futures.request(
-        method='get',
-        endpoint='/fapi/v1/openOrders',
-        # params= params_bnc,
-        require_signature=True
-    ).json()
+    if base_asset:
+        symbol = f'{base_asset.upper()}{quote_asset.upper()}'
+        futures_symbols = [symbol]
+        spot_symbols = [symbol]
+    elif order_cache.ready('bnc'):
+        # 미체결 주문이 있는 symbol을 REST 조회 없이 cache에서 찾음
+        open_orders = order_cache.open_orders('bnc')
+        futures_symbols = list(dict.fromkeys(o['symbol'] for o in open_orders if o['instrument_type'] == 'perp'))
+        spot_symbols = list(dict.fromkeys(o['symbol'] for o in open_orders if o['instrument_type'] == 'spot'))
+    else:
+        # Binance의 전체 취소는 symbol이 필수이므로, 미체결 주문이 있는 symbol을 찾아서 symbol 별로 취소
+        open_order_res, open_order_spot_res = executor.map(
+            lambda args: args[0].request(
+                method='get',
+                endpoint=args[1],
+                require_signature=True,
+                timeout=_request_timeout(deadline_at),
+            ).json(),
+            [(bnc_futures, '/fapi/v1/openOrders'), (bnc_spot, '/api/v3/openOrders')],
+        )
+        futures_symbols = list(dict.fromkeys(o['symbol'] for o in open_order_res))
+        spot_symbols = list(dict.fromkeys(o['symbol'] for o in open_order_spot_res))
 
-    result = []
+    calls = [(bnc_futures, '/fapi/v1/allOpenOrders', s) for s in futures_symbols]
+    calls += [(bnc_spot, '/api/v3/openOrders', s) for s in spot_symbols]
 
-    for i in range(len(open_order_res)):
-        res = bnc_futures.request(
+    return list(executor.map(
+        lambda args: args[0].request(
             method='delete',
-            endpoint='/fapi/v1/order',
-            params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                    'orderId': open_order_res[i]['orderId']},
-            require_signature=True
-        ).json()
+            endpoint=args[1],
+            params={'symbol': args[2]},
+            require_signature=True,
+            timeout=_request_timeout(deadline_at),
+        ).json(),
+        calls,
+    ))
 
-        result.append(res)
 
-    result_spot = []
-    open_order_spot_res = bnc_spot.request(
-        method='get',
-        endpoint='/api/v3/openOrders',
-        # params= params_bnc,
-        require_signature=True
-    ).json()
+def cancel_orders_binance_perpetual(
+        symbol: str,
+        order_ids: list[int],
+):
+    # 특정 주문들만 취소하는 경우, 한 번에 최대 10개씩 batch로 취소
+    chunks = [order_ids[i:i + BINANCE_BATCH_CANCEL_SIZE] for i in range(0, len(order_ids), BINANCE_BATCH_CANCEL_SIZE)]
 
-    for i in range(len(open_order_spot_res)):
-        res_spot = bnc_spot.request(
+    return list(executor.map(
+        lambda chunk: bnc_futures.request(
             method='delete',
-            endpoint='/api/v3/order',
-            params={'symbol': f'{base_asset.upper()}{quote_asset.upper()}',
-                    'orderId': open_order_spot_res[i]['orderId']},
+            endpoint='/fapi/v1/batchOrders',
+            params={'symbol': symbol, 'orderIdList': json.dumps(chunk, separators=(',', ':'))},
             require_signature=True
-        ).json()
+        ).json(),
+        chunks,
+    ))
 
-        result_spot.append(res_spot)
 
-    result.extend(result_spot)
-
-    return result
-
-
-def place_order_upbit_spot(
+def order_params_upbit_spot(
         base_asset: str,
         quote_asset: str,
         side: str,
@@ -777,42 +1492,64 @@ def place_order_upbit_spot(
     elif order_type == 'market' and side == 'sell':
         params['ord_type'] = 'market'
 
+    return params
+
+
+def place_order_upbit_spot(
+        base_asset: str,
+        quote_asset: str,
+        side: str,
+        qty: Decimal | int | str,
+        order_type: str,
+        price: str | int | None = None
+
+):
     result = upt.request(
         method='post',
         endpoint='/v1/orders',
-        params=params,
+        params=order_params_upbit_spot(base_asset, quote_asset, side, qty, order_type, price),
     ).json()
 
     return result
 
 
-def open_order_upbit():
+def open_order_upbit(
+        base_asset: str | None = None,
+        quote_asset: str | None = None,
+        deadline_at: float | None = None,
+):
+    params = {'state': 'wait'}
+    if base_asset:
+        params['market'] = f'{quote_asset.upper()}-{base_asset.upper()}'
+
     result = upt.request(
         method='get',
         endpoint='/v1/orders',
-        params={'state': 'wait'},
+        params=params,
+        timeout=_request_timeout(deadline_at),
     ).json()
 
-    return result
-
+    return tag_instrument_type(result, 'spot')
 
-def cancel_order_upbit():
-    open_order_res = upt.request(
-        method='get',
-        endpoint='/v1/orders',
-        params={'state': 'wait'},
-    ).json()
 
-    result = []
-    for i in range(len(open_order_res)):
-        open_order_uuid = open_order_res[i]['uuid']
+def cancel_order_upbit(deadline_at: float | None = None):
+    if order_cache.ready('upt'):
+        open_order_res = order_cache.open_orders('upt')
+    else:
+        open_order_res = upt.request(
+            method='get',
+            endpoint='/v1/orders',
+            params={'state': 'wait'},
+            timeout=_request_timeout(deadline_at),
+        ).json()
 
-        cancel_order_res = upt.request(
+    # Upbit은 여러 주문을 한 번에 취소하는 endpoint가 없으므로, 취소 요청을 동시에 보냄
+    return list(executor.map(
+        lambda order: upt.request(
             method='delete',
             endpoint='/v1/order',
-            params={'uuid': open_order_uuid},
-        ).json()
-
-        result.append(cancel_order_res)
-
-    return result
\ No newline at end of file
+            params={'uuid': order['uuid']},
+            timeout=_request_timeout(deadline_at),
+        ).json(),
+        open_order_res,
+    ))
\ No newline at end of file
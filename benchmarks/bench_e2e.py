@@ -0,0 +1,396 @@
+""" 거래소 별 주문 / 취소 / 조회 end-to-end latency (api_trading_script -> benchmarks.mock_exchange)
+
+    python -m benchmarks.bench_e2e
+    python -m benchmarks.bench_e2e --save benchmarks/e2e_baseline.json
+    python -m benchmarks.bench_e2e --compare benchmarks/e2e_baseline.json --tolerance 0.25   # 느려졌으면 exit code 1
+    python -m benchmarks.bench_e2e --mock-url http://127.0.0.1:8080   # 별도 process의 mock 사용 (GIL을 나눠 쓰지 않음)
+
+- sync  : api_trading_script의 place_order / cancel_order_by_id / query_open_order를 호출
+- async : 같은 요청을 client.request_async로 보냄
+- latency는 요청을 하나씩 보냈을 때의 분포, `cpu`는 그 동안 호출한 thread가 쓴 CPU 시간의 평균
+  (param 생성, 서명, serialization, JSON parsing 등 client 쪽 비용, 나머지는 전송과 mock 처리 시간)
+  sync 조회는 spot / perp 요청을 `executor` thread에서 보내므로 그 비용이 `cpu`에 잡히지 않음
+- throughput은 `--concurrency`개의 thread(sync) / task(async)로 동시에 보냈을 때의 초당 요청 수
+- client-side rate limiter는 기본으로 끔 (`--rate-limited`로 켬)
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Any, Callable
+
+import api_trading_script as api
+from benchmarks.mock_exchange import MockExchange, mock_clients
+
+BASE = 'BTC'
+QTY = Decimal('0.01')
+# mock의 기준 가격(BTC 60,000 USDT)보다 높은 매수는 바로 체결되어 미체결 주문이 쌓이지 않음
+FILL_PRICE = {'USDT': '61000', 'KRW': '90000000'}
+# 기준 가격보다 높은 매도는 미체결로 남음 (취소 / 조회 대상)
+REST_PRICE = {'USDT': '90000', 'KRW': '130000000'}
+# 조회 benchmark 동안 거래소 / 상품 별로 걸어둘 미체결 주문 수
+QUERY_OPEN_ORDERS = 20
+
+TARGETS = [('bnc', 'perp'), ('bnc', 'spot'), ('byb', 'perp'), ('byb', 'spot'), ('okx', 'perp'), ('okx', 'spot'), ('upt', 'spot')]
+CLIENT_NAMES = {
+    ('bnc', 'perp'): 'bnc_futures',
+    ('bnc', 'spot'): 'bnc_spot',
+    ('byb', 'perp'): 'byb',
+    ('byb', 'spot'): 'byb',
+    ('okx', 'perp'): 'okx',
+    ('okx', 'spot'): 'okx',
+    ('upt', 'spot'): 'upt',
+}
+ORDER_PARAMS = {
+    ('bnc', 'perp'): api.order_params_binance,
+    ('bnc', 'spot'): api.order_params_binance,
+    ('byb', 'perp'): api.order_params_bybit_perpetual,
+    ('byb', 'spot'): api.order_params_bybit_spot,
+    ('okx', 'perp'): api.order_params_okx_perpetual,
+    ('okx', 'spot'): api.order_params_okx_spot,
+    ('upt', 'spot'): api.order_params_upbit_spot,
+}
+
+
+def _quote(exchange: str) -> str:
+    return 'KRW' if exchange == 'upt' else 'USDT'
+
+
+def _client(exchange: str, instrument_type: str):
+    return getattr(api, CLIENT_NAMES[(exchange, instrument_type)]).get()
+
+
+def _check(exchange: str, res: Any) -> None:
+    """ mock이 오류를 반환했으면 (서명 오류 등) 잘못된 숫자를 남기지 않도록 중단 """
+    failed = (
+        (exchange == 'bnc' and isinstance(res, dict) and res.get('code', 0) < 0)
+        or (exchange == 'byb' and res.get('retCode') != 0)
+        or (exchange == 'okx' and res.get('code') != '0')
+        or (exchange == 'upt' and 'error' in res)
+    )
+    if failed:
+        raise RuntimeError(f'{exchange} 요청이 실패했습니다. ({res})')
+
+
+def _order_id(exchange: str, res: dict) -> str:
+    _check(exchange, res)
+    if exchange == 'bnc':
+        return res['orderId']
+    if exchange == 'byb':
+        return res['result']['orderId']
+    if exchange == 'okx':
+        return res['data'][0]['ordId']
+    return res['uuid']
+
+
+async def _request_async(exchange: str, client, method: str, endpoint: str, params) -> Any:
+    if exchange == 'upt':
+        return await client.request_async(method=method, endpoint=endpoint, params=params)
+    return await client.request_async(method=method, endpoint=endpoint, params=params, require_signature=True)
+
+
+@dataclass
+class Case:
+    """ benchmark 하나, `prepare(n)`이 호출마다 넘길 인자 n개를 만듦 (취소할 주문 id 등) """
+    name: str
+    exchange: str
+    sync_call: Callable[[Any], Any]
+    async_call: Callable[[Any], Any]
+    prepare: Callable[[int], list] = lambda n: [None] * n
+    cleanup: Callable[[], None] = lambda: None
+
+
+def place_case(exchange: str, instrument_type: str) -> Case:
+    quote = _quote(exchange)
+    price = FILL_PRICE[quote]
+
+    def sync_call(_):
+        res = api.place_order(exchange, instrument_type, BASE, quote, 'buy', QTY, 'limit', price)
+        _check(exchange, res)
+
+    async def async_call(_):
+        params = ORDER_PARAMS[(exchange, instrument_type)](BASE, quote, 'buy', QTY, 'limit', price)
+        if exchange == 'upt':
+            method, endpoint = 'post', '/v1/orders'
+        else:
+            method, endpoint = api.REST_ORDER_ENDPOINTS[(exchange, instrument_type)]['place']
+        _check(exchange, await _request_async(exchange, _client(exchange, instrument_type), method, endpoint, params))
+
+    return Case(f'place/{exchange}-{instrument_type}', exchange, sync_call, async_call)
+
+
+def _place_resting(exchange: str, instrument_type: str, n: int) -> list[str]:
+    quote = _quote(exchange)
+    return [
+        _order_id(exchange, api.place_order(exchange, instrument_type, BASE, quote, 'sell', QTY, 'limit', REST_PRICE[quote]))
+        for _ in range(n)
+    ]
+
+
+def cancel_case(exchange: str, instrument_type: str) -> Case:
+    quote = _quote(exchange)
+
+    def sync_call(order_id):
+        _check(exchange, api.cancel_order_by_id(exchange, instrument_type, BASE, quote, order_id))
+
+    async def async_call(order_id):
+        params = api.cancel_order_params(exchange, instrument_type, BASE, quote, order_id)
+        if exchange == 'upt':
+            method, endpoint = 'delete', '/v1/order'
+        else:
+            method, endpoint = api.REST_ORDER_ENDPOINTS[(exchange, instrument_type)]['cancel']
+        _check(exchange, await _request_async(exchange, _client(exchange, instrument_type), method, endpoint, params))
+
+    return Case(
+        f'cancel/{exchange}-{instrument_type}',
+        exchange,
+        sync_call,
+        async_call,
+        prepare=lambda n: _place_resting(exchange, instrument_type, n),
+    )
+
+
+def _query_requests(exchange: str) -> list[tuple]:
+    """ query_open_order(exchange, BASE, quote)가 보내는 요청 (client, method, endpoint, params) """
+    quote = _quote(exchange)
+    symbol = f'{BASE}{quote}'
+    if exchange == 'bnc':
+        return [
+            (_client('bnc', 'perp'), 'get', '/fapi/v1/openOrders', {'symbol': symbol}),
+            (_client('bnc', 'spot'), 'get', '/api/v3/openOrders', {'symbol': symbol}),
+        ]
+    if exchange == 'byb':
+        return [
+            (_client('byb', 'perp'), 'get', '/v5/order/realtime', {'symbol': symbol, 'category': category})
+            for category in ('linear', 'spot')
+        ]
+    if exchange == 'okx':
+        return [
+            (_client('okx', 'perp'), 'get', '/api/v5/trade/orders-pending', {'instId': inst_id})
+            for inst_id in (f'{BASE}-{quote}-SWAP', f'{BASE}-{quote}')
+        ]
+    return [(_client('upt', 'spot'), 'get', '/v1/orders', {'state': 'wait', 'market': f'{quote}-{BASE}'})]
+
+
+def query_case(exchange: str) -> Case:
+    quote = _quote(exchange)
+    instrument_types = [t for e, t in TARGETS if e == exchange]
+
+    def prepare(n):
+        # 조회 결과에 주문이 들어 있도록 미체결 주문을 걸어둠 (이미 걸려 있으면 다시 걸지 않음)
+        for instrument_type in instrument_types:
+            missing = QUERY_OPEN_ORDERS - sum(
+                1 for o in api.query_open_order(exchange, BASE, quote, use_cache=False)
+                if o.get('instrument_type') == instrument_type
+            )
+            if missing > 0:
+                _place_resting(exchange, instrument_type, missing)
+        return [None] * n
+
+    def sync_call(_):
+        api.query_open_order(exchange, BASE, quote, use_cache=False)
+
+    async def async_call(_):
+        # sync 함수처럼 spot / perp 조회를 동시에 보냄
+        await asyncio.gather(*(
+            _request_async(exchange, client, method, endpoint, dict(params))
+            for client, method, endpoint, params in _query_requests(exchange)
+        ))
+
+    return Case(
+        f'query/{exchange}',
+        exchange,
+        sync_call,
+        async_call,
+        prepare=prepare,
+        cleanup=lambda: api.cancel_order(exchange, BASE, quote),
+    )
+
+
+@dataclass
+class Result:
+    n: int
+    p50_ms: float
+    p99_ms: float
+    p999_ms: float
+    mean_ms: float
+    cpu_ms: float
+    throughput_rps: float
+
+
+def _percentile(samples: list[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _result(latencies: list[float], cpu: list[float], throughput: float) -> Result:
+    latencies = sorted(latencies)
+    return Result(
+        n=len(latencies),
+        p50_ms=_percentile(latencies, 0.5),
+        p99_ms=_percentile(latencies, 0.99),
+        p999_ms=_percentile(latencies, 0.999),
+        mean_ms=statistics.mean(latencies),
+        cpu_ms=statistics.mean(cpu),
+        throughput_rps=throughput,
+    )
+
+
+def run_sync(case: Case, n: int, warmup: int, concurrency: int) -> Result:
+    args = case.prepare(warmup + 2 * n)
+    for arg in args[:warmup]:
+        case.sync_call(arg)
+
+    latencies, cpu = [], []
+    for arg in args[warmup:warmup + n]:
+        t0, c0 = time.perf_counter(), time.thread_time()
+        case.sync_call(arg)
+        cpu.append((time.thread_time() - c0) * 1000)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        t0 = time.perf_counter()
+        list(pool.map(case.sync_call, args[warmup + n:]))
+        throughput = n / (time.perf_counter() - t0)
+
+    case.cleanup()
+    return _result(latencies, cpu, throughput)
+
+
+def run_async(case: Case, n: int, warmup: int, concurrency: int) -> Result:
+    args = case.prepare(warmup + 2 * n)
+
+    async def run():
+        for arg in args[:warmup]:
+            await case.async_call(arg)
+
+        latencies, cpu = [], []
+        for arg in args[warmup:warmup + n]:
+            t0, c0 = time.perf_counter(), time.thread_time()
+            await case.async_call(arg)
+            cpu.append((time.thread_time() - c0) * 1000)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(arg):
+            async with semaphore:
+                await case.async_call(arg)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(limited(arg) for arg in args[warmup + n:]))
+        throughput = n / (time.perf_counter() - t0)
+
+        # aiohttp session은 이 event loop에 묶여 있으므로 닫고 나감
+        for client in {id(c): c for c in map(lambda key: _client(*key), TARGETS)}.values():
+            await client.aclose()
+        return _result(latencies, cpu, throughput)
+
+    result = asyncio.run(run())
+    case.cleanup()
+    return result
+
+
+def build_cases(kinds: list[str], exchanges: list[str]) -> list[Case]:
+    cases = []
+    targets = [(e, t) for e, t in TARGETS if e in exchanges]
+    if 'place' in kinds:
+        cases += [place_case(e, t) for e, t in targets]
+    # 조회를 취소보다 먼저 해서, 조회용으로 걸어둔 주문을 정리한 뒤 취소 benchmark를 함
+    if 'query' in kinds:
+        cases += [query_case(e) for e in exchanges]
+    if 'cancel' in kinds:
+        cases += [cancel_case(e, t) for e, t in targets]
+    return cases
+
+
+def run(args) -> dict:
+    results = {}
+    runners = {'sync': run_sync, 'async': run_async}
+    print(f'{"case":<24}{"n":>6}{"p50":>9}{"p99":>9}{"p999":>9}{"mean":>9}{"cpu":>9}{"req/s":>10}')
+    for case in build_cases(args.cases.split(','), args.exchanges.split(',')):
+        for mode in args.modes.split(','):
+            result = runners[mode](case, args.n, args.warmup, args.concurrency)
+            key = f'{mode}/{case.name}'
+            results[key] = asdict(result)
+            print(
+                f'{key:<24}{result.n:>6}{result.p50_ms:>9.3f}{result.p99_ms:>9.3f}{result.p999_ms:>9.3f}'
+                f'{result.mean_ms:>9.3f}{result.cpu_ms:>9.3f}{result.throughput_rps:>10,.0f}'
+            )
+    return {
+        'meta': {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'n': args.n,
+            'concurrency': args.concurrency,
+            'mock_latency_ms': args.latency_ms,
+            'rate_limited': args.rate_limited,
+        },
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """ baseline보다 `tolerance` 비율 넘게 나빠진 항목 (latency는 커지면, throughput은 작아지면) """
+    regressions = []
+    for key, base in baseline['results'].items():
+        cur = current['results'].get(key)
+        if cur is None:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if cur[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{key} {metric} {base[metric]:.3f} -> {cur[metric]:.3f}')
+        if cur['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            regressions.append(f'{key} throughput_rps {base["throughput_rps"]:,.0f} -> {cur["throughput_rps"]:,.0f}')
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=300, help='case / mode 별 요청 수')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--modes', default='sync,async')
+    parser.add_argument('--cases', default='place,query,cancel')
+    parser.add_argument('--exchanges', default='bnc,byb,okx,upt')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='mock이 응답 전에 기다리는 시간')
+    parser.add_argument('--rate-limited', action='store_true', help='client-side rate limiter를 켬')
+    parser.add_argument('--mock-url', help='이미 떠 있는 mock (python -m benchmarks.mock_exchange, 기본 key)')
+    parser.add_argument('--save', help='결과를 저장할 JSON 파일')
+    parser.add_argument('--compare', help='비교할 baseline JSON 파일')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='baseline 대비 허용하는 악화 비율')
+    args = parser.parse_args()
+
+    if args.mock_url:
+        api.use_clients(**mock_clients(args.mock_url, rate_limited=args.rate_limited))
+        current = run(args)
+    else:
+        with MockExchange(latency_ms=args.latency_ms) as mock:
+            api.use_clients(**mock.clients(rate_limited=args.rate_limited))
+            current = run(args)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f'saved : {args.save}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print(f'baseline 대비 {args.tolerance:.0%} 넘게 느려진 항목 :')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'baseline 대비 {args.tolerance:.0%} 넘게 느려진 항목 없음')
+
+
+if __name__ == '__main__':
+    main()
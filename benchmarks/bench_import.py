@@ -0,0 +1,76 @@
+""" Module import time, measured in a fresh interpreter for every sample
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --module api_quant.upbit -n 20
+    python -m benchmarks.bench_import --importtime   # 오래 걸리는 import 상위 목록
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# import만 했을 때 불러오지 않아야 하는 무거운 module
+HEAVY_MODULES = ('pandas', 'numpy', 'aiohttp', 'asyncio', 'requests', 'jwt')
+
+_SAMPLE_CODE = '''
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{'import_ms': elapsed * 1000, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+
+def sample(module: str) -> tuple[float, float, list[str]]:
+    """ (import 시간, interpreter 시작부터 종료까지의 시간, 불러온 무거운 module) """
+    code = _SAMPLE_CODE.format(module=module, heavy=HEAVY_MODULES)
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    wall_ms = (time.perf_counter() - t0) * 1000
+    result = json.loads(out.strip().splitlines()[-1])
+    return result['import_ms'], wall_ms, result['loaded']
+
+
+def importtime(module: str, top: int) -> None:
+    err = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        check=True, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self_us, cumulative_us, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        rows.append((int(cumulative_us), name))
+    for cumulative_us, name in sorted(rows, reverse=True)[:top]:
+        print(f'{cumulative_us / 1000:9.1f}ms  {name}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module', default='api_trading_script')
+    parser.add_argument('-n', type=int, default=10)
+    parser.add_argument('--importtime', action='store_true')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.importtime:
+        importtime(args.module, args.top)
+        return
+
+    import_ms, wall_ms, loaded = [], [], []
+    for _ in range(args.n):
+        i, w, loaded = sample(args.module)
+        import_ms.append(i)
+        wall_ms.append(w)
+
+    print(f'{args.module}  n={args.n}')
+    print(f'import   p50={statistics.median(import_ms):8.1f}ms  min={min(import_ms):8.1f}ms')
+    print(f'process  p50={statistics.median(wall_ms):8.1f}ms  min={min(wall_ms):8.1f}ms')
+    print(f'loaded heavy modules: {", ".join(loaded) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+""" REST vs WebSocket order entry round-trip latency (Binance 형식 local stub)
+
+    python -m benchmarks.bench_order_entry
+    python -m benchmarks.bench_order_entry -n 2000 --delay-ms 1
+
+stub은 REST(/fapi/v1/order)와 WebSocket API(/ws)에 같은 주문 응답을 돌려줌
+`--delay-ms`는 거래소의 주문 처리 시간처럼 두 경로에 똑같이 더하는 지연
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+
+from aiohttp import WSMsgType, web
+
+from api_quant import binance
+from api_quant.background import BackgroundLoop
+from api_quant.wstrade import BinanceOrderSession
+
+ORDER_PARAMS = {
+    'symbol': 'BTCUSDT',
+    'side': 'BUY',
+    'type': 'LIMIT',
+    'timeInForce': 'GTC',
+    'quantity': '0.001',
+    'price': '10000',
+}
+
+
+class OrderStub:
+    """ Binance USDⓢ-M REST 주문 endpoint와 WebSocket API를 흉내 내는 aiohttp 서버 """
+    def __init__(self, delay_ms: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self._delay = delay_ms / 1000
+        self._host = host
+        self._port = port
+        self._order_ids = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self.base_url = ''
+
+    def _order(self, params: dict) -> dict:
+        return {
+            'orderId': next(self._order_ids),
+            'symbol': params.get('symbol'),
+            'status': 'NEW',
+            'price': params.get('price'),
+            'origQty': params.get('quantity'),
+            'side': params.get('side'),
+            'type': params.get('type'),
+            'updateTime': int(time.time() * 1000),
+        }
+
+    async def _rest(self, request: web.Request) -> web.Response:
+        if request.method == 'GET':
+            return web.json_response({'serverTime': int(time.time() * 1000)})
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        return web.json_response(self._order(dict(request.query)))
+
+    async def _ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+            message = json.loads(msg.data)
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            await ws.send_str(json.dumps({'id': message['id'], 'status': 200, 'result': self._order(message['params'])}))
+        return ws
+
+    async def start(self) -> 'OrderStub':
+        app = web.Application()
+        app.router.add_get('/ws', self._ws)
+        app.router.add_route('*', '/{tail:.*}', self._rest)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f'http://{self._host}:{port}'
+        return self
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+def _report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f'{name:<6} n={len(samples):<5} mean={statistics.mean(samples):8.3f}ms  '
+          f'p50={statistics.median(samples):8.3f}ms  p99={p99:8.3f}ms  max={samples[-1]:8.3f}ms')
+
+
+def bench_rest(client, n: int) -> list[float]:
+    # 첫 요청으로 connection을 미리 열어둠
+    client.request(method='post', endpoint='/fapi/v1/order', params=dict(ORDER_PARAMS), require_signature=True)
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        client.request(method='post', endpoint='/fapi/v1/order', params=dict(ORDER_PARAMS), require_signature=True).json()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def bench_ws(session: BinanceOrderSession, n: int) -> list[float]:
+    session.call('place', ORDER_PARAMS)
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        session.call('place', ORDER_PARAMS)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000)
+    parser.add_argument('--delay-ms', type=float, default=0.0, help='stub의 주문 처리 지연')
+    args = parser.parse_args()
+
+    # stub은 client와 다른 thread의 event loop에서 돌려서 client의 요청 처리와 섞이지 않게 함
+    server_loop = BackgroundLoop('order-stub')
+    stub = server_loop.run(OrderStub(args.delay_ms).start())
+    client = binance.BaseApiClient(('key', 'secret'), stub.base_url)
+    session = BinanceOrderSession(client, ws_url=stub.base_url + '/ws').start()
+    try:
+        if not session.wait_connected(5):
+            raise RuntimeError('stub WebSocket에 연결하지 못했습니다.')
+        _report('rest', bench_rest(client, args.n))
+        _report('ws', bench_ws(session, args.n))
+    finally:
+        session.stop()
+        client.close()
+        server_loop.run(stub.stop())
+        server_loop.stop()
+
+
+if __name__ == '__main__':
+    main()
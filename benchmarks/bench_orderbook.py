@@ -0,0 +1,150 @@
+""" L2 order book throughput and memory (dict OrderBook vs NumPy ArrayBook)
+
+    python -m benchmarks.bench_orderbook
+    python -m benchmarks.bench_orderbook --records recording.jsonl --tick 0.1
+    python -m benchmarks.bench_orderbook --synthetic 200000 --levels 1000
+
+기록 파일은 BookStream(record_path=...) 형식 (Binance depthUpdate, Upbit orderbook 메시지를 재생)
+"""
+import argparse
+import time
+import tracemalloc
+
+from api_quant.arraybook import ArrayBook
+from api_quant.orderbook import OrderBook
+from benchmarks.replay_ws_server import load_records, synthetic_records
+
+
+def updates_from_records(records: list[dict]) -> list[tuple[str, list, list]]:
+    """ 기록에서 (종류, bids, asks) 목록을 꺼냄, 종류는 'snapshot' 또는 'delta' """
+    updates = []
+    for record in records:
+        if 'rest' in record and 'lastUpdateId' in record['body']:
+            updates.append(('snapshot', record['body']['bids'], record['body']['asks']))
+            continue
+        message = record.get('ws')
+        if not isinstance(message, dict):
+            continue
+        data = message.get('data', message)
+        if data.get('e') == 'depthUpdate':
+            updates.append(('delta', data['b'], data['a']))
+        elif data.get('type') == 'orderbook':
+            units = data['orderbook_units']
+            updates.append((
+                'snapshot',
+                [(u['bid_price'], u['bid_size']) for u in units],
+                [(u['ask_price'], u['ask_size']) for u in units],
+            ))
+    # 첫 snapshot 이전의 delta는 적용할 수 없으므로 버림
+    for i, (kind, _, _) in enumerate(updates):
+        if kind == 'snapshot':
+            return updates[i:]
+    return []
+
+
+def replay(book, updates) -> None:
+    for kind, bids, asks in updates:
+        if kind == 'snapshot':
+            book.apply_snapshot(bids, asks)
+        else:
+            book.apply_delta(bids, asks)
+
+
+def _rate(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def _memory(factory, updates) -> int:
+    """ book을 만들고 모든 update를 적용한 뒤 남아 있는 메모리 (bytes) """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    book = factory()
+    replay(book, updates)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del book
+    return used
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', help='BookStream이 기록한 JSONL (없으면 synthetic)')
+    parser.add_argument('--synthetic', type=int, default=100_000, help='synthetic delta 수')
+    parser.add_argument('--levels', type=int, default=1000, help='synthetic snapshot 호가 수')
+    parser.add_argument('--tick', type=float, default=0.1)
+    parser.add_argument('-n', type=int, default=100_000, help='조회 반복 횟수')
+    args = parser.parse_args()
+
+    if args.records:
+        records = load_records(args.records)
+    else:
+        records = synthetic_records(n=args.synthetic, levels=args.levels, tick=args.tick)
+    updates = updates_from_records(records)
+    n_updates = sum(1 if kind == 'delta' else 0 for kind, _, _ in updates)
+    print(f'{len(updates):,} updates ({n_updates:,} deltas), tick {args.tick}')
+
+    factories = {
+        'OrderBook (dict)': lambda: OrderBook('x', 'x'),
+        'ArrayBook (numpy)': lambda: ArrayBook('x', 'x', tick=args.tick),
+    }
+    _, snapshot_bids, snapshot_asks = updates[0]
+    books = {}
+    print(f'{"book":<20}{"updates/s":>14}{"snapshot/s":>12}{"best/s":>14}{"depth20/s":>14}{"memory KiB":>12}')
+    for name, factory in factories.items():
+        book = factory()
+        t0 = time.perf_counter()
+        replay(book, updates)
+        update_rate = len(updates) / (time.perf_counter() - t0)
+        books[name] = book
+
+        snapshot_rate = _rate(lambda: factory().apply_snapshot(snapshot_bids, snapshot_asks), max(args.n // 100, 10))
+        best_rate = _rate(lambda: (book.best_bid(), book.best_ask()), args.n)
+        depth_rate = _rate(lambda: book.depth(20), args.n // 10)
+        memory = _memory(factory, updates)
+        print(
+            f'{name:<20}{update_rate:>14,.0f}{snapshot_rate:>12,.0f}{best_rate:>14,.0f}{depth_rate:>14,.0f}'
+            f'{memory / 1024:>12,.1f}'
+        )
+
+    dict_book, array_book = books.values()
+    assert dict_book.depth(50) == array_book.depth(50), '두 book의 호가가 다릅니다.'
+
+    # VWAP / 누적 금액은 ArrayBook만 제공
+    best_ask = array_book.best_ask()
+    if best_ask is not None:
+        qty = sum(q for _, q in array_book.asks.depth(10))
+        notional = qty * best_ask[0]
+        vwap_rate = _rate(lambda: array_book.vwap('buy', qty), args.n // 10)
+        notional_rate = _rate(lambda: array_book.depth_to_notional('buy', notional), args.n // 10)
+        print(f'ArrayBook vwap({qty:.3f})/s {vwap_rate:,.0f}, depth_to_notional({notional:,.0f})/s {notional_rate:,.0f}')
+
+    far_levels(books, args.tick, args.n)
+
+
+def far_levels(books: dict, tick: float, n: int) -> None:
+    """ 최우선 호가에서 아주 먼 호가(ex. 20배 가격의 매도, 1 tick 가격의 매수)가 들어와도 ArrayBook의 메모리가 늘지 않는지 확인 """
+    dict_book, array_book = books.values()
+    best_ask = array_book.best_ask()
+    if best_ask is None:
+        return
+    nbytes = array_book.nbytes
+    far_bids = [(f'{tick:f}', '1')]
+    far_asks = [(f'{best_ask[0] * 20:f}', '1')]
+    for book in (dict_book, array_book):
+        book.apply_delta(far_bids, far_asks)
+    assert dict_book.depth(50) == array_book.depth(50), '두 book의 호가가 다릅니다.'
+    assert len(dict_book.bids) == len(array_book.bids) and len(dict_book.asks) == len(array_book.asks)
+
+    best_rate = _rate(lambda: (array_book.best_bid(), array_book.best_ask()), n)
+    depth_rate = _rate(lambda: array_book.depth(20), n // 10)
+    print(
+        f'far levels (ask {far_asks[0][0]}, bid {far_bids[0][0]}): ArrayBook {nbytes / 1024:,.1f} -> {array_book.nbytes / 1024:,.1f} KiB, '
+        f'best/s {best_rate:,.0f}, depth20/s {depth_rate:,.0f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
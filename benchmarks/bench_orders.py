@@ -0,0 +1,127 @@
+""" 미체결 주문 목록의 parse 시간과 메모리 (원본 dict vs orders.Order vs orders.OrderColumns)
+
+    python -m benchmarks.bench_orders
+    python -m benchmarks.bench_orders -n 20000
+
+응답 bytes에서 시작해서
+- dict    : decode한 원본 dict를 그대로 보관 (query_open_order의 현재 반환 형식, instrument_type만 추가)
+- Order   : decode 후 `parse_orders`로 변환하고 원본은 버림
+- columns : decode 후 `OrderColumns.from_raw`로 변환하고 원본은 버림
+메모리는 변환 결과가 붙잡고 있는 크기 (tracemalloc 기준, 응답 bytes 제외)
+"""
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from api_quant import serialization
+from api_quant.orders import OrderColumns, parse_orders
+
+
+def binance_orders(n: int) -> list[dict]:
+    return [{
+        'orderId': 8_389_765_000 + i, 'symbol': 'BTCUSDT', 'status': 'NEW', 'clientOrderId': f'web_{i:016x}',
+        'price': f'{60_000 + i * 0.1:.1f}', 'avgPrice': '0.00000', 'origQty': '0.010', 'executedQty': '0',
+        'cumQuote': '0.00000', 'timeInForce': 'GTC', 'type': 'LIMIT', 'reduceOnly': False, 'closePosition': False,
+        'side': 'SELL' if i % 2 else 'BUY', 'positionSide': 'BOTH', 'stopPrice': '0', 'workingType': 'CONTRACT_PRICE',
+        'priceProtect': False, 'origType': 'LIMIT', 'priceMatch': 'NONE', 'selfTradePreventionMode': 'EXPIRE_MAKER',
+        'goodTillDate': 0, 'time': 1_700_000_000_000 + i, 'updateTime': 1_700_000_000_000 + i,
+    } for i in range(n)]
+
+
+def bybit_orders(n: int) -> list[dict]:
+    return [{
+        'orderId': f'1c9b7a5e-{i:04x}-4c3b-9d1e-7f2a0b6c{i:04x}', 'orderLinkId': '', 'blockTradeId': '',
+        'symbol': 'BTCUSDT', 'price': f'{60_000 + i * 0.1:.1f}', 'qty': '0.010', 'side': 'Buy' if i % 2 else 'Sell',
+        'isLeverage': '', 'positionIdx': 0, 'orderStatus': 'New', 'cancelType': 'UNKNOWN', 'rejectReason': 'EC_NoError',
+        'avgPrice': '0', 'leavesQty': '0.010', 'leavesValue': '600', 'cumExecQty': '0', 'cumExecValue': '0',
+        'cumExecFee': '0', 'timeInForce': 'GTC', 'orderType': 'Limit', 'stopOrderType': '', 'orderIv': '',
+        'triggerPrice': '0', 'takeProfit': '0', 'stopLoss': '0', 'tpTriggerBy': '', 'slTriggerBy': '',
+        'triggerDirection': 0, 'triggerBy': '', 'lastPriceOnCreated': '60000', 'reduceOnly': False,
+        'closeOnTrigger': False, 'smpType': 'None', 'smpGroup': 0, 'smpOrderId': '', 'tpslMode': '',
+        'createdTime': str(1_700_000_000_000 + i), 'updatedTime': str(1_700_000_000_000 + i),
+    } for i in range(n)]
+
+
+def okx_orders(n: int) -> list[dict]:
+    return [{
+        'instType': 'SWAP', 'instId': 'BTC-USDT-SWAP', 'ordId': str(650_000_000_000_000_000 + i), 'clOrdId': '',
+        'px': f'{60_000 + i * 0.1:.1f}', 'sz': '12', 'ordType': 'limit', 'side': 'buy', 'posSide': 'net',
+        'tdMode': 'cross', 'accFillSz': '0', 'fillPx': '', 'avgPx': '', 'state': 'live', 'lever': '10',
+        'fee': '0', 'feeCcy': 'USDT', 'rebate': '0', 'category': 'normal', 'uTime': str(1_700_000_000_000 + i),
+        'cTime': str(1_700_000_000_000 + i),
+    } for i in range(n)]
+
+
+def upbit_orders(n: int) -> list[dict]:
+    return [{
+        'uuid': f'9ca023a5-851b-4fec-9f0a-{i:012x}', 'side': 'bid' if i % 2 else 'ask', 'ord_type': 'limit',
+        'price': str(80_000_000 + i * 1000), 'state': 'wait', 'market': 'KRW-BTC',
+        'created_at': '2024-01-01T09:00:00+09:00', 'volume': '0.01', 'remaining_volume': '0.01',
+        'reserved_fee': '400', 'remaining_fee': '400', 'paid_fee': '0', 'locked': '800400',
+        'executed_volume': '0', 'trades_count': 0,
+    } for i in range(n)]
+
+
+VENUES = {
+    'bnc': binance_orders,
+    'byb': bybit_orders,
+    'okx': okx_orders,
+    'upt': upbit_orders,
+}
+
+
+def as_dicts(exchange: str, raw: bytes) -> Any:
+    orders = serialization.loads(raw)
+    for order in orders:
+        order['instrument_type'] = 'perp'
+    return orders
+
+
+def as_orders(exchange: str, raw: bytes) -> Any:
+    return parse_orders(exchange, serialization.loads(raw), 'perp')
+
+
+def as_columns(exchange: str, raw: bytes) -> Any:
+    return OrderColumns.from_raw(exchange, serialization.loads(raw), 'perp')
+
+
+def _parse_ms(build: Callable[[str, bytes], Any], exchange: str, raw: bytes, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        build(exchange, raw)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def _retained_bytes(build: Callable[[str, bytes], Any], exchange: str, raw: bytes) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(exchange, raw)
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=5000, help='거래소 별 주문 수')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{"":<6}{"":<9}{"parse":>10}{"memory":>12}{"per order":>11}')
+    for exchange, make in VENUES.items():
+        raw = serialization.dumps(make(args.n))
+        for name, build in (('dict', as_dicts), ('Order', as_orders), ('columns', as_columns)):
+            ms = _parse_ms(build, exchange, raw, args.repeat)
+            size = _retained_bytes(build, exchange, raw)
+            print(f'{exchange:<6}{name:<9}{ms:>8.2f}ms{size / 1024:>10,.0f}KB{size / args.n:>10,.0f}B')
+
+
+if __name__ == '__main__':
+    main()
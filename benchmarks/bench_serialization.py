@@ -0,0 +1,134 @@
+""" 주문 body encode / 미체결 주문 응답 decode 시간 (표준 json vs api_quant.serialization)
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization -n 20000 --open-orders 500
+
+encode
+- json x2     : 이전 방식 (서명용 `json.dumps(body)` + requests의 `json=body`가 다시 serialize)
+- json        : 표준 json으로 한 번만 serialize (orjson이 없을 때의 serialization.dumps)
+- serialization : serialization.dumps (orjson이 있으면 orjson)
+decode
+- json        : requests `Response.json()` / aiohttp `res.json()`의 기본
+- serialization : serialization.loads
+"""
+import argparse
+import json
+import statistics
+import time
+from typing import Any, Callable
+
+from api_quant import serialization
+from api_quant.okx import request_body
+
+OKX_ORDER = {
+    'instId': 'BTC-USDT-SWAP',
+    'tdMode': 'cross',
+    'side': 'buy',
+    'ordType': 'limit',
+    'sz': '12',
+    'px': '61234.5',
+    'clOrdId': 'b7c1f0e4a9d24c7e',
+}
+
+
+def binance_open_order(i: int) -> dict:
+    return {
+        'orderId': 8_389_765_000 + i,
+        'symbol': 'BTCUSDT',
+        'status': 'NEW',
+        'clientOrderId': f'web_{i:016x}',
+        'price': f'{60_000 + i * 0.1:.1f}',
+        'avgPrice': '0.00000',
+        'origQty': '0.010',
+        'executedQty': '0',
+        'cumQuote': '0.00000',
+        'timeInForce': 'GTC',
+        'type': 'LIMIT',
+        'reduceOnly': False,
+        'closePosition': False,
+        'side': 'SELL' if i % 2 else 'BUY',
+        'positionSide': 'BOTH',
+        'stopPrice': '0',
+        'workingType': 'CONTRACT_PRICE',
+        'priceProtect': False,
+        'origType': 'LIMIT',
+        'priceMatch': 'NONE',
+        'selfTradePreventionMode': 'EXPIRE_MAKER',
+        'goodTillDate': 0,
+        'time': 1_700_000_000_000 + i,
+        'updateTime': 1_700_000_000_000 + i,
+    }
+
+
+def okx_open_orders_response(n: int) -> dict:
+    return {'code': '0', 'msg': '', 'data': [
+        {
+            'instType': 'SWAP', 'instId': 'BTC-USDT-SWAP', 'ordId': str(650_000_000_000_000_000 + i), 'clOrdId': '',
+            'px': f'{60_000 + i * 0.1:.1f}', 'sz': '12', 'ordType': 'limit', 'side': 'buy', 'posSide': 'net',
+            'tdMode': 'cross', 'accFillSz': '0', 'fillPx': '', 'avgPx': '', 'state': 'live', 'lever': '10',
+            'fee': '0', 'feeCcy': 'USDT', 'rebate': '0', 'category': 'normal', 'uTime': str(1_700_000_000_000 + i),
+            'cTime': str(1_700_000_000_000 + i),
+        }
+        for i in range(n)
+    ]}
+
+
+def _measure(fn: Callable[[], Any], n: int) -> float:
+    """ 한 번 호출하는 데 걸린 시간의 중앙값 (µs, 100번씩 묶어서 측정) """
+    fn()
+    batch = 100
+    samples = []
+    for _ in range(max(1, n // batch)):
+        t0 = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        samples.append((time.perf_counter() - t0) / batch * 1_000_000)
+    return statistics.median(samples)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def bench_encode(name: str, params: Any, n: int) -> None:
+    def json_twice():
+        body = request_body(params)
+        json.dumps(body)
+        json.dumps(body).encode()
+
+    def json_once():
+        _stdlib_dumps(request_body(params))
+
+    def fast_once():
+        serialization.dumps(request_body(params))
+
+    results = [(label, _measure(fn, n)) for label, fn in (
+        ('json x2', json_twice), ('json', json_once), (f'serialization ({serialization.BACKEND})', fast_once)
+    )]
+    print(f'encode {name:<30}' + ''.join(f'{label} {us:8.2f}µs   ' for label, us in results))
+
+
+def bench_decode(name: str, payload: Any, n: int) -> None:
+    raw = _stdlib_dumps(payload)
+    results = [(label, _measure(fn, n)) for label, fn in (
+        ('json', lambda: json.loads(raw)),
+        (f'serialization ({serialization.BACKEND})', lambda: serialization.loads(raw)),
+    )]
+    print(f'decode {name:<30}' + ''.join(f'{label} {us:8.2f}µs   ' for label, us in results) + f'({len(raw):,} bytes)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=5000)
+    parser.add_argument('--open-orders', type=int, default=200, help='미체결 주문 응답에 들어 있는 주문 수')
+    args = parser.parse_args()
+
+    bench_encode('okx order', OKX_ORDER, args.n)
+    bench_encode('okx batch (20 orders)', [dict(OKX_ORDER, clOrdId=f'b{i}') for i in range(20)], args.n)
+    bench_decode('okx order response', {'code': '0', 'msg': '', 'data': [{'ordId': '650000000000000001', 'clOrdId': '', 'sCode': '0', 'sMsg': ''}]}, args.n)
+    bench_decode(f'bnc openOrders ({args.open_orders})', [binance_open_order(i) for i in range(args.open_orders)], max(100, args.n // 50))
+    bench_decode(f'okx orders-pending ({args.open_orders})', okx_open_orders_response(args.open_orders), max(100, args.n // 50))
+
+
+if __name__ == '__main__':
+    main()
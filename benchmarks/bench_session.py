@@ -0,0 +1,61 @@
+""" Cold (connection per request) vs warm (pooled session) round-trip latency
+
+    python -m benchmarks.bench_session
+    python -m benchmarks.bench_session --url https://api.binance.com --endpoint /api/v3/ping
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from api_quant import binance
+from benchmarks.stub_server import StubServer
+
+
+def _report(name: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f'{name:<6} n={len(samples):<5} mean={statistics.mean(samples):8.3f}ms  '
+          f'p50={statistics.median(samples):8.3f}ms  p99={p99:8.3f}ms')
+
+
+def bench_cold(base_url: str, endpoint: str, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        requests.request(method='get', url=base_url + endpoint).close()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def bench_warm(base_url: str, endpoint: str, n: int) -> list[float]:
+    samples = []
+    with binance.BaseApiClient(('', ''), base_url) as client:
+        # 첫 요청으로 connection을 미리 열어둠
+        client.get(endpoint)
+        for _ in range(n):
+            t0 = time.perf_counter()
+            client.get(endpoint)
+            samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default=None, help='기본값은 로컬 stub server')
+    parser.add_argument('--endpoint', default='/api/v3/ping')
+    parser.add_argument('-n', type=int, default=500)
+    args = parser.parse_args()
+
+    if args.url is None:
+        with StubServer() as server:
+            _report('cold', bench_cold(server.base_url, args.endpoint, args.n))
+            _report('warm', bench_warm(server.base_url, args.endpoint, args.n))
+    else:
+        _report('cold', bench_cold(args.url, args.endpoint, args.n))
+        _report('warm', bench_warm(args.url, args.endpoint, args.n))
+
+
+if __name__ == '__main__':
+    main()
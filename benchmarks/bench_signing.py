@@ -0,0 +1,69 @@
+""" HMAC signing throughput per exchange scheme (naive `hmac.new` vs cached HmacSigner)
+
+    python -m benchmarks.bench_signing
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import urlencode
+
+from api_quant.signer import HmacSigner
+
+SECRET = 'NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j'
+ORDER = {
+    'symbol': 'BTCUSDT',
+    'side': 'BUY',
+    'type': 'LIMIT',
+    'timeInForce': 'GTC',
+    'quantity': '0.015',
+    'price': '18000.5',
+    'timestamp': 1665000000000,
+}
+
+
+def _schemes() -> dict[str, tuple[str, str]]:
+    """ scheme 이름 -> (메시지, 출력 형식) """
+    query_string = urlencode(ORDER)
+    sorted_query = '&'.join(f'{k}={v}' for k, v in sorted(ORDER.items()))
+    return {
+        'binance / mexc / wise (query, hex)': (query_string, 'hex'),
+        'bybit v5 GET (prehash, hex)': (f'1665000000000key5000{query_string}', 'hex'),
+        'bybit v5 POST (prehash, hex)': (f'1665000000000key5000{json.dumps(ORDER)}', 'hex'),
+        'bybit v2 (sorted query, hex)': (sorted_query, 'hex'),
+        'okx (prehash, base64)': (f'2022-10-05T20:00:00.000ZPOST/api/v5/trade/order{json.dumps(ORDER)}', 'b64'),
+    }
+
+
+def _naive(msg: str, fmt: str) -> str:
+    h = hmac.new(SECRET.encode(), msg=msg.encode(), digestmod=hashlib.sha256)
+    return h.hexdigest() if fmt == 'hex' else base64.b64encode(h.digest()).decode()
+
+
+def _rate(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=200_000)
+    args = parser.parse_args()
+
+    signer = HmacSigner(SECRET)
+    print(f'{"scheme":<38}{"naive sig/s":>14}{"cached sig/s":>14}{"speedup":>9}')
+    for name, (msg, fmt) in _schemes().items():
+        cached = signer.hexdigest if fmt == 'hex' else signer.b64digest
+        assert cached(msg) == _naive(msg, fmt)
+
+        naive_rate = _rate(lambda: _naive(msg, fmt), args.n)
+        cached_rate = _rate(lambda: cached(msg), args.n)
+        print(f'{name:<38}{naive_rate:>14,.0f}{cached_rate:>14,.0f}{cached_rate / naive_rate:>8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
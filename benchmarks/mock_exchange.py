@@ -0,0 +1,975 @@
+""" 거래소 REST API를 흉내 내는 로컬 mock server (Binance spot / USDⓢ-M futures, Bybit v5, OKX v5, Upbit을 한 port에서)
+
+    python -m benchmarks.mock_exchange --port 8080 --latency-ms 2 --error-rate 0.01 --rate-limit-rate 0.01
+    API_BASE_URL=http://127.0.0.1:8080 python query_open_order.py ...     # script 요청을 mock으로 보냄
+
+    with MockExchange(latency_ms=1) as mock:            # background thread에서 실행 (test / benchmark)
+        api_trading_script.use_clients(**mock.clients())
+
+    async with MockExchange() as mock:                  # 이미 돌고 있는 event loop에서 실행
+        ...
+
+- 서명(HMAC)과 Upbit JWT를 거래소와 같은 방식(실제로 받은 query string / body 기준)으로 검증하고,
+  틀리면 거래소와 같은 형식의 오류를 반환
+- 주문은 메모리의 order book에 보관: 시장가와 기준 가격(`prices`)에 닿는 지정가는 바로 체결되고 나머지는 미체결로 남음
+- 지연(`latency_ms` ± `jitter_ms`), 5xx 오류(`error_rate`), 429(`rate_limit_rate`)를 확률로 주입하고,
+  `fail_next`로 다음 n개 요청을 정해진 status로 실패시킴
+- 요청 수는 `request_counts`에 (거래소, method path) 별로 쌓임
+"""
+import argparse
+import asyncio
+import base64
+import datetime
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from urllib.parse import parse_qsl, unquote
+
+from aiohttp import web
+
+from api_quant.background import BackgroundLoop
+
+MOCK_KEY_PAIR = ('mock-api-key', 'mock-secret-key')
+MOCK_PASSPHRASE = 'mock-passphrase'
+
+# 기준 가격 (base asset -> quote 가격), 시장가 주문의 체결 가격이자 지정가 주문의 즉시 체결 기준
+DEFAULT_PRICES = {'BTC': Decimal('60000'), 'ETH': Decimal('3000'), 'XRP': Decimal('0.5')}
+UPBIT_QUOTE = 'KRW'
+UPBIT_KRW_RATE = Decimal('1400')
+
+# 서명에 들어 있는 timestamp가 서버 시간과 이만큼 넘게 차이 나면 거부 (OKX는 30초)
+OKX_TIMESTAMP_TOLERANCE_MS = 30_000
+
+
+@dataclass
+class MockOrder:
+    exchange: str
+    instrument_type: str
+    symbol: str
+    order_id: str
+    side: str  # 'buy' / 'sell'
+    order_type: str  # 'limit' / 'market'
+    qty: Decimal
+    price: Decimal | None
+    client_order_id: str = ''
+    filled_qty: Decimal = Decimal(0)
+    status: str = 'open'  # 'open' / 'filled' / 'canceled'
+    created_ms: int = field(default_factory=lambda: int(time.time() * 1000))
+    updated_ms: int = field(default_factory=lambda: int(time.time() * 1000))
+
+
+class MockError(Exception):
+    """ handler에서 거래소 형식의 오류 응답을 돌려줄 때 사용 """
+    def __init__(self, status: int, body):
+        super().__init__(body)
+        self.status = status
+        self.body = body
+
+
+class OrderBookStore:
+    """ 거래소 별 주문 (미체결 + 최근 체결/취소), 모든 handler가 같은 event loop에서 호출하므로 lock 없음 """
+    def __init__(self, prices: dict[str, Decimal]):
+        self._prices = prices
+        self._orders: dict[str, dict[str, MockOrder]] = {}
+        self._ids = itertools.count(10_000_001)
+
+    def next_id(self, exchange: str) -> str:
+        if exchange == 'upt':
+            return str(uuid.uuid4())
+        return str(next(self._ids))
+
+    def reference_price(self, base: str, quote: str = 'USDT') -> Decimal:
+        price = self._prices.get(base.upper(), Decimal(100))
+        return price * UPBIT_KRW_RATE if quote.upper() == 'KRW' else price
+
+    def place(self, order: MockOrder, base: str, quote: str = 'USDT') -> MockOrder:
+        reference = self.reference_price(base, quote)
+        if order.order_type == 'market':
+            order.price = reference if order.price is None else order.price
+            order.filled_qty, order.status = order.qty, 'filled'
+        elif (order.side == 'buy' and order.price >= reference) or (order.side == 'sell' and order.price <= reference):
+            order.filled_qty, order.status = order.qty, 'filled'
+        self._orders.setdefault(order.exchange, {})[order.order_id] = order
+        return order
+
+    def get(self, exchange: str, order_id: str) -> MockOrder | None:
+        return self._orders.get(exchange, {}).get(str(order_id))
+
+    def find(self, exchange: str, order_id: str | None = None, client_order_id: str | None = None) -> MockOrder | None:
+        if order_id:
+            return self.get(exchange, order_id)
+        if client_order_id:
+            for order in self._orders.get(exchange, {}).values():
+                if order.client_order_id == client_order_id:
+                    return order
+        return None
+
+    def cancel(self, order: MockOrder) -> MockOrder:
+        order.status, order.updated_ms = 'canceled', int(time.time() * 1000)
+        return order
+
+    def open_orders(
+            self,
+            exchange: str,
+            instrument_type: str | None = None,
+            symbol: str | None = None,
+    ) -> list[MockOrder]:
+        return [
+            order for order in self._orders.get(exchange, {}).values()
+            if order.status == 'open'
+            and (instrument_type is None or order.instrument_type == instrument_type)
+            and (symbol is None or order.symbol == symbol)
+        ]
+
+    def clear(self) -> None:
+        self._orders.clear()
+
+
+def _decimal(v) -> Decimal | None:
+    if v is None or v == '' or v == 'None':
+        return None
+    return Decimal(str(v))
+
+
+def _fmt(v: Decimal | None) -> str:
+    return '0' if v is None else format(v.normalize(), 'f')
+
+
+def mock_clients(
+        base_url: str,
+        key_pair: tuple[str, str] = MOCK_KEY_PAIR,
+        passphrase: str = MOCK_PASSPHRASE,
+        pool_config=None,
+        rate_limited: bool = True,
+) -> dict:
+    """ mock(`base_url`)을 바라보는 거래소 client, key는 api_trading_script.use_clients에 그대로 넘길 수 있는 이름
+
+        `rate_limited=False`면 client-side rate limiter가 기다리지 않음 (client 자체의 비용만 재는 benchmark 용)
+    """
+    from api_quant import binance, bybit, okx, upbit
+    from api_quant.ratelimit import RateLimiter
+
+    limiter = (lambda: None) if rate_limited else (lambda: RateLimiter([]))
+    return {
+        'bnc_futures': binance.FuturesApiClient(key_pair, pool_config, limiter(), base_url=base_url),
+        'bnc_spot': binance.SpotApiClient(key_pair, pool_config, limiter(), base_url=base_url),
+        'byb': bybit.ApiClient(key_pair, base_url, pool_config, limiter()),
+        'okx': okx.ApiClient(key_pair, passphrase, base_url, pool_config=pool_config, rate_limiter=limiter()),
+        'upt': upbit.ApiClient(key_pair, base_url, pool_config, limiter()),
+    }
+
+
+class MockExchange:
+    """ Binance / Bybit / OKX / Upbit REST mock (한 port, path로 거래소를 구분) """
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            key_pair: tuple[str, str] = MOCK_KEY_PAIR,
+            passphrase: str = MOCK_PASSPHRASE,
+            latency_ms: float = 0.0,
+            jitter_ms: float = 0.0,
+            error_rate: float = 0.0,
+            rate_limit_rate: float = 0.0,
+            retry_after: float = 1.0,
+            prices: dict[str, Decimal] | None = None,
+            seed: int | None = None,
+    ):
+        self._host = host
+        self._port = port
+        self.key_pair = key_pair
+        self.passphrase = passphrase
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.prices = dict(DEFAULT_PRICES if prices is None else prices)
+        self.store = OrderBookStore(self.prices)
+        self.request_counts: Counter = Counter()
+
+        self._rng = random.Random(seed)
+        # (status, 거래소 또는 None) 목록, 앞에서부터 요청 하나에 하나씩 사용
+        self._failures: list[tuple[int, str | None]] = []
+        # (거래소, limit 이름, window 시작) -> 요청 수 (rate limit header 용)
+        self._windows: Counter = Counter()
+        self._runner: web.AppRunner | None = None
+        self._loop: BackgroundLoop | None = None
+        self.base_url = ''
+
+        self._routes = {}
+        self._add_binance_routes()
+        self._add_bybit_routes()
+        self._add_okx_routes()
+        self._add_upbit_routes()
+
+    #######################
+    # 실행
+    #######################
+
+    async def start(self) -> 'MockExchange':
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', self._dispatch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        self.base_url = f'http://{self._host}:{self._runner.addresses[0][1]}'
+        return self
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'MockExchange':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    def __enter__(self) -> 'MockExchange':
+        self._loop = BackgroundLoop('mock-exchange')
+        return self._loop.run(self.start())
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._loop.run(self.stop())
+        self._loop.stop()
+        self._loop = None
+
+    def clients(self, pool_config=None, rate_limited: bool = True) -> dict:
+        """ 이 mock을 바라보는 거래소 client (`mock_clients` 참고) """
+        return mock_clients(self.base_url, self.key_pair, self.passphrase, pool_config, rate_limited)
+
+    def fail_next(self, count: int = 1, status: int = 429, exchange: str | None = None) -> None:
+        """ 다음 `count`개 요청(`exchange`를 주면 그 거래소 요청만)을 `status`로 실패시킴 """
+        self._failures.extend([(status, exchange)] * count)
+
+    def reset(self) -> None:
+        self.store.clear()
+        self.request_counts.clear()
+        self._failures.clear()
+
+    #######################
+    # 공통 처리
+    #######################
+
+    def _route(self, exchange: str, method: str, path: str, signed: bool = True):
+        def register(handler):
+            self._routes[(method, path)] = (exchange, signed, handler)
+            return handler
+        return register
+
+    async def _dispatch(self, request: web.Request) -> web.Response:
+        method, path = request.method, request.path
+        route = self._routes.get((method, path))
+        if route is None:
+            return web.json_response({'error': f'mock에 없는 endpoint입니다. ({method} {path})'}, status=404)
+        exchange, signed, handler = route
+        self.request_counts[(exchange, f'{method} {path}')] += 1
+        raw_body = await request.read()
+
+        if self.latency_ms or self.jitter_ms:
+            delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+            await asyncio.sleep(max(delay, 0) / 1000)
+
+        status = self._injected_status(exchange)
+        if status is not None:
+            return self._fault_response(exchange, status)
+
+        try:
+            if signed:
+                self._authenticate(exchange, request, raw_body)
+            params = self._params(exchange, request, raw_body)
+            body = handler(params)
+            status = 200
+        except MockError as e:
+            body, status = e.body, e.status
+        return web.json_response(body, status=status, headers=self._limit_headers(exchange, method, path))
+
+    def _injected_status(self, exchange: str) -> int | None:
+        for i, (status, target) in enumerate(self._failures):
+            if target is None or target == exchange:
+                del self._failures[i]
+                return status
+        if self.rate_limit_rate and self._rng.random() < self.rate_limit_rate:
+            return 429
+        if self.error_rate and self._rng.random() < self.error_rate:
+            return 503
+        return None
+
+    def _fault_response(self, exchange: str, status: int) -> web.Response:
+        if status == 429:
+            body = {
+                'bnc': {'code': -1003, 'msg': 'Too many requests; please use the websocket for live updates.'},
+                'byb': {'retCode': 10006, 'retMsg': 'Too many visits!', 'result': {}, 'retExtInfo': {}},
+                'okx': {'code': '50011', 'msg': 'Too Many Requests', 'data': []},
+                'upt': {'error': {'name': 'too_many_requests', 'message': 'Too many API requests.'}},
+            }[exchange]
+            return web.json_response(body, status=429, headers={'Retry-After': str(self.retry_after)})
+        body = {
+            'bnc': {'code': -1001, 'msg': 'Internal error; unable to process your request. Please try again.'},
+            'byb': {'retCode': 10016, 'retMsg': 'Server error.', 'result': {}, 'retExtInfo': {}},
+            'okx': {'code': '50001', 'msg': 'Service temporarily unavailable. Please try again later.', 'data': []},
+            'upt': {'error': {'name': 'server_error', 'message': 'Service unavailable.'}},
+        }[exchange]
+        return web.json_response(body, status=status)
+
+    def _count(self, exchange: str, name: str, window: float) -> int:
+        key = (exchange, name, int(time.time() // window))
+        self._windows[key] += 1
+        return self._windows[key]
+
+    def _limit_headers(self, exchange: str, method: str, path: str) -> dict[str, str]:
+        """ 거래소가 보내는 사용량 header (api_quant.ratelimit의 header parser가 읽는 것만) """
+        if exchange == 'bnc':
+            return {'X-MBX-USED-WEIGHT-1M': str(self._count(exchange, path.split('/')[1], 60))}
+        if exchange == 'byb':
+            from api_quant.ratelimit import BYBIT_ENDPOINT_LIMITS
+
+            limit = BYBIT_ENDPOINT_LIMITS.get(path)
+            if limit is None:
+                return {}
+            return {'X-Bapi-Limit-Status': str(max(limit - self._count(exchange, path, 1), 0)), 'X-Bapi-Limit': str(limit)}
+        if exchange == 'upt':
+            group = 'order' if (method, path) == ('POST', '/v1/orders') else 'default'
+            limit = 8 if group == 'order' else 30
+            remaining = max(limit - self._count(exchange, group, 1), 0)
+            return {'Remaining-Req': f'group={group}; min=1800; sec={remaining}'}
+        return {}
+
+    def _params(self, exchange: str, request: web.Request, raw_body: bytes):
+        query = dict(parse_qsl(request.rel_url.raw_query_string, keep_blank_values=True))
+        query.pop('signature', None)
+        if exchange in ('byb', 'okx') and request.method != 'GET':
+            return json.loads(raw_body) if raw_body else {}
+        return query
+
+    #######################
+    # 인증
+    #######################
+
+    def _secret(self, exchange: str, api_key: str | None) -> str:
+        if api_key != self.key_pair[0]:
+            raise {
+                'bnc': MockError(401, {'code': -2015, 'msg': 'Invalid API-key, IP, or permissions for action.'}),
+                'byb': MockError(401, {'retCode': 10003, 'retMsg': 'API key is invalid.', 'result': {}, 'retExtInfo': {}}),
+                'okx': MockError(401, {'code': '50111', 'msg': 'Invalid OK-ACCESS-KEY', 'data': []}),
+                'upt': MockError(401, {'error': {'name': 'invalid_access_key', 'message': '잘못된 엑세스 키입니다.'}}),
+            }[exchange]
+        return self.key_pair[1]
+
+    def _authenticate(self, exchange: str, request: web.Request, raw_body: bytes) -> None:
+        getattr(self, f'_authenticate_{exchange}')(request, raw_body)
+
+    def _authenticate_bnc(self, request: web.Request, raw_body: bytes) -> None:
+        secret = self._secret('bnc', request.headers.get('X-MBX-APIKEY'))
+        # 서명은 signature를 뺀 query string 그대로(+ body)에 대해 계산
+        query_string, _, signature = request.rel_url.raw_query_string.partition('&signature=')
+        payload = query_string + raw_body.decode()
+        expected = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            raise MockError(400, {'code': -1022, 'msg': 'Signature for this request is not valid.'})
+
+        params = dict(parse_qsl(query_string))
+        timestamp, recv_window = int(params.get('timestamp', 0)), int(params.get('recvWindow', 5000))
+        now = int(time.time() * 1000)
+        if timestamp >= now + 1000 or now - timestamp > recv_window:
+            raise MockError(400, {'code': -1021, 'msg': 'Timestamp for this request is outside of the recvWindow.'})
+
+    def _authenticate_byb(self, request: web.Request, raw_body: bytes) -> None:
+        headers = request.headers
+        secret = self._secret('byb', headers.get('X-BAPI-API-KEY'))
+        timestamp, recv_window = headers.get('X-BAPI-TIMESTAMP', '0'), headers.get('X-BAPI-RECV-WINDOW', '5000')
+        payload = request.rel_url.raw_query_string if request.method == 'GET' else raw_body.decode()
+        prehash = f'{timestamp}{self.key_pair[0]}{recv_window}{payload}'
+        expected = hmac.new(secret.encode(), prehash.encode(), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, headers.get('X-BAPI-SIGN', '')):
+            raise MockError(401, {
+                'retCode': 10004,
+                'retMsg': f'error sign! origin_string[{prehash}]',
+                'result': {},
+                'retExtInfo': {},
+            })
+        now = int(time.time() * 1000)
+        if int(timestamp) >= now + 1000 or now - int(timestamp) > int(recv_window):
+            raise MockError(200, {
+                'retCode': 10002,
+                'retMsg': 'invalid request, please check your server timestamp or recv_window param',
+                'result': {},
+                'retExtInfo': {},
+            })
+
+    def _authenticate_okx(self, request: web.Request, raw_body: bytes) -> None:
+        headers = request.headers
+        secret = self._secret('okx', headers.get('OK-ACCESS-KEY'))
+        if headers.get('OK-ACCESS-PASSPHRASE') != self.passphrase:
+            raise MockError(401, {'code': '50105', 'msg': 'Your APIKey passphrase is incorrect.', 'data': []})
+
+        timestamp = headers.get('OK-ACCESS-TIMESTAMP', '')
+        request_path = request.rel_url.raw_path_qs
+        prehash = f'{timestamp}{request.method}{request_path}{raw_body.decode()}'
+        expected = base64.b64encode(hmac.new(secret.encode(), prehash.encode(), hashlib.sha256).digest()).decode()
+        if not hmac.compare_digest(expected, headers.get('OK-ACCESS-SIGN', '')):
+            raise MockError(401, {'code': '50113', 'msg': 'Invalid Sign', 'data': []})
+
+        try:
+            sent = datetime.datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            raise MockError(400, {'code': '50112', 'msg': 'Invalid OK-ACCESS-TIMESTAMP', 'data': []})
+        if abs(time.time() - sent.timestamp()) * 1000 > OKX_TIMESTAMP_TOLERANCE_MS:
+            raise MockError(400, {'code': '50102', 'msg': 'Timestamp request expired', 'data': []})
+
+    def _authenticate_upt(self, request: web.Request, raw_body: bytes) -> None:
+        authorization = request.headers.get('Authorization', '')
+        if not authorization.startswith('Bearer '):
+            raise MockError(401, {'error': {'name': 'jwt_verification', 'message': 'Jwt 토큰 검증에 실패했습니다.'}})
+        try:
+            header_segment, payload_segment, signature_segment = authorization[len('Bearer '):].split('.')
+            payload = json.loads(base64.urlsafe_b64decode(payload_segment + '=' * (-len(payload_segment) % 4)))
+        except ValueError:
+            raise MockError(401, {'error': {'name': 'jwt_verification', 'message': 'Jwt 토큰 검증에 실패했습니다.'}})
+
+        secret = self._secret('upt', payload.get('access_key'))
+        signing_input = f'{header_segment}.{payload_segment}'.encode()
+        expected = base64.urlsafe_b64encode(hmac.new(secret.encode(), signing_input, hashlib.sha256).digest())
+        if not hmac.compare_digest(expected.rstrip(b'=').decode(), signature_segment):
+            raise MockError(401, {'error': {'name': 'jwt_verification', 'message': 'Jwt 토큰 검증에 실패했습니다.'}})
+
+        # query hash는 decoding한 query string의 SHA512
+        query_string = request.rel_url.raw_query_string
+        if query_string:
+            query_hash = hashlib.sha512(unquote(query_string).encode()).hexdigest()
+            if payload.get('query_hash') != query_hash or payload.get('query_hash_alg', 'SHA512') != 'SHA512':
+                raise MockError(401, {'error': {'name': 'invalid_query_payload', 'message': 'query_hash가 일치하지 않습니다.'}})
+        elif 'query_hash' in payload:
+            raise MockError(401, {'error': {'name': 'invalid_query_payload', 'message': 'query_hash가 일치하지 않습니다.'}})
+
+    #######################
+    # Binance
+    #######################
+
+    @staticmethod
+    def _split_symbol(symbol: str) -> tuple[str, str]:
+        for quote in ('USDT', 'USDC', 'BTC'):
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return symbol[:-len(quote)], quote
+        raise MockError(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+
+    def _bnc_order(self, order: MockOrder) -> dict:
+        return {
+            'orderId': int(order.order_id),
+            'symbol': order.symbol,
+            'status': {'open': 'NEW', 'filled': 'FILLED', 'canceled': 'CANCELED'}[order.status],
+            'clientOrderId': order.client_order_id,
+            'price': _fmt(order.price) if order.order_type == 'limit' else '0',
+            'origQty': _fmt(order.qty),
+            'executedQty': _fmt(order.filled_qty),
+            'timeInForce': 'GTC',
+            'type': order.order_type.upper(),
+            'side': order.side.upper(),
+            'time': order.created_ms,
+            'updateTime': order.updated_ms,
+        }
+
+    def _bnc_place(self, instrument_type: str, params: dict) -> dict:
+        for name in ('symbol', 'side', 'type', 'quantity'):
+            if not params.get(name):
+                raise MockError(400, {'code': -1102, 'msg': f"Mandatory parameter '{name}' was not sent, was empty/null, or malformed."})
+        order_type = params['type'].lower()
+        price = _decimal(params.get('price'))
+        if order_type == 'limit' and price is None:
+            raise MockError(400, {'code': -1102, 'msg': "Mandatory parameter 'price' was not sent, was empty/null, or malformed."})
+        base, _ = self._split_symbol(params['symbol'])
+        order = MockOrder(
+            exchange='bnc',
+            instrument_type=instrument_type,
+            symbol=params['symbol'],
+            order_id=self.store.next_id('bnc'),
+            side=params['side'].lower(),
+            order_type=order_type,
+            qty=Decimal(params['quantity']),
+            price=price,
+            client_order_id=params.get('newClientOrderId') or uuid.uuid4().hex[:22],
+        )
+        return self._bnc_order(self.store.place(order, base))
+
+    def _bnc_find(self, instrument_type: str, params: dict) -> MockOrder:
+        order = self.store.find('bnc', params.get('orderId'), params.get('origClientOrderId'))
+        if order is None or order.instrument_type != instrument_type or order.status != 'open':
+            raise MockError(400, {'code': -2011, 'msg': 'Unknown order sent.'})
+        return order
+
+    def _add_binance_routes(self) -> None:
+        for instrument_type, prefix in (('perp', '/fapi/v1'), ('spot', '/api/v3')):
+            route = (lambda p: lambda method, path, signed=True: self._route('bnc', method, p + path, signed))(prefix)
+            self._add_binance_instrument_routes(instrument_type, prefix, route)
+
+    def _add_binance_instrument_routes(self, instrument_type: str, prefix: str, route) -> None:
+        @route('GET', '/time', signed=False)
+        def server_time(params):
+            return {'serverTime': int(time.time() * 1000)}
+
+        @route('GET', '/exchangeInfo', signed=False)
+        def exchange_info(params):
+            symbols = []
+            for base in self.prices:
+                row = {
+                    'symbol': f'{base}USDT',
+                    'status': 'TRADING',
+                    'baseAsset': base,
+                    'quoteAsset': 'USDT',
+                    'filters': [
+                        {'filterType': 'PRICE_FILTER', 'tickSize': '0.01'},
+                        {'filterType': 'LOT_SIZE', 'stepSize': '0.001'},
+                        {'filterType': 'MIN_NOTIONAL' if instrument_type == 'perp' else 'NOTIONAL', 'notional': '5'},
+                    ],
+                }
+                if instrument_type == 'perp':
+                    row['contractType'] = 'PERPETUAL'
+                symbols.append(row)
+            return {'timezone': 'UTC', 'serverTime': int(time.time() * 1000), 'symbols': symbols}
+
+        @route('POST', '/order')
+        def place(params):
+            return self._bnc_place(instrument_type, params)
+
+        @route('DELETE', '/order')
+        def cancel(params):
+            return self._bnc_order(self.store.cancel(self._bnc_find(instrument_type, params)))
+
+        @route('GET', '/openOrders')
+        def open_orders(params):
+            return [self._bnc_order(o) for o in self.store.open_orders('bnc', instrument_type, params.get('symbol'))]
+
+        @route('POST', '/listenKey' if instrument_type == 'perp' else '/userDataStream', signed=False)
+        def listen_key(params):
+            return {'listenKey': uuid.uuid4().hex}
+
+        if instrument_type == 'spot':
+            @route('DELETE', '/openOrders')
+            def cancel_all_spot(params):
+                if not params.get('symbol'):
+                    raise MockError(400, {'code': -1102, 'msg': "Mandatory parameter 'symbol' was not sent, was empty/null, or malformed."})
+                return [self._bnc_order(self.store.cancel(o)) for o in self.store.open_orders('bnc', 'spot', params['symbol'])]
+            return
+
+        @route('PUT', '/order')
+        def amend(params):
+            order = self._bnc_find('perp', params)
+            order.qty, order.price = Decimal(params['quantity']), Decimal(params['price'])
+            order.updated_ms = int(time.time() * 1000)
+            return self._bnc_order(order)
+
+        @route('DELETE', '/allOpenOrders')
+        def cancel_all(params):
+            for order in self.store.open_orders('bnc', 'perp', params.get('symbol')):
+                self.store.cancel(order)
+            return {'code': 200, 'msg': 'The operation of cancel all open order is done.'}
+
+        @route('POST', '/batchOrders')
+        def place_batch(params):
+            results = []
+            for p in json.loads(params['batchOrders']):
+                try:
+                    results.append(self._bnc_place('perp', p))
+                except MockError as e:
+                    results.append(e.body)
+            return results
+
+        @route('DELETE', '/batchOrders')
+        def cancel_batch(params):
+            results = []
+            for order_id in json.loads(params['orderIdList']):
+                try:
+                    results.append(self._bnc_order(self.store.cancel(self._bnc_find('perp', {'orderId': str(order_id)}))))
+                except MockError as e:
+                    results.append(e.body)
+            return results
+
+    #######################
+    # Bybit
+    #######################
+
+    @staticmethod
+    def _byb_ok(result, ext=None) -> dict:
+        return {'retCode': 0, 'retMsg': 'OK', 'result': result, 'retExtInfo': ext or {}, 'time': int(time.time() * 1000)}
+
+    @staticmethod
+    def _byb_error(code: int, msg: str) -> MockError:
+        return MockError(200, {'retCode': code, 'retMsg': msg, 'result': {}, 'retExtInfo': {}, 'time': int(time.time() * 1000)})
+
+    def _byb_order(self, order: MockOrder) -> dict:
+        return {
+            'orderId': order.order_id,
+            'orderLinkId': order.client_order_id,
+            'symbol': order.symbol,
+            'side': order.side.capitalize(),
+            'orderType': order.order_type.capitalize(),
+            'price': _fmt(order.price) if order.order_type == 'limit' else '0',
+            'qty': _fmt(order.qty),
+            'cumExecQty': _fmt(order.filled_qty),
+            'orderStatus': {'open': 'New', 'filled': 'Filled', 'canceled': 'Cancelled'}[order.status],
+            'timeInForce': 'GTC',
+            'createdTime': str(order.created_ms),
+            'updatedTime': str(order.updated_ms),
+        }
+
+    def _byb_place(self, category: str, params: dict) -> MockOrder:
+        if category not in ('linear', 'spot'):
+            raise self._byb_error(10001, 'category only support linear or spot in mock')
+        for name in ('symbol', 'side', 'orderType', 'qty'):
+            if not params.get(name):
+                raise self._byb_error(10001, f'params error: {name} is required')
+        order_type = params['orderType'].lower()
+        price = _decimal(params.get('price'))
+        if order_type == 'limit' and price is None:
+            raise self._byb_error(10001, 'params error: price is required for limit order')
+        base, _ = self._split_symbol(params['symbol'])
+        order = MockOrder(
+            exchange='byb',
+            instrument_type='perp' if category == 'linear' else 'spot',
+            symbol=params['symbol'],
+            order_id=self.store.next_id('byb'),
+            side=params['side'].lower(),
+            order_type=order_type,
+            qty=Decimal(params['qty']),
+            price=price if order_type == 'limit' else None,
+            client_order_id=params.get('orderLinkId', ''),
+        )
+        return self.store.place(order, base)
+
+    def _byb_find(self, params: dict) -> MockOrder:
+        order = self.store.find('byb', params.get('orderId'), params.get('orderLinkId'))
+        if order is None or order.status != 'open':
+            raise self._byb_error(110001, 'order not exists or too late to cancel')
+        return order
+
+    def _add_bybit_routes(self) -> None:
+        route = lambda method, path, signed=True: self._route('byb', method, path, signed)
+        categories = {'linear': 'perp', 'spot': 'spot'}
+
+        @route('GET', '/v5/market/time', signed=False)
+        def server_time(params):
+            now = time.time()
+            return self._byb_ok({'timeSecond': str(int(now)), 'timeNano': str(int(now * 1e9))})
+
+        @route('GET', '/v5/market/instruments-info', signed=False)
+        def instruments_info(params):
+            rows = []
+            for base in self.prices:
+                row = {
+                    'symbol': f'{base}USDT',
+                    'baseCoin': base,
+                    'quoteCoin': 'USDT',
+                    'status': 'Trading',
+                    'priceFilter': {'tickSize': '0.01'},
+                }
+                if params.get('category') == 'spot':
+                    row['lotSizeFilter'] = {'basePrecision': '0.000001', 'minOrderAmt': '1'}
+                else:
+                    row['lotSizeFilter'] = {'qtyStep': '0.001', 'minNotionalValue': '5'}
+                rows.append(row)
+            return self._byb_ok({'category': params.get('category'), 'list': rows, 'nextPageCursor': ''})
+
+        @route('POST', '/v5/order/create')
+        def place(params):
+            order = self._byb_place(params.get('category'), params)
+            return self._byb_ok({'orderId': order.order_id, 'orderLinkId': order.client_order_id})
+
+        @route('POST', '/v5/order/create-batch')
+        def place_batch(params):
+            results, ext = [], []
+            for p in params.get('request', []):
+                try:
+                    order = self._byb_place(params.get('category'), p)
+                    results.append({'category': params.get('category'), 'symbol': order.symbol,
+                                    'orderId': order.order_id, 'orderLinkId': order.client_order_id})
+                    ext.append({'code': 0, 'msg': 'OK'})
+                except MockError as e:
+                    results.append({'category': params.get('category'), 'symbol': p.get('symbol'),
+                                    'orderId': '', 'orderLinkId': p.get('orderLinkId', '')})
+                    ext.append({'code': e.body['retCode'], 'msg': e.body['retMsg']})
+            return self._byb_ok({'list': results}, {'list': ext})
+
+        @route('POST', '/v5/order/amend')
+        def amend(params):
+            order = self._byb_find(params)
+            if params.get('qty'):
+                order.qty = Decimal(params['qty'])
+            if params.get('price'):
+                order.price = Decimal(params['price'])
+            order.updated_ms = int(time.time() * 1000)
+            return self._byb_ok({'orderId': order.order_id, 'orderLinkId': order.client_order_id})
+
+        @route('POST', '/v5/order/cancel')
+        def cancel(params):
+            order = self.store.cancel(self._byb_find(params))
+            return self._byb_ok({'orderId': order.order_id, 'orderLinkId': order.client_order_id})
+
+        @route('POST', '/v5/order/cancel-all')
+        def cancel_all(params):
+            instrument_type = categories.get(params.get('category'))
+            if instrument_type is None:
+                raise self._byb_error(10001, 'params error: category')
+            orders = self.store.open_orders('byb', instrument_type, params.get('symbol'))
+            for order in orders:
+                self.store.cancel(order)
+            return self._byb_ok({
+                'list': [{'orderId': o.order_id, 'orderLinkId': o.client_order_id} for o in orders],
+                'success': '1',
+            })
+
+        @route('GET', '/v5/order/realtime')
+        def open_orders(params):
+            instrument_type = categories.get(params.get('category'))
+            if instrument_type is None:
+                raise self._byb_error(10001, 'params error: category')
+            orders = self.store.open_orders('byb', instrument_type, params.get('symbol'))
+            return self._byb_ok({'category': params['category'], 'list': [self._byb_order(o) for o in orders], 'nextPageCursor': ''})
+
+    #######################
+    # OKX
+    #######################
+
+    @staticmethod
+    def _okx_ok(data: list) -> dict:
+        return {'code': '0', 'msg': '', 'data': data}
+
+    @staticmethod
+    def _okx_split(inst_id: str) -> tuple[str, str, str]:
+        """ instId -> (base, quote, instrument_type) """
+        parts = inst_id.split('-')
+        if len(parts) == 3 and parts[2] == 'SWAP':
+            return parts[0], parts[1], 'perp'
+        if len(parts) == 2:
+            return parts[0], parts[1], 'spot'
+        raise MockError(200, {'code': '51001', 'msg': "Instrument ID doesn't exist.", 'data': []})
+
+    def _okx_order(self, order: MockOrder) -> dict:
+        return {
+            'instId': order.symbol,
+            'instType': 'SWAP' if order.instrument_type == 'perp' else 'SPOT',
+            'ordId': order.order_id,
+            'clOrdId': order.client_order_id,
+            'side': order.side,
+            'ordType': order.order_type,
+            'px': _fmt(order.price) if order.order_type == 'limit' else '',
+            'sz': _fmt(order.qty),
+            'accFillSz': _fmt(order.filled_qty),
+            'state': {'open': 'live', 'filled': 'filled', 'canceled': 'canceled'}[order.status],
+            'cTime': str(order.created_ms),
+            'uTime': str(order.updated_ms),
+        }
+
+    def _okx_result(self, params: dict, action, message: str = '') -> dict:
+        """ 주문 하나의 결과 (실패해도 HTTP 200, sCode/sMsg에 사유) """
+        try:
+            order = action(params)
+        except MockError as e:
+            code = e.body.get('code', '51000')
+            return {'ordId': params.get('ordId', ''), 'clOrdId': params.get('clOrdId', ''), 'sCode': code, 'sMsg': e.body.get('msg', '')}
+        return {'ordId': order.order_id, 'clOrdId': order.client_order_id, 'sCode': '0', 'sMsg': message}
+
+    @staticmethod
+    def _okx_batch(results: list[dict]) -> dict:
+        failed = sum(1 for r in results if r['sCode'] != '0')
+        if not failed:
+            return {'code': '0', 'msg': '', 'data': results}
+        code = '1' if len(results) == 1 or failed == len(results) else '2'
+        return {'code': code, 'msg': 'Operation failed.' if code == '1' else 'Bulk operation partially succeeded.', 'data': results}
+
+    def _okx_place(self, params: dict) -> MockOrder:
+        for name in ('instId', 'tdMode', 'side', 'ordType', 'sz'):
+            if not params.get(name):
+                raise MockError(200, {'code': '51000', 'msg': f'Parameter {name} error'})
+        base, _, instrument_type = self._okx_split(params['instId'])
+        order_type = params['ordType']
+        price = _decimal(params.get('px'))
+        if order_type == 'limit' and price is None:
+            raise MockError(200, {'code': '51000', 'msg': 'Parameter px error'})
+        order = MockOrder(
+            exchange='okx',
+            instrument_type=instrument_type,
+            symbol=params['instId'],
+            order_id=self.store.next_id('okx'),
+            side=params['side'],
+            order_type=order_type,
+            qty=Decimal(params['sz']),
+            price=price if order_type == 'limit' else None,
+            client_order_id=params.get('clOrdId', ''),
+        )
+        return self.store.place(order, base)
+
+    def _okx_find(self, params: dict) -> MockOrder:
+        order = self.store.find('okx', params.get('ordId'), params.get('clOrdId'))
+        if order is None or order.symbol != params.get('instId') or order.status != 'open':
+            raise MockError(200, {'code': '51400', 'msg': 'Order cancellation failed as the order has been filled, canceled or does not exist.'})
+        return order
+
+    def _okx_amend(self, params: dict) -> MockOrder:
+        order = self._okx_find(params)
+        if params.get('newSz'):
+            order.qty = Decimal(params['newSz'])
+        if params.get('newPx'):
+            order.price = Decimal(params['newPx'])
+        order.updated_ms = int(time.time() * 1000)
+        return order
+
+    def _add_okx_routes(self) -> None:
+        route = lambda method, path, signed=True: self._route('okx', method, path, signed)
+
+        @route('GET', '/api/v5/public/time', signed=False)
+        def server_time(params):
+            return self._okx_ok([{'ts': str(int(time.time() * 1000))}])
+
+        @route('GET', '/api/v5/public/instruments', signed=False)
+        def instruments(params):
+            rows = []
+            for base in self.prices:
+                if params.get('instType') == 'SWAP':
+                    rows.append({'instId': f'{base}-USDT-SWAP', 'instType': 'SWAP', 'ctVal': '0.01', 'tickSz': '0.1', 'lotSz': '1'})
+                else:
+                    rows.append({'instId': f'{base}-USDT', 'instType': 'SPOT', 'tickSz': '0.1', 'lotSz': '0.00000001'})
+            return self._okx_ok(rows)
+
+        @route('POST', '/api/v5/trade/order')
+        def place(params):
+            return self._okx_batch([self._okx_result(params, self._okx_place, 'Order placed')])
+
+        @route('POST', '/api/v5/trade/batch-orders')
+        def place_batch(params):
+            return self._okx_batch([self._okx_result(p, self._okx_place, 'Order placed') for p in params])
+
+        @route('POST', '/api/v5/trade/amend-order')
+        def amend(params):
+            return self._okx_batch([self._okx_result(params, self._okx_amend)])
+
+        @route('POST', '/api/v5/trade/cancel-order')
+        def cancel(params):
+            return self._okx_batch([self._okx_result(params, lambda p: self.store.cancel(self._okx_find(p)))])
+
+        @route('POST', '/api/v5/trade/cancel-batch-orders')
+        def cancel_batch(params):
+            return self._okx_batch([self._okx_result(p, lambda p: self.store.cancel(self._okx_find(p))) for p in params])
+
+        @route('GET', '/api/v5/trade/orders-pending')
+        def open_orders(params):
+            inst_type = {'SWAP': 'perp', 'SPOT': 'spot'}.get(params.get('instType'))
+            orders = self.store.open_orders('okx', inst_type, params.get('instId'))
+            return self._okx_ok([self._okx_order(o) for o in orders])
+
+    #######################
+    # Upbit
+    #######################
+
+    def _upt_order(self, order: MockOrder) -> dict:
+        return {
+            'uuid': order.order_id,
+            'side': 'bid' if order.side == 'buy' else 'ask',
+            'ord_type': order.order_type,
+            'price': _fmt(order.price) if order.price is not None else None,
+            'state': {'open': 'wait', 'filled': 'done', 'canceled': 'cancel'}[order.status],
+            'market': order.symbol,
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S+09:00', time.localtime(order.created_ms / 1000)),
+            'volume': _fmt(order.qty),
+            'remaining_volume': _fmt(order.qty - order.filled_qty),
+            'executed_volume': _fmt(order.filled_qty),
+            'trades_count': 1 if order.filled_qty else 0,
+        }
+
+    def _add_upbit_routes(self) -> None:
+        route = lambda method, path, signed=True: self._route('upt', method, path, signed)
+
+        @route('GET', '/v1/market/all', signed=False)
+        def markets(params):
+            return [{'market': f'{UPBIT_QUOTE}-{base}', 'korean_name': base, 'english_name': base} for base in self.prices]
+
+        @route('POST', '/v1/orders')
+        def place(params):
+            market, side, ord_type = params.get('market', ''), params.get('side'), params.get('ord_type')
+            if '-' not in market or side not in ('bid', 'ask') or ord_type not in ('limit', 'price', 'market'):
+                raise MockError(400, {'error': {'name': 'validation_error', 'message': '잘못된 파라미터입니다.'}})
+            quote, base = market.split('-', 1)
+            price = _decimal(params.get('price'))
+            if ord_type == 'price':
+                # 시장가 매수는 금액(price)으로 주문
+                qty = price / self.store.reference_price(base, quote)
+            else:
+                qty = _decimal(params.get('volume'))
+            if qty is None or (ord_type == 'limit' and price is None):
+                raise MockError(400, {'error': {'name': 'validation_error', 'message': '잘못된 파라미터입니다.'}})
+            order = MockOrder(
+                exchange='upt',
+                instrument_type='spot',
+                symbol=market,
+                order_id=self.store.next_id('upt'),
+                side='buy' if side == 'bid' else 'sell',
+                order_type='limit' if ord_type == 'limit' else 'market',
+                qty=qty,
+                price=price,
+                client_order_id=params.get('identifier', ''),
+            )
+            return self._upt_order(self.store.place(order, base, quote))
+
+        @route('GET', '/v1/orders')
+        def orders(params):
+            state = params.get('state', 'wait')
+            if state != 'wait':
+                return []
+            return [self._upt_order(o) for o in self.store.open_orders('upt', 'spot', params.get('market'))]
+
+        @route('DELETE', '/v1/order')
+        def cancel(params):
+            order = self.store.find('upt', params.get('uuid'), params.get('identifier'))
+            if order is None or order.status != 'open':
+                raise MockError(404, {'error': {'name': 'order_not_found', 'message': '주문을 찾지 못했습니다.'}})
+            return self._upt_order(self.store.cancel(order))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--api-key', default=MOCK_KEY_PAIR[0])
+    parser.add_argument('--secret-key', default=MOCK_KEY_PAIR[1])
+    parser.add_argument('--passphrase', default=MOCK_PASSPHRASE, help='OKX passphrase')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503을 반환할 확률')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='429를 반환할 확률')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    mock = MockExchange(
+        host=args.host,
+        port=args.port,
+        key_pair=(args.api_key, args.secret_key),
+        passphrase=args.passphrase,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+
+    async def serve():
+        await mock.start()
+        print(f'mock exchange : {mock.base_url}')
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+""" 기록해 둔 WebSocket 메시지를 재생하는 로컬 서버 (api_quant.marketdata 테스트 / benchmark 용)
+
+기록 파일은 JSONL이고 BookStream(record_path=...)이 남기는 형식과 같음
+    {"t": 0.12, "ws": {...}}                                        client가 구독 메시지를 보낸 뒤 t초에 보낼 메시지
+    {"t": 0.30, "rest": "/fapi/v1/depth", "params": {...}, "body": {...}}   REST snapshot 응답
+
+    python -m benchmarks.replay_ws_server recording.jsonl --port 8765 --speed 0
+    python -m benchmarks.replay_ws_server --synthetic 10000 --gap-at 5000
+
+feed에는 ws_url=http://127.0.0.1:8765/ws, rest_url=http://127.0.0.1:8765 를 넘겨서 사용
+"""
+import argparse
+import asyncio
+import json
+import random
+
+from aiohttp import WSMsgType, web
+
+
+def load_records(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_records(
+        symbol: str = 'BTCUSDT',
+        n: int = 1000,
+        levels: int = 100,
+        tick: float = 0.1,
+        gap_at: int | None = None,
+        futures: bool = True,
+        seed: int = 0,
+) -> list[dict]:
+    """ Binance 형식의 snapshot(REST) + depthUpdate n개
+
+        snapshot은 그 시점까지 이벤트를 모두 적용한 호가이고, 첫 snapshot 직전 이벤트부터 재생함
+        `gap_at`번째 이벤트를 빼서 sequence gap을 만들고, 그 다음 이벤트 시점의 snapshot을 다시 받을 snapshot으로 넣음
+        마지막 기록 `{'expected': ...}`은 모든 이벤트를 적용한 호가 (재생하지 않음)
+    """
+    rng = random.Random(seed)
+    mid = 50000.0
+    state = {
+        'b': {f'{mid - tick * (i + 1):.1f}': f'{rng.uniform(0.01, 5):.3f}' for i in range(levels)},
+        'a': {f'{mid + tick * (i + 1):.1f}': f'{rng.uniform(0.01, 5):.3f}' for i in range(levels)},
+    }
+    update_id = 1000
+
+    def snapshot() -> dict:
+        body = {
+            'lastUpdateId': update_id,
+            'bids': sorted(([p, q] for p, q in state['b'].items()), key=lambda x: -float(x[0])),
+            'asks': sorted(([p, q] for p, q in state['a'].items()), key=lambda x: float(x[0])),
+        }
+        return {'t': 0, 'rest': '/fapi/v1/depth' if futures else '/api/v3/depth', 'params': {'symbol': symbol}, 'body': body}
+
+    records = []
+    for i in range(-1, n):
+        first = update_id + 1
+        previous = update_id
+        update_id += rng.randint(1, 3)
+        side = rng.choice(('b', 'a'))
+        offset = tick * rng.randint(1, levels)
+        price = f'{mid - offset if side == "b" else mid + offset:.1f}'
+        qty = '0.000' if rng.random() < 0.2 else f'{rng.uniform(0.01, 5):.3f}'
+        if qty == '0.000':
+            state[side].pop(price, None)
+        else:
+            state[side][price] = qty
+
+        event = {
+            'e': 'depthUpdate', 'E': 1_700_000_000_000 + i, 's': symbol,
+            'U': first, 'u': update_id, 'pu': previous,
+            'b': [[price, qty]] if side == 'b' else [],
+            'a': [[price, qty]] if side == 'a' else [],
+        }
+        if i == -1 or (gap_at is not None and i == gap_at + 1):
+            records.append(snapshot())
+        if i == gap_at:
+            continue
+        records.append({'t': 0, 'ws': {'stream': f'{symbol.lower()}@depth@100ms', 'data': event}})
+
+    records.append({'expected': snapshot()['body']})
+    return records
+
+
+class ReplayServer:
+    """ `/ws`로 연결한 client가 첫 메시지(구독)를 보내면 기록된 메시지를 순서대로 보냄
+
+        `speed`는 재생 배속 (0이면 기다리지 않고 바로 보냄)
+        REST 요청은 path(와 params의 symbol)가 같은 기록을 순서대로 하나씩 반환
+    """
+    def __init__(self, records: list[dict], host: str = '127.0.0.1', port: int = 0, speed: float = 0):
+        self._ws_records = [r for r in records if 'ws' in r]
+        self._rest_records = [r for r in records if 'rest' in r]
+        self._host = host
+        self._port = port
+        self._speed = speed
+        self._runner: web.AppRunner | None = None
+        self.received: list = []
+        self.sent_count = 0
+
+        app = web.Application()
+        app.router.add_get('/ws', self._ws_handler)
+        app.router.add_get('/{path:.*}', self._rest_handler)
+        self._app = app
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self._host}:{self._port}'
+
+    @property
+    def ws_url(self) -> str:
+        return f'{self.base_url}/ws'
+
+    async def start(self) -> 'ReplayServer':
+        self._runner = web.AppRunner(self._app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        self._port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+    async def __aenter__(self) -> 'ReplayServer':
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.stop()
+
+    async def _rest_handler(self, request: web.Request) -> web.Response:
+        path = '/' + request.match_info['path']
+        symbol = request.query.get('symbol')
+        matched = [
+            i for i, record in enumerate(self._rest_records)
+            if record['rest'] == path and (record.get('params') or {}).get('symbol', symbol) == symbol
+        ]
+        if matched:
+            # 기록된 응답을 순서대로 반환하고, 마지막 응답은 계속 반환
+            record = self._rest_records[matched[0]]
+            if len(matched) > 1:
+                del self._rest_records[matched[0]]
+            return web.json_response(record['body'])
+        return web.json_response({'code': -1, 'msg': f'기록된 응답이 없습니다. ({path})'}, status=404)
+
+    async def _ws_handler(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        msg = await ws.receive()
+        if msg.type != WSMsgType.TEXT:
+            return ws
+        self.received.append(msg.data)
+        reader = asyncio.create_task(self._read(ws))
+
+        previous = self._ws_records[0]['t'] if self._ws_records else 0
+        for record in self._ws_records:
+            if self._speed and record['t'] > previous:
+                await asyncio.sleep((record['t'] - previous) / self._speed)
+            previous = record['t']
+            if ws.closed:
+                break
+            message = record['ws']
+            await ws.send_str(message if isinstance(message, str) else json.dumps(message))
+            self.sent_count += 1
+
+        # 재생이 끝나도 client가 닫을 때까지 연결을 유지 (재연결되어 처음부터 다시 재생되지 않도록)
+        await reader
+        return ws
+
+    async def _read(self, ws: web.WebSocketResponse) -> None:
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                self.received.append(msg.data)
+                if msg.data == 'ping':
+                    await ws.send_str('pong')
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    if args.synthetic:
+        records = synthetic_records(n=args.synthetic, gap_at=args.gap_at)
+    else:
+        records = load_records(args.path)
+    server = await ReplayServer(records, args.host, args.port, args.speed).start()
+    print(f'ws {server.ws_url}, rest {server.base_url} ({len(records)} records)')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', nargs='?')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--speed', type=float, default=1.0)
+    parser.add_argument('--synthetic', type=int, help='기록 파일 대신 Binance 형식의 이벤트를 n개 만들어서 재생')
+    parser.add_argument('--gap-at', type=int)
+    args = parser.parse_args()
+    if not args.path and not args.synthetic:
+        parser.error('path 또는 --synthetic 이 필요합니다.')
+
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
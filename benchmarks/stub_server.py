@@ -0,0 +1,57 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # keep-alive를 지원하기 위해 HTTP/1.1로 응답
+    protocol_version = 'HTTP/1.1'
+    # header와 body가 따로 전송될 때 Nagle + delayed ACK로 40ms 지연이 생기는 것을 방지
+    disable_nagle_algorithm = True
+    body = json.dumps({'code': 0, 'msg': 'ok'}).encode()
+
+    def _reply(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    do_GET = _reply
+    do_POST = _reply
+    do_PUT = _reply
+    do_DELETE = _reply
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class StubServer:
+    """ 모든 method / path에 고정된 JSON을 반환하는 로컬 HTTP 서버 (benchmark 용) """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'StubServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
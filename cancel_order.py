@@ -1,11 +1,12 @@
 from decimal import Decimal
-from api_trading_script import place_order, cancel_order, query_open_order
+from gateway_client import call
 from pprint import pprint
 
 
 '''
-Binance cancel 은 symbol이 필수이기 때문에 base_asset, quote_asset을 인풋해야함     단 query open order는 전체 조회 가능
-Bybit V2 는 cancel, query open order 에서 symbol이 필수이기 때문에 base_asset, quote_asset을 인풋해야함
+base_asset이 None이면 전체 미체결 주문을 취소
+Binance 는 미체결 주문이 있는 symbol 별로 allOpenOrders 취소, Bybit 은 cancel-all (linear 는 USDT 정산 기준)
+OKX 는 cancel-batch-orders (20개씩), Upbit 은 bulk 취소가 없어서 주문 별 취소 요청을 동시에 보냄
 
 OKX 는 모든  
 '''
@@ -17,13 +18,16 @@ quote_asset = 'usdt' # 'krw', 'usdt', 'busd'
 
 if __name__ == "__main__":
     if base_asset is None:
-        print('Base_asset이 None이면 전체 미체결된 모든 Open Order에 대한 취소입니다. (단, OKX만 가능)')
+        print('Base_asset이 None이면 전체 미체결된 모든 Open Order에 대한 취소입니다.')
         quote_asset = None
 
-    result = cancel_order(
+    # gateway.py 가 떠 있으면 gateway로 보내고, 없으면 이 process에서 바로 취소
+    report = call(
+        'cancel',
         exchange=exchange,
         base_asset=base_asset,
         quote_asset=quote_asset,
     )
 
-    pprint(result)
\ No newline at end of file
+    pprint(report['responses'])
+    print(f'{report["exchange"]} 취소 요청 {report["requests"]}건, {report["elapsed_ms"]:.1f}ms')
\ No newline at end of file
@@ -0,0 +1,248 @@
+""" 주문 gateway daemon
+
+거래소 client(연결 pool, 서버 시간 offset), 종목 정보를 메모리에 올려두고
+Unix domain socket으로 place / cancel / query 명령을 받아서 실행 (protocol은 gateway_client.py 참고)
+
+    python gateway.py
+    python gateway.py --socket /tmp/gateway.sock --workers 16
+    python gateway.py --user-streams    # private stream으로 미체결 주문/체결을 메모리에 유지 (조회, 취소 전 조회를 REST 없이 처리)
+    python gateway.py --ws-orders       # 주문/정정/id 취소를 WebSocket으로 보냄 (연결이 끊기면 REST)
+    python gateway.py --metrics-port 9464   # REST 요청의 단계 별 시간, 오류 수, rate limit 여유를 http://127.0.0.1:9464/metrics 로 노출
+
+place_order.py, cancel_order.py, query_open_order.py, kill_switch.py 는 gateway가 떠 있으면 gateway로 명령을 보냄
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import stat
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import api_trading_script as api
+from api_quant import metrics
+from gateway_client import DEFAULT_SOCKET_PATH, HEADER, MAX_FRAME_SIZE, GatewayClient, encode
+
+logger = logging.getLogger('gateway')
+
+
+def _order_args(args: dict) -> dict:
+    # JSON으로 넘어온 수량, 가격을 Decimal로 되돌림
+    args = dict(args)
+    args['qty'] = Decimal(str(args['qty']))
+    if args.get('price') is not None:
+        args['price'] = Decimal(str(args['price']))
+    return args
+
+
+COMMANDS = {
+    'ping': lambda: {'time': time.time()},
+    'place': lambda **args: api.place_order(**_order_args(args)),
+    'place_batch': lambda orders: api.place_orders([_order_args(order) for order in orders]),
+    'cancel': api.cancel_order,
+    'query': api.query_open_order,
+    'kill_switch': api.kill_switch,
+    'fills': lambda exchange, limit=100: api.order_cache.fills(exchange, limit),
+    'amend': api.amend_order,
+    'cancel_id': api.cancel_order_by_id,
+    'metrics': metrics.snapshot,
+}
+
+
+def execute(op: str, args: dict):
+    if op not in COMMANDS:
+        raise ValueError(f'알 수 없는 명령입니다. ({op})')
+    return COMMANDS[op](**args)
+
+
+# 거래소 이름 -> 그 거래소의 client (서버 시간 조회로 연결을 열고 clock offset을 맞춤)
+CLIENTS = {
+    'bnc': (api.bnc_futures, api.bnc_spot),
+    'byb': (api.byb,),
+    'okx': (api.okx,),
+    'upt': (api.upt,),
+}
+
+
+def warm_up(exchange: str) -> None:
+    """ client 생성, 서버 시간 동기화(TLS 연결 포함), 종목 정보 로드를 미리 해둠 """
+    for client in CLIENTS[exchange]:
+        clock = getattr(client.get(), 'clock', None)
+        if clock is not None:
+            clock.sync()
+    api.instrument_registry.instruments(exchange)
+
+
+class Gateway:
+    def __init__(
+            self,
+            socket_path: str = DEFAULT_SOCKET_PATH,
+            workers: int = 16,
+            keepalive_interval: float = 60,
+            user_streams: bool = False,
+            ws_orders: bool = False,
+            metrics_port: int | None = None,
+    ):
+        self._socket_path = socket_path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gateway')
+        self._keepalive_interval = keepalive_interval
+        self._user_streams = user_streams
+        self._ws_orders = ws_orders
+        self._metrics_port = metrics_port
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        # 이미 떠 있는 gateway가 있으면 warm up, private stream 연결 전에 멈춤
+        self._check_socket_path()
+
+        # warm up 요청부터 기록되도록 client를 만들기 전에 켬
+        metrics_server = metrics.serve(self._metrics_port) if self._metrics_port is not None else None
+
+        await asyncio.gather(*(self._warm_up(exchange) for exchange in CLIENTS))
+        if self._user_streams:
+            api.start_user_streams()
+        if self._ws_orders:
+            # 연결될 때까지 기다리는 동안 event loop를 막지 않도록 thread에서 실행
+            await loop.run_in_executor(self._executor, api.start_ws_order_entry)
+
+        # start_unix_server는 같은 경로의 socket 파일을 지우므로 bind 직전에 다시 확인
+        self._check_socket_path()
+        # 같은 사용자만 주문을 보낼 수 있도록 socket 파일을 처음부터 0600으로 만듦 (bind 후 chmod하면 그 사이에 접속할 수 있음)
+        umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self._handle, path=self._socket_path)
+        finally:
+            os.umask(umask)
+        logger.info(f'gateway 시작 ({self._socket_path})')
+
+        keepalive = loop.create_task(self._keepalive())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            keepalive.cancel()
+            api.stop_user_streams()
+            api.stop_ws_order_entry()
+            if metrics_server is not None:
+                metrics_server.shutdown()
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+
+    def _check_socket_path(self) -> None:
+        """ socket 경로에서 다른 gateway가 응답하면 시작하지 않고, 응답하지 않는 (이전 gateway가 남긴) 파일은 지움 """
+        try:
+            GatewayClient(self._socket_path, timeout=1).close()
+        except FileNotFoundError:
+            return
+        except ConnectionRefusedError:
+            # socket이 아닌 파일은 지우지 않음 (bind에서 실패)
+            if stat.S_ISSOCK(os.stat(self._socket_path).st_mode):
+                os.remove(self._socket_path)
+            return
+        except TimeoutError:
+            # 연결은 받지만 응답이 느린 gateway도 살아 있는 것으로 봄
+            pass
+        raise RuntimeError(f'다른 gateway가 이미 실행 중입니다. ({self._socket_path})')
+
+    async def _warm_up(self, exchange: str) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, warm_up, exchange)
+            logger.info(f'{exchange} 준비 완료 ({(time.perf_counter() - started) * 1000:.0f}ms)')
+        except Exception as e:
+            # 한 거래소가 실패해도 나머지 거래소는 사용할 수 있도록 함 (첫 요청 때 다시 시도됨)
+            logger.warning(f'{exchange} 준비에 실패했습니다. ({e!r})')
+
+    async def _keepalive(self) -> None:
+        # 거래소가 idle connection을 끊지 않도록 주기적으로 서버 시간을 다시 맞춤
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self._keepalive_interval)
+            for clients in CLIENTS.values():
+                for client in clients:
+                    clock = getattr(client.get(), 'clock', None) if client.created else None
+                    if clock is None:
+                        continue
+                    try:
+                        await loop.run_in_executor(self._executor, clock.sync)
+                    except Exception as e:
+                        logger.warning(f'keepalive 요청에 실패했습니다. ({e!r})')
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # 한 연결에서 여러 명령을 동시에 받을 수 있고, 응답은 끝나는 순서대로 id와 함께 보냄
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                try:
+                    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    if size > MAX_FRAME_SIZE:
+                        raise ValueError(f'요청이 너무 큽니다. ({size} bytes)')
+                    message = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    break
+
+                task = asyncio.create_task(self._dispatch(message, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except Exception as e:
+            logger.warning(f'잘못된 요청으로 연결을 닫습니다. ({e!r})')
+        finally:
+            writer.close()
+
+    async def _dispatch(self, message: dict, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        request_id = message.get('id')
+        op = message.get('op')
+        started = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._executor, execute, op, message.get('args') or {}
+            )
+            response = {'id': request_id, 'ok': True, 'result': result}
+        except Exception as e:
+            response = {'id': request_id, 'ok': False, 'error': repr(e)}
+        log = logger.debug if op == 'ping' else logger.info
+        log(f'{op} {"ok" if response["ok"] else "error"} ({(time.perf_counter() - started) * 1000:.1f}ms)')
+
+        try:
+            frame = encode(response)
+        except TypeError as e:
+            frame = encode({'id': request_id, 'ok': False, 'error': repr(e)})
+
+        async with write_lock:
+            writer.write(frame)
+            await writer.drain()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--keepalive-interval', type=float, default=60)
+    parser.add_argument('--user-streams', action='store_true')
+    parser.add_argument('--ws-orders', action='store_true')
+    parser.add_argument('--metrics-port', type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    gateway = Gateway(
+        args.socket,
+        workers=args.workers,
+        keepalive_interval=args.keepalive_interval,
+        user_streams=args.user_streams,
+        ws_orders=args.ws_orders,
+        metrics_port=args.metrics_port,
+    )
+    try:
+        asyncio.run(gateway.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
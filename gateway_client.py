@@ -0,0 +1,116 @@
+""" gateway.py 에 명령을 보내는 client
+
+script가 빠르게 시작되도록 표준 라이브러리만 import 하고, gateway가 떠 있지 않으면 같은 명령을 현재 process에서 실행
+
+protocol : 4 byte big-endian 길이 + UTF-8 JSON
+    request  {"id": 1, "op": "place", "args": {...}}
+    response {"id": 1, "ok": true, "result": ...}  /  {"id": 1, "ok": false, "error": "..."}
+    op       ping, place, place_batch, cancel, query, kill_switch (args 는 api_trading_script 의 같은 함수 인자)
+             fills (args : exchange, limit / gateway.py --user-streams 로 실행한 경우에만 체결 내역이 쌓임)
+             amend, cancel_id (api_trading_script 의 amend_order, cancel_order_by_id / gateway.py --ws-orders 면 WebSocket으로 보냄)
+             metrics (REST 요청의 단계 별 시간, 오류 수, rate limit 여유 / gateway.py --metrics-port 로 실행한 경우에만 기록됨)
+"""
+import dataclasses
+import itertools
+import json
+import os
+import socket
+import struct
+from decimal import Decimal
+
+DEFAULT_SOCKET_PATH = os.environ.get('API_GATEWAY_SOCKET') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'settings/gateway.sock'
+)
+
+HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+
+class GatewayError(Exception):
+    """ gateway가 명령을 실행하다 실패한 경우 (gateway에 연결하지 못한 경우는 OSError) """
+
+
+def _json_default(v):
+    if isinstance(v, Decimal):
+        return str(v)
+    if dataclasses.is_dataclass(v):
+        return dataclasses.asdict(v)
+    raise TypeError(f'JSON으로 변환할 수 없는 값입니다. ({type(v).__name__})')
+
+
+def encode(message: dict) -> bytes:
+    body = json.dumps(message, default=_json_default, separators=(',', ':')).encode()
+    return HEADER.pack(len(body)) + body
+
+
+def to_jsonable(value):
+    """ gateway를 거친 결과와 같은 형태가 되도록 JSON으로 변환했다가 다시 읽음 """
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError('gateway와의 연결이 끊어졌습니다.')
+        buf += chunk
+    return bytes(buf)
+
+
+class GatewayClient:
+    """ 연결 하나로 여러 명령을 순서대로 보냄
+
+        with GatewayClient() as gateway:
+            gateway.request('query', exchange='all')
+    """
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float | None = None):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(socket_path)
+        except OSError:
+            self._sock.close()
+            raise
+        self._ids = itertools.count(1)
+
+    def request(self, op: str, **args):
+        request_id = next(self._ids)
+        self._sock.sendall(encode({'id': request_id, 'op': op, 'args': args}))
+
+        (size,) = HEADER.unpack(_recv_exactly(self._sock, HEADER.size))
+        if size > MAX_FRAME_SIZE:
+            raise GatewayError(f'응답이 너무 큽니다. ({size} bytes)')
+        response = json.loads(_recv_exactly(self._sock, size))
+
+        if not response.get('ok'):
+            raise GatewayError(response.get('error'))
+        return response['result']
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def run_local(op: str, **args):
+    # gateway가 없을 때만 무거운 module(api_trading_script 등)을 import
+    from gateway import execute
+    return to_jsonable(execute(op, args))
+
+
+def call(op: str, socket_path: str = DEFAULT_SOCKET_PATH, fallback: bool = True, **args):
+    """ gateway에 명령을 보내고, gateway가 떠 있지 않으면 (fallback=True인 경우) 현재 process에서 실행 """
+    try:
+        gateway = GatewayClient(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if not fallback:
+            raise
+        return run_local(op, **args)
+
+    with gateway:
+        return gateway.request(op, **args)
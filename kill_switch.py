@@ -0,0 +1,30 @@
+from gateway_client import call
+
+
+'''
+모든 거래소(bnc, byb, okx, upt)의 모든 미체결 주문을 동시에 취소
+
+거래소 별로 bulk 취소를 보낸 뒤 미체결 주문을 다시 조회해서, 남은 주문이 있으면 retries 번까지 다시 취소
+deadline 초가 지나면 끝나지 않은 거래소는 기다리지 않고 timeout 으로 표시 (이미 보낸 취소 요청은 계속 진행됨)
+Bybit linear 는 USDT 정산 기준으로 취소
+'''
+
+deadline = 10.0  # 초
+retries = 2
+
+
+if __name__ == "__main__":
+    # gateway.py 가 떠 있으면 이미 열려 있는 연결로 바로 취소
+    reports = call(
+        'kill_switch',
+        deadline=deadline,
+        retries=retries,
+    )
+
+    print(f'{"exchange":<10}{"attempts":>10}{"requests":>10}{"remaining":>11}{"elapsed_ms":>12}  error')
+    for report in reports.values():
+        remaining = '-' if report['remaining'] is None else report['remaining']
+        print(
+            f'{report["exchange"]:<10}{report["attempts"]:>10}{report["requests"]:>10}{remaining:>11}'
+            f'{report["elapsed_ms"]:>12.1f}  {report["error"] or ""}'
+        )
@@ -1,5 +1,5 @@
 from decimal import Decimal
-from api_trading_script import place_order
+from gateway_client import call
 from pprint import pprint
 
 '''
@@ -29,7 +29,9 @@ price = Decimal('18_000')    # upbit인 경우 KRW 기준
 
 if __name__ == "__main__":
 
-    result = place_order(
+    # gateway.py 가 떠 있으면 gateway로 보내고, 없으면 이 process에서 바로 주문
+    result = call(
+        'place',
         exchange=exchange,
         instrument_type=instrument_type,
         base_asset=base_asset,
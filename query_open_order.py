@@ -1,29 +1,41 @@
 from decimal import Decimal
-from api_trading_script import place_order, cancel_order, query_open_order
+from gateway_client import call
 from pprint import pprint
 
 '''
-Bybit V2 는 cancel, query open order 에서 symbol이 필수이기 때문에 base_asset, quote_asset을 인풋해야함 
+exchange 를 'all' 로 주면 모든 거래소를 동시에 조회해서 공통 형식으로 합친 목록과 거래소 별 오류를 반환
+(응답이 늦거나 실패한 거래소는 결과에서 빠지고 errors 에 기록됨)
+Bybit 은 base_asset 을 None으로 주면 linear 는 USDT 정산 기준, spot 은 전체 조회
 
-Binance는 base_asset 을 None으로 주면 전체 open order 조회. symbol로 따로 조회할 필요 없이....   단 취소는 base_asset 필수 
+Binance는 base_asset 을 None으로 주면 전체 open order 조회. symbol로 따로 조회할 필요 없이....
 OKX 는  base_asset 을 None으로 주면 전체 open order 조회. symbol로 따로 조회할 필요 없이
 '''
 
-exchange = 'byb'  # 'byb', 'bnc', 'okx, 'upt'
+exchange = 'byb'  # 'byb', 'bnc', 'okx, 'upt', 'all'
 
 base_asset = 'btc' # 'eth'
 quote_asset = 'usdt' # 'krw', 'usdt', 'busd'
 
+timeout = None  # 초, None이면 'all'은 5초 (그 안에 응답하지 않은 거래소는 errors 에 'timeout'으로 기록됨)
+
 
 if __name__ == "__main__":
     if base_asset is None:
-        print('Base_asset이 None이면 모든 종목의 Open Order 조회입니다. (단, OKX, Binance만 가능)')
+        print('Base_asset이 None이면 모든 종목의 Open Order 조회입니다.')
         quote_asset = None
 
-    result = query_open_order(
+    # gateway.py 가 떠 있으면 gateway로 보내고, 없으면 이 process에서 바로 조회
+    result = call(
+        'query',
         exchange=exchange,
         base_asset=base_asset,
         quote_asset=quote_asset,
+        timeout=timeout,
     )
 
+    if exchange == 'all':
+        for venue, error in result['errors'].items():
+            print(f'{venue} 조회 실패: {error}')
+        result = result['orders']
+
     pprint(result)
\ No newline at end of file